@@ -0,0 +1,186 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import sys
+import typing
+
+from SyntaxTree import NO_NODE, SyntaxTree
+
+# A binary parse tree (.jbt) file is:
+#   MAGIC
+#   varint count, then every node kind ("class", "keyword", ...) as a string
+#   varint count, then every distinct terminal text as a string
+#   varint length, then the nodes in preorder
+# a string is a varint byte length followed by its utf-8 bytes, a varint is
+# 7 bits per byte, least significant first, the high bit set on all bytes
+# but the last. Every node is a varint code: 0 closes the innermost open
+# non-terminal, otherwise kind = (code - 1) >> 1 and the low bit of code - 1
+# tells a terminal, which is followed by the varint index of its text.
+MAGIC = b"JBT\x01"
+END_CODE = 0
+
+
+def encode_varint(value: int, output: bytearray) -> None:
+    while value >= 0x80:
+        output.append((value & 0x7f) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def encode_string(text: str, output: bytearray) -> None:
+    data = text.encode('utf-8')
+    encode_varint(len(data), output)
+    output += data
+
+
+class BinaryWriter:
+    """Takes the place of an XmlWriter and writes the binary parse tree
+    format instead of XML.
+
+    The kinds and texts are interned into tables as they arrive and the
+    nodes are encoded into a byte buffer, the whole file is written out when
+    the outermost tag is closed.
+    """
+
+    def __init__(self, output_stream: typing.BinaryIO) -> None:
+        """
+        :param output_stream: The output stream, opened in binary mode.
+        """
+        self.output = output_stream
+        self.nodes = bytearray()
+        # kind or text -> its index in the table, dicts keep the order
+        self.kinds = {}
+        self.texts = {}
+
+    def code(self, kind: str, terminal: bool) -> int:
+        index = self.kinds.get(kind)
+        if index is None:
+            index = self.kinds[kind] = len(self.kinds)
+        return ((index << 1) | terminal) + 1
+
+    def open_tag(self, tag_name: str, depth: int) -> None:
+        encode_varint(self.code(tag_name, False), self.nodes)
+
+    def close_tag(self, tag_name: str, depth: int) -> None:
+        self.nodes.append(END_CODE)
+        # the outermost tag is closed, nothing else will be written
+        if depth == 0:
+            self.flush()
+
+    def terminal(self, label: str, name, depth: int) -> None:
+        text = str(name)
+        index = self.texts.get(text)
+        if index is None:
+            index = self.texts[text] = len(self.texts)
+        encode_varint(self.code(label, True), self.nodes)
+        encode_varint(index, self.nodes)
+
+    def flush(self) -> None:
+        if not self.nodes:
+            return
+        header = bytearray(MAGIC)
+        for table in (self.kinds, self.texts):
+            encode_varint(len(table), header)
+            for text in table:
+                encode_string(text, header)
+        encode_varint(len(self.nodes), header)
+        self.output.write(bytes(header))
+        self.output.write(bytes(self.nodes))
+        self.nodes = bytearray()
+        self.kinds = {}
+        self.texts = {}
+
+
+class BinaryTreeReader:
+    """Decodes a binary parse tree file back into a SyntaxTree."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.position = 0
+
+    def varint(self) -> int:
+        data = self.data
+        byte = data[self.position]
+        self.position += 1
+        # most values are small, and fit in a single byte
+        if byte < 0x80:
+            return byte
+        value = byte & 0x7f
+        shift = 7
+        while True:
+            byte = data[self.position]
+            self.position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def string(self) -> str:
+        length = self.varint()
+        start = self.position
+        self.position += length
+        return self.data[start:self.position].decode('utf-8')
+
+    def read(self) -> SyntaxTree:
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a binary parse tree")
+        self.position = len(MAGIC)
+        kinds = [sys.intern(self.string()) for _ in range(self.varint())]
+        tree = SyntaxTree()
+        tree.texts = [self.string() for _ in range(self.varint())]
+        end = self.varint() + self.position
+        # the arena lists are filled directly, add_node would append a text
+        # for every terminal instead of sharing the table
+        tree_kinds = tree.kinds
+        tree_token = tree.token
+        first_child = tree.first_child
+        next_sibling = tree.next_sibling
+        # the open non-terminals, and the last child added to each of them
+        open_nodes = []
+        last_children = []
+        varint = self.varint
+        while self.position < end:
+            code = varint()
+            if code == END_CODE:
+                open_nodes.pop()
+                last_children.pop()
+                continue
+            code -= 1
+            node = len(tree_kinds)
+            tree_kinds.append(kinds[code >> 1])
+            tree_token.append(varint() if code & 1 else NO_NODE)
+            first_child.append(NO_NODE)
+            next_sibling.append(NO_NODE)
+            if not open_nodes:
+                if tree.root == NO_NODE:
+                    tree.root = node
+            elif last_children[-1] == NO_NODE:
+                first_child[open_nodes[-1]] = node
+            else:
+                next_sibling[last_children[-1]] = node
+            if open_nodes:
+                last_children[-1] = node
+            if not code & 1:
+                open_nodes.append(node)
+                last_children.append(NO_NODE)
+        return tree
+
+
+def read_tree(data: bytes) -> SyntaxTree:
+    """Loads a binary parse tree from its bytes."""
+    return BinaryTreeReader(data).read()
+
+
+def load_tree(path: str) -> SyntaxTree:
+    """Loads a binary parse tree file written by JackAnalyzer --binary."""
+    with open(path, 'rb') as input_file:
+        return read_tree(input_file.read())
+
+
+if __name__ == '__main__':
+    # prints the XML of a binary parse tree file
+    from XmlWriter import XmlWriter
+    load_tree(sys.argv[1]).write_xml(XmlWriter(sys.stdout))
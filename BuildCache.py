@@ -0,0 +1,90 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import hashlib
+import json
+import os
+import typing
+
+# change this whenever the output of the analyzer changes, so that outputs
+# written by an older version are not reused
+ANALYZER_VERSION = "3"
+CACHE_FILE = ".jackcache.json"
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """A manifest of the outputs the analyzer already wrote, so that files
+    whose source did not change are not analyzed again.
+
+    The manifest is a json file next to the outputs, mapping every output
+    path (relative to the manifest) to the key it was written with: the
+    hash of its source, the analyzer version and the options that change
+    the output.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, CACHE_FILE)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.path, 'r') as manifest:
+                data = json.load(manifest)
+            if data.get("version") == ANALYZER_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            # no manifest yet, or a broken one: start from an empty cache
+            pass
+
+    def key(self, input_path: str, options: typing.Iterable[str]) -> str:
+        return "{}:{}:{}".format(
+            ANALYZER_VERSION, ",".join(options), file_hash(input_path))
+
+    def name(self, output_path: str) -> str:
+        return os.path.relpath(output_path, self.directory)
+
+    def is_fresh(self, output_path: str, key: str) -> bool:
+        """Was output_path written from the same source and options, and is
+        it still there? Counts a hit or a miss."""
+        fresh = self.entries.get(self.name(output_path)) == key \
+            and os.path.exists(output_path)
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, output_path: str, key: str) -> None:
+        self.entries[self.name(output_path)] = key
+
+    def forget(self, output_path: str) -> None:
+        self.entries.pop(self.name(output_path), None)
+
+    def save(self) -> None:
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as manifest:
+            json.dump({"version": ANALYZER_VERSION, "entries": self.entries},
+                      manifest, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        return "cache: {} hits, {} misses ({:.0%} hit rate)".format(
+            self.hits, self.misses, self.hits / total if total else 0)
@@ -0,0 +1,296 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import typing
+
+from BuildCache import file_hash
+from CompilationEngine import CompilationEngine
+from JackTokenizer import JackTokenizer
+
+# change this whenever the records of the index change
+INDEX_VERSION = "2"
+INDEX_FILE = ".jackindex.json"
+
+
+class DeclarationCollector:
+    """Takes the place of an XmlWriter in the CompilationEngine and keeps
+    only the class level declarations: the name of every class, its fields
+    and statics, and the signatures of its subroutines.
+    """
+
+    def __init__(self) -> None:
+        self.classes = []
+        self.open_tags = []
+        # the terminals of the classVarDec or subroutineDec being parsed,
+        # and of its parameter list
+        self.terminals = []
+        self.parameters = []
+
+    def open_tag(self, tag_name: str, depth: int) -> None:
+        self.open_tags.append(tag_name)
+        if tag_name == "class":
+            self.classes.append({"name": None, "fields": [], "subroutines": []})
+        elif tag_name in ("classVarDec", "subroutineDec"):
+            self.terminals = []
+        elif tag_name == "parameterList":
+            self.parameters = []
+
+    def terminal(self, label: str, name, depth: int) -> None:
+        tag_name = self.open_tags[-1] if self.open_tags else None
+        if tag_name == "class":
+            if label == "identifier" and self.classes[-1]["name"] is None:
+                self.classes[-1]["name"] = str(name)
+        elif tag_name in ("classVarDec", "subroutineDec"):
+            self.terminals.append(str(name))
+        elif tag_name == "parameterList":
+            self.parameters.append(str(name))
+
+    def close_tag(self, tag_name: str, depth: int) -> None:
+        self.open_tags.pop()
+        if not self.classes:
+            return
+        current_class = self.classes[-1]
+        if tag_name == "classVarDec" and len(self.terminals) >= 3:
+            # (static | field) type name (, name)* ;
+            kind, var_type = self.terminals[:2]
+            for name in self.terminals[2:]:
+                if name not in (",", ";"):
+                    current_class["fields"].append(
+                        {"name": name, "kind": kind, "type": var_type})
+        elif tag_name == "subroutineDec" and len(self.terminals) >= 3:
+            # (constructor | function | method) type name ( parameters )
+            kind, return_type, name = self.terminals[:3]
+            words = [word for word in self.parameters if word != ","]
+            current_class["subroutines"].append({
+                "name": name, "kind": kind, "return_type": return_type,
+                "parameters": [words[i:i + 2]
+                               for i in range(0, len(words) - 1, 2)]})
+
+    def flush(self) -> None:
+        pass
+
+
+def index_file(path: str) -> typing.Dict:
+    """Parses one file and returns its entry in the index: the class
+    records, and what the index needs to tell when the file changed.
+
+    This is the unit of work of the process pool, so a file that cannot be
+    read or parsed is reported in the entry instead of raising. The file is
+    parsed strictly, and the declarations of a file with a syntax error are
+    not kept: they are whatever came before the error, and ClassIndex.update
+    keeps the ones of the last version that parsed instead.
+    """
+    status = os.stat(path)
+    entry = {"size": status.st_size, "mtime_ns": status.st_mtime_ns,
+             "hash": file_hash(path), "classes": [], "error": None}
+    collector = DeclarationCollector()
+    try:
+        with open(path, 'r') as input_file:
+            CompilationEngine(JackTokenizer(input_file),
+                              writer=collector, strict=True).compile()
+    except Exception as error:
+        entry["error"] = "{}: {}".format(type(error).__name__, error)
+        return entry
+    entry["classes"] = collector.classes
+    return entry
+
+
+class ClassIndex:
+    """A persistent index of the classes, fields and subroutine signatures
+    of a directory of Jack files.
+
+    The index is a json file in the directory, with an entry for every file
+    (relative to the directory). update() only parses again the files that
+    were added or changed since the last update, and the lookups are dicts
+    built when the index is loaded, so a query never parses anything.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_FILE)
+        self.files = {}
+        # how many files the last update parsed, and how many it reused
+        self.parsed = 0
+        self.reused = 0
+        try:
+            with open(self.path, 'r') as index_file:
+                data = json.load(index_file)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            # no index yet, or a broken one: start from an empty index
+            pass
+        self.build_lookups()
+
+    def build_lookups(self) -> None:
+        # class name -> class record and the file defining it,
+        # (class name, subroutine name) -> subroutine record, subroutine
+        # name -> names of the classes defining it
+        self.classes = {}
+        self.class_files = {}
+        self.subroutines = {}
+        self.definers = {}
+        for name, entry in sorted(self.files.items()):
+            for class_record in entry["classes"]:
+                self.classes[class_record["name"]] = class_record
+                self.class_files[class_record["name"]] = name
+                for subroutine in class_record["subroutines"]:
+                    self.subroutines[class_record["name"],
+                                     subroutine["name"]] = subroutine
+                    self.definers.setdefault(subroutine["name"], []).append(
+                        class_record["name"])
+
+    def is_fresh(self, name: str, path: str) -> bool:
+        """Is the entry of a file still up to date? The size and the
+        modification time usually tell, the hash decides when they moved
+        but the content is the same."""
+        entry = self.files.get(name)
+        if entry is None:
+            return False
+        status = os.stat(path)
+        if status.st_size != entry["size"]:
+            return False
+        if status.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if file_hash(path) != entry["hash"]:
+            return False
+        entry["mtime_ns"] = status.st_mtime_ns
+        return True
+
+    def update(self, jobs: int = 0) -> None:
+        """Indexes the new and changed .jack files of the directory in jobs
+        processes (default: number of cores), forgets the deleted ones."""
+        paths = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if os.path.splitext(filename)[1].lower() == ".jack":
+                paths[filename] = os.path.join(self.directory, filename)
+        for name in list(self.files):
+            if name not in paths:
+                del self.files[name]
+        stale = [name for name, path in paths.items()
+                 if not self.is_fresh(name, path)]
+        self.parsed = len(stale)
+        self.reused = len(paths) - len(stale)
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(stale) <= 1:
+            for name in stale:
+                self.add_entry(name, index_file(paths[name]))
+        else:
+            # largest first, like the analyzer schedules its files
+            stale.sort(key=lambda name: os.path.getsize(paths[name]),
+                       reverse=True)
+            with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+                for name, entry in zip(stale, executor.map(
+                        index_file, [paths[name] for name in stale])):
+                    self.add_entry(name, entry)
+        self.build_lookups()
+
+    def add_entry(self, name: str, entry: typing.Dict) -> None:
+        """Puts the new entry of a file in the index. A file that does not
+        parse (say, saved in the middle of an edit) keeps the classes of its
+        previous entry, with the error noted, until it parses again."""
+        previous = self.files.get(name)
+        if entry["error"] and previous is not None:
+            entry["classes"] = previous["classes"]
+        self.files[name] = entry
+
+    def save(self) -> None:
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as index_file:
+            json.dump({"version": INDEX_VERSION, "files": self.files},
+                      index_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def find_class(self, name: str) -> typing.Optional[typing.Dict]:
+        return self.classes.get(name)
+
+    def find_subroutine(self, class_name: str,
+                        name: str) -> typing.Optional[typing.Dict]:
+        return self.subroutines.get((class_name, name))
+
+    def classes_defining(self, name: str) -> typing.List[str]:
+        """The names of the classes that define a subroutine called name."""
+        return self.definers.get(name, [])
+
+    def errors(self) -> typing.Dict[str, str]:
+        return {name: entry["error"] for name, entry in self.files.items()
+                if entry["error"]}
+
+
+def format_signature(class_name: str, subroutine: typing.Dict) -> str:
+    return "{} {} {}.{}({})".format(
+        subroutine["kind"], subroutine["return_type"], class_name,
+        subroutine["name"], ", ".join(
+            " ".join(parameter) for parameter in subroutine["parameters"]))
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python3 ClassIndex.py",
+        description="Index the classes and subroutines of a directory of "
+                    "Jack files, and query the index.")
+    parser.add_argument("directory")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=0, metavar="N",
+        help="index the files in N processes (default: number of cores)")
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="forget the saved index and parse every file again")
+    parser.add_argument(
+        "--class", dest="class_name", metavar="NAME",
+        help="print the fields and subroutines of a class")
+    parser.add_argument(
+        "--subroutine", metavar="[CLASS.]NAME",
+        help="print the signature of a subroutine, or of every class "
+             "defining one of that name")
+    args = parser.parse_args(argv)
+    index = ClassIndex(args.directory)
+    if args.rebuild:
+        index.files = {}
+    index.update(args.jobs)
+    index.save()
+    print("indexed {} files ({} parsed, {} unchanged), {} classes".format(
+        index.parsed + index.reused, index.parsed, index.reused,
+        len(index.classes)), file=sys.stderr)
+    for name, error in index.errors().items():
+        print("{}: {}".format(name, error), file=sys.stderr)
+    status = 0
+    if args.class_name:
+        class_record = index.find_class(args.class_name)
+        if class_record is None:
+            print("no class {}".format(args.class_name), file=sys.stderr)
+            status = 1
+        else:
+            print("class {} ({})".format(
+                class_record["name"], index.class_files[args.class_name]))
+            for field in class_record["fields"]:
+                print("  {} {} {}".format(
+                    field["kind"], field["type"], field["name"]))
+            for subroutine in class_record["subroutines"]:
+                print("  " + format_signature(class_record["name"], subroutine))
+    if args.subroutine:
+        class_name, _, name = args.subroutine.rpartition(".")
+        class_names = [class_name] if class_name \
+            else index.classes_defining(name)
+        found = [(class_name, index.find_subroutine(class_name, name))
+                 for class_name in class_names]
+        found = [(class_name, subroutine) for class_name, subroutine in found
+                 if subroutine is not None]
+        if not found:
+            print("no subroutine {}".format(args.subroutine), file=sys.stderr)
+            status = 1
+        for class_name, subroutine in found:
+            print(format_signature(class_name, subroutine))
+    return status
+
+
+if "__main__" == __name__:
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+from ConstantFolder import fold_constants
+from JackTokenizer import JackSyntaxError, string_text
+from SymbolTable import ARG, FIELD, STATIC, VAR, SymbolTable
+from SyntaxTree import NO_NODE, SyntaxTree
+from VMWriter import VMWriter
+
+# the VM segment of every kind of variable
+SEGMENTS = {STATIC: "static", FIELD: "this", ARG: "argument", VAR: "local"}
+BINARY_COMMANDS = {"+": "add", "-": "sub", "&": "and", "|": "or",
+                   "<": "lt", ">": "gt", "=": "eq"}
+# multiplication and division are done by the OS
+BINARY_CALLS = {"*": "Math.multiply", "/": "Math.divide"}
+UNARY_COMMANDS = {"-": "neg", "~": "not", "^": "shiftleft", "#": "shiftright"}
+
+
+class CodeGenerator:
+    """Writes the VM code of a Jack class, from the SyntaxTree the
+    CompilationEngine built for it.
+
+    The source is parsed once, into the tree, and no XML is written. Like
+    the expression machine of the CompilationEngine, the tree is walked with
+    an explicit stack instead of recursion, so deeply nested statements and
+    expressions do not hit the recursion limit. The stack holds nodes still
+    to be compiled and (method, arguments) commands to write after them.
+    """
+
+    def __init__(self, tree: SyntaxTree, vm_writer: VMWriter,
+                 fold: bool = True) -> None:
+        """
+        :param tree: the parse tree of a class.
+        :param vm_writer: receives the VM commands.
+        :param fold: evaluate the constant expressions at compile time (see
+        ConstantFolder), this changes the tree.
+        """
+        self.tree = tree
+        self.vm = vm_writer
+        self.fold = fold
+        self.symbols = SymbolTable()
+        self.class_name = None
+        # labels are numbered per subroutine, like the supplied compiler
+        self.if_count = 0
+        self.while_count = 0
+        self.stack = []
+        self.compilers = {
+            "statements": self.compile_statements,
+            "letStatement": self.compile_let,
+            "ifStatement": self.compile_if,
+            "whileStatement": self.compile_while,
+            "doStatement": self.compile_do,
+            "returnStatement": self.compile_return,
+            "expression": self.compile_expression,
+            "term": self.compile_term,
+            "expressionList": self.compile_expression_list,
+        }
+
+    def children(self, node: int) -> typing.List[int]:
+        return list(self.tree.children(node))
+
+    def words(self, node: int) -> typing.List[str]:
+        """The texts of the terminal children of a node, without commas."""
+        return [self.tree.text(child) for child in self.tree.children(node)
+                if self.tree.is_terminal(child)
+                and self.tree.text(child) != ","]
+
+    def compile(self) -> None:
+        """Writes the VM code of the whole tree."""
+        root = self.tree.root
+        if root == NO_NODE or self.tree.kinds[root] != "class":
+            raise JackSyntaxError("VM code can only be generated for a class")
+        if self.fold:
+            fold_constants(self.tree)
+        self.compile_class(root)
+        self.vm.flush()
+
+    def compile_class(self, node: int) -> None:
+        children = self.children(node)
+        self.class_name = self.tree.text(children[1])
+        for child in children:
+            kind = self.tree.kinds[child]
+            if kind == "classVarDec":
+                words = self.words(child)
+                # (static | field) type name (, name)* ;
+                var_kind = STATIC if words[0] == "static" else FIELD
+                for name in words[2:-1]:
+                    self.symbols.define(name, words[1], var_kind)
+            elif kind == "subroutineDec":
+                self.compile_subroutine(child)
+
+    def compile_subroutine(self, node: int) -> None:
+        children = self.children(node)
+        kind, _, name = (self.tree.text(child) for child in children[:3])
+        self.symbols.start_subroutine()
+        self.if_count = 0
+        self.while_count = 0
+        if kind == "method":
+            self.symbols.define("this", self.class_name, ARG)
+        body = NO_NODE
+        for child in children:
+            if self.tree.kinds[child] == "parameterList":
+                words = self.words(child)
+                for i in range(0, len(words) - 1, 2):
+                    self.symbols.define(words[i + 1], words[i], ARG)
+            elif self.tree.kinds[child] == "subroutineBody":
+                body = child
+        statements = NO_NODE
+        for child in self.tree.children(body):
+            if self.tree.kinds[child] == "varDec":
+                words = self.words(child)
+                # var type name (, name)* ;
+                for var_name in words[2:-1]:
+                    self.symbols.define(var_name, words[1], VAR)
+            elif self.tree.kinds[child] == "statements":
+                statements = child
+        self.vm.write_function("{}.{}".format(self.class_name, name),
+                               self.symbols.var_count(VAR))
+        if kind == "constructor":
+            # the new object gets a word for every field
+            self.vm.write_push("constant", self.symbols.var_count(FIELD))
+            self.vm.write_call("Memory.alloc", 1)
+            self.vm.write_pop("pointer", 0)
+        elif kind == "method":
+            self.vm.write_push("argument", 0)
+            self.vm.write_pop("pointer", 0)
+        if statements != NO_NODE:
+            self.run(statements)
+
+    def run(self, node: int) -> None:
+        """Compiles a node and everything it schedules."""
+        stack = self.stack
+        stack.append(node)
+        while stack:
+            item = stack.pop()
+            if isinstance(item, int):
+                self.compilers[self.tree.kinds[item]](item)
+            else:
+                item[0](*item[1:])
+
+    def schedule(self, *items) -> None:
+        """Compiles nodes and writes commands in the given order, after the
+        current node."""
+        self.stack.extend(reversed(items))
+
+    def variable(self, name: str) -> typing.Tuple[str, int]:
+        """The segment and index of a variable."""
+        entry = self.symbols.lookup(name)
+        if entry is None:
+            raise JackSyntaxError("undefined variable {!r} in {}".format(
+                name, self.class_name))
+        return SEGMENTS[entry[1]], entry[2]
+
+    def compile_statements(self, node: int) -> None:
+        self.schedule(*self.children(node))
+
+    def compile_let(self, node: int) -> None:
+        children = self.children(node)
+        segment, index = self.variable(self.tree.text(children[1]))
+        vm = self.vm
+        if self.tree.text(children[2]) == "[":
+            # let name [ index ] = value ;
+            # the address is computed first, the value may use "that" too
+            self.schedule(
+                (vm.write_push, segment, index), children[3],
+                (vm.write_arithmetic, "add"), children[6],
+                (vm.write_pop, "temp", 0), (vm.write_pop, "pointer", 1),
+                (vm.write_push, "temp", 0), (vm.write_pop, "that", 0))
+        else:
+            # let name = value ;
+            self.schedule(children[3], (vm.write_pop, segment, index))
+
+    def compile_if(self, node: int) -> None:
+        # if ( condition ) { statements } [else { statements }]
+        children = self.children(node)
+        vm = self.vm
+        number = self.if_count
+        self.if_count += 1
+        if_true = "IF_TRUE{}".format(number)
+        if_false = "IF_FALSE{}".format(number)
+        items = [children[2], (vm.write_if, if_true), (vm.write_goto, if_false),
+                 (vm.write_label, if_true), children[5]]
+        if len(children) > 7:
+            if_end = "IF_END{}".format(number)
+            items += [(vm.write_goto, if_end), (vm.write_label, if_false),
+                      children[9], (vm.write_label, if_end)]
+        else:
+            items.append((vm.write_label, if_false))
+        self.schedule(*items)
+
+    def compile_while(self, node: int) -> None:
+        # while ( condition ) { statements }
+        children = self.children(node)
+        vm = self.vm
+        number = self.while_count
+        self.while_count += 1
+        start = "WHILE_EXP{}".format(number)
+        end = "WHILE_END{}".format(number)
+        self.schedule(
+            (vm.write_label, start), children[2],
+            (vm.write_arithmetic, "not"), (vm.write_if, end), children[5],
+            (vm.write_goto, start), (vm.write_label, end))
+
+    def compile_do(self, node: int) -> None:
+        # do call ; the value of the call is thrown away
+        children = self.children(node)
+        self.schedule(*self.call_items(children[1:-1]),
+                      (self.vm.write_pop, "temp", 0))
+
+    def compile_return(self, node: int) -> None:
+        children = self.children(node)
+        if len(children) > 2:
+            self.schedule(children[1], (self.vm.write_return,))
+        else:
+            # a void subroutine returns 0
+            self.vm.write_push("constant", 0)
+            self.vm.write_return()
+
+    def compile_expression(self, node: int) -> None:
+        # term (op term)*, evaluated left to right
+        children = self.children(node)
+        items = [children[0]]
+        for i in range(1, len(children) - 1, 2):
+            op = self.tree.text(children[i])
+            if op in BINARY_CALLS:
+                operation = (self.vm.write_call, BINARY_CALLS[op], 2)
+            else:
+                operation = (self.vm.write_arithmetic, BINARY_COMMANDS[op])
+            items += [children[i + 1], operation]
+        self.schedule(*items)
+
+    def compile_term(self, node: int) -> None:
+        children = self.children(node)
+        first = children[0]
+        label = self.tree.kinds[first]
+        text = self.tree.text(first)
+        vm = self.vm
+        if label == "integerConstant":
+            vm.write_push("constant", int(text))
+        elif label == "stringConstant":
+            string = string_text(text)
+            vm.write_push("constant", len(string))
+            vm.write_call("String.new", 1)
+            for char in string:
+                vm.write_push("constant", ord(char))
+                vm.write_call("String.appendChar", 2)
+        elif label == "keyword":
+            if text == "this":
+                vm.write_push("pointer", 0)
+            else:
+                # false and null are 0, true is -1
+                vm.write_push("constant", 0)
+                if text == "true":
+                    vm.write_arithmetic("not")
+        elif label == "symbol":
+            if text == "(":
+                self.schedule(children[1])
+            else:
+                self.schedule(children[1],
+                              (vm.write_arithmetic, UNARY_COMMANDS[text]))
+        elif len(children) == 1:
+            vm.write_push(*self.variable(text))
+        elif self.tree.text(children[1]) == "[":
+            # the address of the entry goes into "that"
+            self.schedule(
+                (vm.write_push, *self.variable(text)), children[2],
+                (vm.write_arithmetic, "add"), (vm.write_pop, "pointer", 1),
+                (vm.write_push, "that", 0))
+        else:
+            self.schedule(*self.call_items(children))
+
+    def compile_expression_list(self, node: int) -> None:
+        self.schedule(*[child for child in self.tree.children(node)
+                        if self.tree.kinds[child] == "expression"])
+
+    def call_items(self, nodes: typing.List[int]) -> typing.List:
+        """What compiles a subroutine call, given its nodes:
+        name ( expressionList ) or target . name ( expressionList )."""
+        vm = self.vm
+        arguments = next(node for node in nodes
+                         if self.tree.kinds[node] == "expressionList")
+        count = sum(1 for child in self.tree.children(arguments)
+                    if self.tree.kinds[child] == "expression")
+        if self.tree.text(nodes[1]) == "(":
+            # a method of this class, called on this
+            name = "{}.{}".format(self.class_name, self.tree.text(nodes[0]))
+            return [(vm.write_push, "pointer", 0), arguments,
+                    (vm.write_call, name, count + 1)]
+        target = self.tree.text(nodes[0])
+        subroutine = self.tree.text(nodes[2])
+        entry = self.symbols.lookup(target)
+        if entry is not None:
+            # a method called on an object: the object is the first argument
+            var_type, kind, index = entry
+            return [(vm.write_push, SEGMENTS[kind], index), arguments,
+                    (vm.write_call, "{}.{}".format(var_type, subroutine),
+                     count + 1)]
+        # a function or a constructor of a class
+        return [arguments,
+                (vm.write_call, "{}.{}".format(target, subroutine), count)]
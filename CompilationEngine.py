@@ -6,34 +6,51 @@ Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
 
-from JackTokenizer import JackTokenizer
+from JackTokenizer import JackSyntaxError, JackTokenizer
+from XmlWriter import SkipWriter, XmlWriter
 
 KEYWORD = "keyword"
 IDENTIFIER = "identifier"
 SYMBOL = "symbol"
 INT_CONSTANT = "integerConstant"
 STR_CONST = "stringConstant"
-INDENTATION = "  "
 
 CLASS_VAR_DEC = "class_var_dec"
 SUBROUTINE_DECLARATION = "subroutine_dec"
 VAR_DEC = "var_dec"
 STATEMENT = "statement"
 
-TERM_INT = "integerConstant"
-TERM_STR = "stringConstant"
-TERM_KEYWORD = "keywordConstant"
-TERM_VARNAME = "varName"
-TERM_VARACCESS = "varName[expression]"
-TERM_SUBROUTINE = "subroutineCall"
-TERM_EXPRESSION = "(expression)"
-TERM_UNARY_TERM = "unaryOp term"
 WRONG = "wrong"
 
+# what a term can start with: a constant or a name, "(" or an unaryOp
+TERM_TYPES = {INT_CONSTANT, STR_CONST, KEYWORD, IDENTIFIER}
+# the unaryOps of the grammar in the JackTokenizer docstring
+UNARY_OPS = {"-", "~", "^", "#"}
+TERM_SYMBOLS = {"("} | UNARY_OPS
+# the keywords that are a type, and the ones that are a term
+TYPE_KEYWORDS = {"int", "char", "boolean"}
+KEYWORD_CONSTANTS = {"true", "false", "null", "this"}
+# states of CompilationEngine.run_expression_machine
+EXPRESSION_START = 0
+EXPRESSION_AFTER_TERM = 1
+TERM_START = 2
+TERM_END = 3
+TERM_AFTER_INDEX = 4
+TERM_AFTER_PARENTHESES = 5
+CALL_ARGUMENTS = 6
+CALL_END = 7
+LIST_START = 8
+LIST_AFTER_EXPRESSION = 9
+
 # compile statement and compile expression need look ahead, so no need advance after call, we will call advance inside
 # maybe all function no need advance after call, we can put inside, --> optimise
 # all call line can be replaced with compile line --> optimise
 
+# stands in for compile_line and write_tag when nothing is written
+def skip(*args):
+    pass
+
+
 # used when need to decide the type to next structure
 def structure_type(keyword):
     if keyword in {"static", "field"}:
@@ -42,7 +59,7 @@ def structure_type(keyword):
         return SUBROUTINE_DECLARATION
     if keyword in {"var"}:
         return VAR_DEC
-    if keyword in {"let", "if", "while", "do", "return", "else"}:
+    if keyword in {"let", "if", "while", "do", "return"}:
         return STATEMENT
     else:
         return WRONG
@@ -53,58 +70,123 @@ class CompilationEngine:
     output stream.
     """
 
-    def __init__(self, input_stream: JackTokenizer, output_stream: typing.TextIO) -> None:
+    def __init__(self, input_stream: JackTokenizer,
+                 output_stream: typing.TextIO = None,
+                 compact: bool = False, writer=None,
+                 strict: bool = False) -> None:
         """
         Creates a new compilation engine with the given input and output. The
         next routine called must be compileClass()
         :param input_stream: The input stream.
         :param output_stream: The output stream.
+        :param compact: write the XML without indentation.
+        :param writer: receives the parsed structure instead of an XmlWriter
+        over output_stream, e.g. a SyntaxTree.TreeBuilder.
+        :param strict: raise a JackSyntaxError on problems with the input.
         """
         self.tokenizer = input_stream
         self.output = output_stream
+        if writer is None:
+            writer = XmlWriter(output_stream, compact)
+        # whether compile_line and write_tag are skipped, see set_writer
+        self.skipping = False
+        self.set_writer(writer)
+        self.strict = strict
         self.nested_number = 0
         pass
 
-    def advance(self):
-        if self.tokenizer.has_more_tokens():
-            self.tokenizer.advance()
+    def reset(self, writer, strict: bool = False) -> None:
+        """Gets ready to compile again, after the tokenizer was reset to a
+        new input, into another writer. Lets a pooled engine be reused (see
+        JackAPI).
+        :param writer: receives the parsed structure.
+        :param strict: raise a JackSyntaxError on problems with the input.
+        """
+        self.set_writer(writer)
+        self.strict = strict
+        self.nested_number = 0
+
+    def set_writer(self, writer) -> None:
+        """Writes into writer from now on. A SkipWriter is not even called:
+        compile_line and write_tag do nothing, and checking a file only
+        costs its parse. They are attributes of the instance only then, an
+        engine whose instance dict changed is slower on every attribute.
+        :param writer: receives the parsed structure.
+        """
+        self.writer = writer
+        skipping = isinstance(writer, SkipWriter)
+        if skipping == self.skipping:
+            return
+        self.skipping = skipping
+        if skipping:
+            self.compile_line = skip
+            self.write_tag = skip
         else:
-            print("no more tokens")
+            # back to the methods of the class
+            del self.compile_line
+            del self.write_tag
+
+    # the engine never advances from the last token of a complete program,
+    # so running out of tokens is an error in every mode. Going on with the
+    # last token as the current one would parse it again and again
+    def advance(self):
+        self.tokenizer.advance()
+        if not self.tokenizer.has_more_tokens():
+            self.syntax_error("unexpected end of input")
+
+    def syntax_error(self, message):
+        raise JackSyntaxError("{} at token {} ({!r})".format(
+            message, self.tokenizer.current_token_index,
+            self.tokenizer.current_token))
 
     # integrated write line function
     # from compile_var_dec and below it uses compile_line instead of write line, if time permits I will change the above
     def compile_line(self):
-        self.write_indentation()
-        label = self.get_token_string_type()[1]
-        name = self.get_token_string_type()[0]
-        self.output.write("<{}> {} </{}>\n".format(label, name, label))
+        name, label = self.get_token_string_type()
+        self.writer.terminal(label, name, self.nested_number)
+
+    # compile_line for a token the grammar fixes, checked in strict mode
+    def compile_expected(self, token):
+        if self.strict and self.tokenizer.current_token != token:
+            self.syntax_error("expected {!r}".format(token))
+        self.compile_line()
+
+    # compile_line for a className, subroutineName or varName, checked in
+    # strict mode: a keyword, a symbol or a constant is not a name
+    def compile_name(self):
+        if self.strict and self.tokenizer.token_type() != IDENTIFIER:
+            self.syntax_error("expected a name")
+        self.compile_line()
+
+    # compile_line for a type, checked in strict mode
+    def compile_type(self, void=False):
+        if self.strict and self.tokenizer.token_type() != IDENTIFIER \
+                and self.tokenizer.keyword() not in TYPE_KEYWORDS \
+                and not (void and self.tokenizer.keyword() == "void"):
+            self.syntax_error("expected a type")
+        self.compile_line()
 
     def write_tag(self, tag_name, start):
-        self.write_indentation()
         if start:
-            self.output.write("<{}>\n".format(tag_name))
+            self.writer.open_tag(tag_name, self.nested_number)
         else:
-            self.output.write("</{}>\n".format(tag_name))
+            self.writer.close_tag(tag_name, self.nested_number)
 
-    def write_indentation(self):
-        self.output.write("{}".format(self.nested_number * INDENTATION))
+    # the writer flushes by itself when the outermost tag is closed
+    def flush(self):
+        self.writer.flush()
 
     def is_binary_operation(self):
         operations = {'+', '-', '*', '/', '&', '|', '<', '>', '='}
         return self.tokenizer.token_type() == SYMBOL and self.tokenizer.symbol() in operations
 
     # return string, type
+    # the tokenizer classified the token already, so this is one lookup
     def get_token_string_type(self):
-        if self.tokenizer.token_type() == KEYWORD:
-            return self.tokenizer.keyword(), KEYWORD
-        if self.tokenizer.token_type() == SYMBOL:
-            return self.tokenizer.symbol(), SYMBOL
-        if self.tokenizer.token_type() == IDENTIFIER:
-            return self.tokenizer.identifier(),IDENTIFIER
-        if self.tokenizer.token_type() == INT_CONSTANT:
-            return self.tokenizer.int_val(),INT_CONSTANT
-        if self.tokenizer.token_type() == STR_CONST:
-            return self.tokenizer.string_val(), STR_CONST
+        token_type = self.tokenizer.token_type()
+        if token_type == INT_CONSTANT:
+            return self.tokenizer.int_val(), INT_CONSTANT
+        return self.tokenizer.current_token, token_type
 
     def write_empty_tag(self, tag_name):
         self.write_tag(tag_name, True)
@@ -115,28 +197,54 @@ class CompilationEngine:
     # nested number should be added before enter recursive function, responsibility of outside function
     # but in general no need to call it outside, because the <tag> is at the same level of indentation as others
 
+    def compile(self) -> None:
+        """Compiles the whole input: a class, or a single subroutine like the
+        files in samtest."""
+        if self.tokenizer.keyword() == "class":
+            self.compile_class()
+        else:
+            if self.strict and structure_type(
+                    self.tokenizer.keyword()) != SUBROUTINE_DECLARATION:
+                self.syntax_error("expected a class or a subroutine")
+            self.compile_subroutine()
+            # the subroutine ends at its "}", anything after it is left over
+            if self.strict:
+                self.advance_past_end()
+
+    def advance_past_end(self):
+        """In strict mode, the input must be over after the current token."""
+        self.tokenizer.advance()
+        if self.tokenizer.has_more_tokens():
+            self.syntax_error("unexpected token after the end")
+
     def compile_class(self) -> None:
         """Compiles a complete class."""
         self.write_tag("class", True)
         # assume input is correct, then line will be in form:
         # class CLASSNAME { CLASSVARDEC* SUBROUTINEDEC* }
         self.nested_number += 1
+        # write "class"
+        self.compile_expected("class")
         self.advance()
-        self.compile_line()
-        self.advance()
-        self.compile_line()
+        # write class name
+        self.compile_name()
         self.advance()
-        self.compile_line()
+        # write "{"
+        self.compile_expected("{")
         self.advance()
 
-        while self.tokenizer.has_more_tokens():
-            if structure_type(self.tokenizer.keyword()) == CLASS_VAR_DEC:
-                self.compile_class_var_dec()
-            if structure_type(self.tokenizer.keyword()) == SUBROUTINE_DECLARATION:
-                self.compile_subroutine()
-            # assume no exceptions
+        while structure_type(self.tokenizer.keyword()) == CLASS_VAR_DEC:
+            self.compile_class_var_dec()
             self.advance()
-        self.compile_line()
+        while structure_type(self.tokenizer.keyword()) == SUBROUTINE_DECLARATION:
+            self.compile_subroutine()
+            self.advance()
+        if self.strict and self.tokenizer.symbol() != "}":
+            self.syntax_error("expected '}' at the end of the class")
+        # write "}"
+        self.compile_expected("}")
+        if self.strict:
+            self.advance_past_end()
         self.nested_number -= 1
         self.write_tag("class", False)
         pass
@@ -150,19 +258,19 @@ class CompilationEngine:
         self.compile_line()
         self.advance()
         # write type
-        self.compile_line()
+        self.compile_type()
         self.advance()
         # write varName
-        self.compile_line()
+        self.compile_name()
         self.advance()
         # if input correct, the token tpe should be symbol, either "," or ";"
         while self.tokenizer.symbol() == ",":
             self.compile_line()
             self.advance()
             # if input is correct, followed by the "," should be a variable name
-            self.compile_line()
+            self.compile_name()
             self.advance()
-        self.compile_line()
+        self.compile_expected(";")
         self.nested_number -= 1
         self.write_tag("classVarDec", False)
 
@@ -181,16 +289,16 @@ class CompilationEngine:
         self.compile_line()
         self.advance()
         # write return type, could be keyword or identifier
-        if self.tokenizer.token_type() == KEYWORD:
-            self.compile_line()
-        if self.tokenizer.token_type() == IDENTIFIER:
+        if self.strict:
+            self.compile_type(void=True)
+        elif self.tokenizer.token_type() in (KEYWORD, IDENTIFIER):
             self.compile_line()
         self.advance()
         # write function name (subroutine name)
-        self.compile_line()
+        self.compile_name()
         self.advance()
         # if input correct, here should be "("
-        self.compile_line()
+        self.compile_expected("(")
         self.advance()
         if self.get_token_string_type()[0] == ")":
             self.write_empty_tag("parameterList")
@@ -198,7 +306,7 @@ class CompilationEngine:
         else:
             self.compile_parameter_list()
         # write ")"
-        self.compile_line()
+        self.compile_expected(")")
         self.advance()
         # write subroutine body
         self.compile_subroutine_body()
@@ -216,21 +324,21 @@ class CompilationEngine:
         self.write_tag("parameterList", True)
         self.nested_number += 1
         # write arg[0] type, if input correct, this must be a key word (int, bool, etc)
-        self.compile_line()
+        self.compile_type()
         self.advance()
         # write variable name, if input correct, here must be an identifier, input name
-        self.compile_line()
+        self.compile_name()
         self.advance()
         # if input correct, here must be a symbol, either "," or ")"
         while self.tokenizer.symbol() == ",":
             # write ","
-            self.compile_line()
+            self.compile_expected(",")
             self.advance()
             # write arg[i] type, if input correct, this must be a key word (int, bool, etc)
-            self.compile_line()
+            self.compile_type()
             self.advance()
             # write variable name, if input correct, here must be an identifier, input name
-            self.compile_line()
+            self.compile_name()
             self.advance()
         self.nested_number -= 1
         self.write_tag("parameterList", False)
@@ -241,18 +349,17 @@ class CompilationEngine:
         # if input correct, current line is "{"
         self.write_tag("subroutineBody", True)
         self.nested_number += 1
-        self.compile_line()
+        self.compile_expected("{")
         self.advance()
         # write var_dec if exist any
         while structure_type(self.tokenizer.keyword()) == VAR_DEC:
             self.compile_var_dec()
             self.advance()
         # if input correct, keyword is either "var" or statements' keyword
-        # if my function is correct, now the keyword must b statement
-        if structure_type(self.tokenizer.keyword()) == STATEMENT:
-            self.compile_statements()
+        # (possibly none, then the statements are empty)
+        self.compile_statements()
         # if input correct, here should simply be "{', no need for tokenizer.symbol
-        self.compile_line()
+        self.compile_expected("}")
         self.nested_number -= 1
         self.write_tag("subroutineBody", False)
         pass
@@ -265,10 +372,10 @@ class CompilationEngine:
         self.compile_line()
         self.advance()
         # write type
-        self.compile_line()
+        self.compile_type()
         self.advance()
         # write varName
-        self.compile_line()
+        self.compile_name()
         self.advance()
         # now if input correct, it must be a symbol, "," or ";"
         while self.tokenizer.symbol() == ",":
@@ -276,11 +383,11 @@ class CompilationEngine:
             self.compile_line()
             self.advance()
             # write varName
-            self.compile_line()
+            self.compile_name()
             self.advance()
         # it must be ";"
         # write ";"
-        self.compile_line()
+        self.compile_expected(";")
 
         self.nested_number -= 1
         self.write_tag("varDec", False)
@@ -291,30 +398,28 @@ class CompilationEngine:
         """Compiles a sequence of statements, not including the enclosing 
         "{}".
         """
-        # so for in the caller's level, after every call of compile_statment, no need to call advance()
+        # every statement ends at its own last token, so we advance after it
+        # after the statements, the current line is the "}" that closes them
         # my implementation might include the case {}
         self.write_tag("statements", True)
         self.nested_number += 1
         # current line should be the keyword o which kind of statement
 
-        while structure_type(self.get_token_string_type()[0]) == STATEMENT:
-            if self.tokenizer.keyword() == "let":
+        while structure_type(self.tokenizer.keyword()) == STATEMENT:
+            keyword = self.tokenizer.keyword()
+            if keyword == "let":
                 self.compile_let()
-            if self.tokenizer.keyword() == "if":
+            elif keyword == "if":
                 self.compile_if()
-            if self.tokenizer.keyword() == "while":
+            elif keyword == "while":
                 self.compile_while()
-            if self.tokenizer.keyword() == "do":
+            elif keyword == "do":
                 self.compile_do()
-            if self.tokenizer.keyword() == "return":
+            elif keyword == "return":
                 self.compile_return()
-
-        self.advance()
-        # because of my advance logic, else statement will be handled specially
-        # assume input correct, no need to check if the else is followed by an if
-        if self.tokenizer.token_type() == KEYWORD and self.tokenizer.keyword() == "else":
-            self.compile_else()
-            return
+            self.advance()
+        if self.strict and self.tokenizer.symbol() != "}":
+            self.syntax_error("expected a statement or '}'")
         self.nested_number -= 1
         self.write_tag("statements", False)
         pass
@@ -325,28 +430,30 @@ class CompilationEngine:
         self.nested_number += 1
         # current line should be the keyword o which kind of statement
         # write "do"
-        self.compile_line()
+        self.compile_expected("do")
         self.advance()
         # now the line should be the first word of a subroutine call
         # note! compile_subroutine is for subroutine declaration, not for subroutine call
+        # the subroutine call ends after its ")"
         self.compile_subroutine_call()
-        self.advance()
         # write ";"
-        self.compile_line()
+        self.compile_expected(";")
         self.nested_number -= 1
         self.write_tag("doStatement", False)
         pass
 
     def compile_subroutine_call(self) -> None:
         # current line is subroutine's name or (className|varName)
-        self.compile_line()
+        # the token after it tells which kind of call this is
+        after_name = self.tokenizer.peek()
+        self.compile_name()
         self.advance()
-        # now use subroutine call a to take care or the rest?
-        # subroutine call a will look ahead so subroutine call will also look ahead
-        if self.get_token_string_type()[0] == "(":
+        if after_name == "(":
             self.handle_subroutine_call_a()
-        elif self.get_token_string_type()[0] == ".":
+        elif after_name == ".":
             self.handle_subroutine_call_b()
+        elif self.strict:
+            self.syntax_error("expected '(' or '.'")
 
 
 
@@ -360,28 +467,28 @@ class CompilationEngine:
         self.nested_number += 1
         # current line should be the keyword o which kind of statement
         # write "let"
-        self.compile_line()
+        self.compile_expected("let")
         self.advance()
         # write varName
-        self.compile_line()
+        self.compile_name()
         self.advance()
         # here the token type must be a symbol, either "[" or "="
-        if self.tokenizer.token_type() == "[":
+        if self.tokenizer.symbol() == "[":
             # write "["
-            self.compile_line()
+            self.compile_expected("[")
             self.advance()
             # write expression
             self.compile_expression()
             # write "]"
-            self.compile_line()
+            self.compile_expected("]")
             self.advance()
         # write "="
-        self.compile_line()
+        self.compile_expected("=")
         self.advance()
         # write expression
         self.compile_expression()
         # write ";"
-        self.compile_line()
+        self.compile_expected(";")
         self.nested_number -= 1
         self.write_tag("letStatement", False)
         pass
@@ -393,23 +500,23 @@ class CompilationEngine:
         self.nested_number += 1
         # current line should be the keyword o which kind of statement
         # write "while"
-        self.compile_line()
+        self.compile_expected("while")
         self.advance()
         # write "("
-        self.compile_line()
+        self.compile_expected("(")
         self.advance()
         # write expression
         self.compile_expression()
         # write ")"
-        self.compile_line()
+        self.compile_expected(")")
         self.advance()
         # write "{"
-        self.compile_line()
+        self.compile_expected("{")
         self.advance()
         # write statements
         self.compile_statements()
         # write "}"
-        self.compile_line()
+        self.compile_expected("}")
         self.nested_number -= 1
         self.write_tag("whileStatement", False)
         pass
@@ -422,42 +529,43 @@ class CompilationEngine:
         # write return
         self.compile_line()
         self.advance()
-        # if there is expression, then tokenType is keyword, else it's symbol
-        # if it's not synbol, then it's keyword
-        if self.tokenizer.token_type() != SYMBOL:
+        # if there is expression, the current line is not ";"
+        if self.tokenizer.current_token != ";":
             self.compile_expression()
         # write ";"
-        self.compile_line()
+        self.compile_expected(";")
         self.nested_number -= 1
         self.write_tag("returnStatement", False)
         pass
 
     def compile_if(self) -> None:
         """Compiles a if statement, possibly with a trailing else clause."""
-        # there might be a else followed by if, but if we advance to next line, we will mess up all the advance logic
-        # so the else statement will be handeled in the call compile_statments level (2 levels above)
-        # if there's an else, it must be followed an if
+        # there might be a else after the "}", we peek at it before advancing
+        # so that like every statement, the if ends at its own last token
         self.write_tag("ifStatement", True)
         self.nested_number += 1
         # current line should be the keyword o which kind of statement
         # write "if"
-        self.compile_line()
+        self.compile_expected("if")
         self.advance()
         # write "("
-        self.compile_line()
+        self.compile_expected("(")
         self.advance()
         # write expression
         self.compile_expression()
         # write ")"
-        self.compile_line()
+        self.compile_expected(")")
         self.advance()
         # write "{"
-        self.compile_line()
+        self.compile_expected("{")
         self.advance()
         # write statements
         self.compile_statements()
         # write "}"
-        self.compile_line()
+        self.compile_expected("}")
+        if self.tokenizer.peek() == "else":
+            self.advance()
+            self.compile_else()
         self.nested_number -= 1
         self.write_tag("ifStatement", False)
         pass
@@ -465,39 +573,19 @@ class CompilationEngine:
     def compile_else(self):
         # if there's an else, then now we are at the line of else
         # write "else"
-        self.compile_line()
+        self.compile_expected("else")
         self.advance()
         # write "{"
-        self.compile_line()
+        self.compile_expected("{")
         self.advance()
         # write statements
         self.compile_statements()
         # write "}"
-        self.compile_line()
-        self.advance()
+        self.compile_expected("}")
 
     def compile_expression(self) -> None:
         """Compiles an expression."""
-        self.write_tag("expression", True)
-        self.nested_number += 1
-        # now we atr the first line of term
-        self.compile_term()
-        # handle term will look ahead
-        # if this input correct, if there's (op term), then we keep compile
-        # if there is something else, it is no longer expression anymore
-        # the term is not possible to be unary
-        while self.is_binary_operation():
-            # print "op"
-            self.compile_line()
-            self.advance()
-            # compile term
-            self.compile_term()
-
-        # after the compile expression, the current line is at the first line of next syntactic block
-        self.nested_number -= 1
-        self.write_tag("expression", False)
-
-        pass
+        self.run_expression_machine(EXPRESSION_START)
 
     def compile_term(self) -> None:
         """Compiles a term. 
@@ -509,130 +597,149 @@ class CompilationEngine:
         to distinguish between the three possibilities. Any other token is not
         part of this term and should not be advanced over.
         """
-        self.write_tag("term", True)
-        self.nested_number += 1
-        # now we are at the first line of term
-        # look ahead
-        first_var = self.get_token_string_type()[0]
-        first_var_type = self.get_token_string_type()[1]
-        self.compile_line()
-        self.advance()
-        # now points at the second line
-        second_var = self.get_token_string_type()[0]
-        # at end of call, the current line is at the  
-        # now classify
-        if first_var_type == INT_CONSTANT:
-            self.handle_int_const()
-        elif first_var_type == STR_CONST:
-            self.handle_str_const()
-        # if it's a keyword, then the type is keyword constant?
-        elif first_var_type == KEYWORD:
-            self.handle_keyword_const()
-        elif first_var_type == IDENTIFIER:
-            if second_var == "[":
-                self.handle_var_expression()
-            elif second_var == "(":
-                self.handle_subroutine_call_a()
-            elif second_var == ".":
-                self.handle_subroutine_call_b()
-            # if input correct, else must be term
-            else:
-                self.handle_var()
-        elif first_var_type == SYMBOL:
-            if first_var == "(":
-                self.handle_expression()
-            # else it must be an unaryOperation
-            else:
-                self.handle_op_term()
-
-        # after the compile expression, the current line is at the first line of next syntactic block
-        self.nested_number -= 1
-        self.write_tag("term", False)
+        self.run_expression_machine(TERM_START)
 
     def compile_expression_list(self) -> None:
         """Compiles a (possibly empty) comma-separated list of expressions."""
-        self.write_tag("expressionList", True)
-        self.nested_number += 1
         # currently at the first line of expression
         # if there's no expression, this method should not be called
-        self.compile_expression()
-        while self.get_token_string_type()[0] == ",":
-            self.compile_line()
-            self.advance()
-            self.compile_expression()
-        self.nested_number -= 1
-        self.write_tag("expressionList", False)
-        pass
-
-    def handle_int_const(self):
-        pass
-
-    def handle_str_const(self):
-        pass
-
-    def handle_keyword_const(self):
-        pass
-
-    def handle_var_expression(self):
-        # current line is at "["
-        self.compile_line()
-        self.advance()
-        self.compile_expression()
-        # compile expression looked ahead
-        # current line is "]"
-        self.compile_line()
-        self.advance()
-        pass
+        self.run_expression_machine(LIST_START)
+
+    # expressions, terms and expression lists nest in each other, so instead of
+    # one python call per level of nesting (and a RecursionError on deeply
+    # nested input) they are parsed by one loop over an explicit stack of
+    # states, each state is what is left to do at some level of nesting.
+    # the XML is the same as the recursive version wrote
+    def run_expression_machine(self, start_state) -> None:
+        stack = [start_state]
+        tokenizer = self.tokenizer
+        while stack:
+            state = stack.pop()
+            if state == EXPRESSION_START:
+                self.write_tag("expression", True)
+                self.nested_number += 1
+                stack.append(EXPRESSION_AFTER_TERM)
+                stack.append(TERM_START)
+            elif state == EXPRESSION_AFTER_TERM:
+                # if there's (op term), then we keep compile
+                # the term is not possible to be unary
+                if self.is_binary_operation():
+                    # print "op"
+                    self.compile_line()
+                    self.advance()
+                    stack.append(EXPRESSION_AFTER_TERM)
+                    stack.append(TERM_START)
+                else:
+                    # the current line is at the first line of next syntactic block
+                    self.nested_number -= 1
+                    self.write_tag("expression", False)
+            elif state == TERM_START:
+                self.write_tag("term", True)
+                self.nested_number += 1
+                # the first token and a peek at the second one decide the
+                # kind of term before anything is written
+                # the text and not int_val(), only symbols and keywords
+                # are looked at
+                first_var = tokenizer.current_token
+                first_var_type = tokenizer.token_type()
+                # a symbol other than "(" or an unaryOp (a ";" or a ")"
+                # where a term is missing) is an error in every mode, it
+                # would be taken for an unaryOp and start the term again
+                if first_var_type == SYMBOL:
+                    if first_var not in TERM_SYMBOLS:
+                        self.syntax_error("expected a term")
+                elif self.strict and (
+                        first_var_type not in TERM_TYPES
+                        or first_var_type == KEYWORD
+                        and first_var not in KEYWORD_CONSTANTS):
+                    self.syntax_error("expected a term")
+                second_var = tokenizer.peek() \
+                    if first_var_type == IDENTIFIER else None
+                self.compile_line()
+                self.advance()
+                if second_var == "[":
+                    # varName [ expression ]
+                    self.compile_line()
+                    self.advance()
+                    stack.append(TERM_AFTER_INDEX)
+                    stack.append(EXPRESSION_START)
+                elif second_var == "(":
+                    # subroutineName ( expressionList )
+                    stack.append(TERM_END)
+                    stack.append(CALL_ARGUMENTS)
+                elif second_var == ".":
+                    # (className | varName) . subroutineName ( expressionList )
+                    self.compile_line()
+                    self.advance()
+                    self.compile_name()
+                    self.advance()
+                    stack.append(TERM_END)
+                    stack.append(CALL_ARGUMENTS)
+                elif first_var_type == SYMBOL and first_var == "(":
+                    # ( expression )
+                    stack.append(TERM_AFTER_PARENTHESES)
+                    stack.append(EXPRESSION_START)
+                elif first_var_type == SYMBOL:
+                    # unaryOp term, the op is already written
+                    stack.append(TERM_END)
+                    stack.append(TERM_START)
+                else:
+                    # a constant or a varName, nothing more to write
+                    self.nested_number -= 1
+                    self.write_tag("term", False)
+            elif state == TERM_END:
+                self.nested_number -= 1
+                self.write_tag("term", False)
+            elif state == TERM_AFTER_INDEX or state == TERM_AFTER_PARENTHESES:
+                # write "]" or ")"
+                self.compile_expected("]" if state == TERM_AFTER_INDEX else ")")
+                self.advance()
+                self.nested_number -= 1
+                self.write_tag("term", False)
+            elif state == CALL_ARGUMENTS:
+                # already written the subroutine name
+                # now write "("
+                self.compile_expected("(")
+                self.advance()
+                # if next line is ")", then the expression list is empty
+                if tokenizer.current_token != ")":
+                    stack.append(CALL_END)
+                    stack.append(LIST_START)
+                else:
+                    self.write_empty_tag("expressionList")
+                    stack.append(CALL_END)
+            elif state == CALL_END:
+                # write ")"
+                self.compile_expected(")")
+                self.advance()
+            elif state == LIST_START:
+                self.write_tag("expressionList", True)
+                self.nested_number += 1
+                stack.append(LIST_AFTER_EXPRESSION)
+                stack.append(EXPRESSION_START)
+            elif state == LIST_AFTER_EXPRESSION:
+                if tokenizer.current_token == ",":
+                    self.compile_line()
+                    self.advance()
+                    stack.append(LIST_AFTER_EXPRESSION)
+                    stack.append(EXPRESSION_START)
+                else:
+                    self.nested_number -= 1
+                    self.write_tag("expressionList", False)
 
     # handle one kind of (partial) subroutine call
     def handle_subroutine_call_a(self):
-        # already written the subroutine name
-        # now write "("
-        self.compile_line()
-        self.advance()
-        # if next line is ")", then the expression list is empty
-        # else it's an expression list
-        if self.get_token_string_type()[0] != ")":
-            self.compile_expression_list()
-        else:
-            self.write_empty()
-        # compile expression list will look ahead
-        # write ")"
-        self.compile_line()
-        self.advance()
-        pass
-
-    def handle_var(self):
-        pass
-
-    def handle_expression(self):
-        # at the first line of expression
-        self.compile_expression()
-        # already at line after expression
-        # this line should be ")"
-        # write ")"
-        self.compile_line()
-        self.advance()
-        pass
-
-    def handle_op_term(self):
-        # op already written
-        # at the first line of a term
-        self.compile_term()
-        pass
+        # already written the subroutine name, current line is "("
+        self.run_expression_machine(CALL_ARGUMENTS)
 
     def handle_subroutine_call_b(self):
         # (className| varName) already written, current line is "."
         # write "."
-        self.compile_line()
+        self.compile_expected(".")
         self.advance()
         # current line is subroutine name
         # can be replaced with compile subroutine
-        self.compile_line()
+        self.compile_name()
         self.advance()
         # whats lest the the rest of subroutine call
         self.handle_subroutine_call_a()
-        pass
-
-
-
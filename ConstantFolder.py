@@ -0,0 +1,176 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+from SyntaxTree import NO_NODE, SyntaxTree
+
+MAX_INT_CONSTANT = 32767
+KEYWORD_VALUES = {"true": -1, "false": 0, "null": 0}
+
+
+def to_word(value: int) -> int:
+    """Wraps a number into a signed 16 bit word, like the Hack ALU."""
+    return ((value + 0x8000) & 0xffff) - 0x8000
+
+
+def divide(a: int, b: int) -> typing.Optional[int]:
+    # Math.divide rounds toward zero, and dividing by zero is left to it to
+    # report at run time
+    if b == 0:
+        return None
+    quotient = abs(a) // abs(b)
+    return to_word(-quotient if (a < 0) != (b < 0) else quotient)
+
+
+BINARY_OPERATIONS = {
+    "+": lambda a, b: to_word(a + b),
+    "-": lambda a, b: to_word(a - b),
+    "*": lambda a, b: to_word(a * b),
+    "/": divide,
+    "&": lambda a, b: to_word(a & b),
+    "|": lambda a, b: to_word(a | b),
+    "<": lambda a, b: -1 if a < b else 0,
+    ">": lambda a, b: -1 if a > b else 0,
+    "=": lambda a, b: -1 if a == b else 0,
+}
+UNARY_OPERATIONS = {
+    "-": lambda a: to_word(-a),
+    "~": lambda a: to_word(~a),
+    "^": lambda a: to_word(a << 1),
+    # arithmetic and logical shifts only agree on non negative numbers
+    "#": lambda a: a >> 1 if a >= 0 else None,
+}
+
+
+class ConstantFolder:
+    """Evaluates the constant parts of the expressions of a SyntaxTree at
+    compile time, and replaces them by their value.
+
+    Jack has no operator precedence, a chain term (op term)* is evaluated
+    from left to right with 16 bit arithmetic, so a chain that starts with
+    constants has its constant prefix folded even when the rest is not
+    constant: "2 * 3 + x" becomes "6 + x". A value is written the way Jack
+    can spell it: n, - n, or ~ 32767 for -32768.
+    """
+
+    def __init__(self, tree: SyntaxTree) -> None:
+        self.tree = tree
+        # the value of every constant term and expression that was visited
+        self.values = {}
+        self.folded = 0
+
+    def fold(self) -> int:
+        """Folds the whole tree, returns how many terms and expressions were
+        replaced by a constant."""
+        kinds = self.tree.kinds
+        # children are visited before their parent leaves, without recursion
+        for entering, node, _ in self.tree.walk():
+            if entering:
+                continue
+            if kinds[node] == "term":
+                self.fold_term(node)
+            elif kinds[node] == "expression":
+                self.fold_expression(node)
+        return self.folded
+
+    def term_value(self, node: int) -> typing.Optional[int]:
+        tree = self.tree
+        children = list(tree.children(node))
+        first = children[0] if children else NO_NODE
+        if first == NO_NODE:
+            return None
+        text = tree.text(first)
+        label = tree.kinds[first]
+        if label == "integerConstant":
+            value = int(text)
+            return value if value <= MAX_INT_CONSTANT else None
+        if label == "keyword":
+            return KEYWORD_VALUES.get(text)
+        if label != "symbol" or len(children) < 2:
+            return None
+        operand = self.values.get(children[1])
+        if operand is None:
+            return None
+        if text == "(":
+            return operand
+        operation = UNARY_OPERATIONS.get(text)
+        return operation(operand) if operation else None
+
+    def is_literal(self, node: int) -> bool:
+        """Is a term already spelled the way its value would be written?"""
+        tree = self.tree
+        children = list(tree.children(node))
+        label = tree.kinds[children[0]]
+        if label in ("integerConstant", "keyword"):
+            return True
+        if len(children) == 2 and tree.text(children[0]) in ("-", "~"):
+            inner = list(tree.children(children[1]))
+            return len(inner) == 1 \
+                and tree.kinds[inner[0]] == "integerConstant"
+        return False
+
+    def fold_term(self, node: int) -> None:
+        value = self.term_value(node)
+        if value is None:
+            return
+        self.values[node] = value
+        if not self.is_literal(node):
+            self.write_literal(node, value)
+            self.folded += 1
+
+    def fold_expression(self, node: int) -> None:
+        tree = self.tree
+        children = list(tree.children(node))
+        value = self.values.get(children[0])
+        if value is None:
+            return
+        # how many children of the chain were folded into value
+        used = 1
+        while used + 1 < len(children):
+            operand = self.values.get(children[used + 1])
+            if operand is None:
+                break
+            result = BINARY_OPERATIONS[tree.text(children[used])](
+                value, operand)
+            if result is None:
+                break
+            value = result
+            used += 2
+        if used == len(children):
+            self.values[node] = value
+        if used == 1:
+            return
+        # the first term takes the place of the folded prefix
+        first = children[0]
+        self.write_literal(first, value)
+        self.values[first] = value
+        tree.next_sibling[first] = children[used] \
+            if used < len(children) else NO_NODE
+        self.folded += 1
+
+    def write_literal(self, term: int, value: int) -> None:
+        """Replaces the children of a term by the spelling of value."""
+        tree = self.tree
+        if value >= 0:
+            tree.first_child[term] = tree.add_node(
+                "integerConstant", str(value))
+            return
+        # -n, or ~32767 for -32768 which has no positive counterpart
+        symbol, magnitude = ("-", -value) if value > -0x8000 \
+            else ("~", MAX_INT_CONSTANT)
+        operator = tree.add_node("symbol", symbol)
+        inner = tree.add_node("term")
+        tree.first_child[inner] = tree.add_node(
+            "integerConstant", str(magnitude))
+        tree.first_child[term] = operator
+        tree.next_sibling[operator] = inner
+
+
+def fold_constants(tree: SyntaxTree) -> int:
+    """Folds the constant expressions of a tree in place, returns how many
+    terms and expressions were replaced by a constant."""
+    return ConstantFolder(tree).fold()
@@ -0,0 +1,317 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import hashlib
+import io
+import json
+import os
+import typing
+
+from CompilationEngine import CompilationEngine
+from JackTokenizer import TOKEN_REGEX, JackSyntaxError, JackTokenizer
+from XmlWriter import IDENTIFIER_REGEX, XmlWriter
+
+# change this whenever the records of the state file change
+INCREMENTAL_VERSION = "3"
+STATE_FILE = ".jackparse.json"
+# the keywords that start a classVarDec or a subroutineDec
+VAR_KEYWORDS = {"static", "field"}
+SUBROUTINE_KEYWORDS = {"constructor", "function", "method"}
+
+# a token and where it is in the source: (text, start offset, end offset)
+Token = typing.Tuple[str, int, int]
+
+
+def text_hash(text: str) -> str:
+    """What the state file keeps of a piece of a source instead of the text,
+    hashed like the BuildCache hashes sources."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def scan_tokens(source: str, start: int,
+                end: int) -> typing.Optional[typing.List[Token]]:
+    """The tokens of source[start:end], scanned like the JackTokenizer does.
+
+    start must be where a token (or whitespace or a comment) starts. None if
+    the scan does not arrive exactly at end, e.g. because a comment opened
+    before end now runs past it: then the text after end is not tokenized
+    the way it was.
+    """
+    tokens = []
+    if start == end:
+        return tokens
+    for match in TOKEN_REGEX.finditer(source, start):
+        if match.group(1):
+            tokens.append((match.group(1), match.start(), match.end()))
+        if match.end() >= end:
+            return tokens if match.end() == end else None
+    return None
+
+
+def split_members(tokens: typing.List[Token]
+                  ) -> typing.Optional[typing.List[typing.Tuple[str, int, int]]]:
+    """Splits the tokens between the "{" and the "}" of a class into its
+    members: a member starts at a static, field, constructor, function or
+    method keyword outside of any braces.
+
+    Returns:
+        the (kind, first token index, last token index) of every member, or
+        None if the tokens are not a sequence of complete members: a
+        classVarDec ends with ";" and has no braces, a subroutineDec ends
+        with its "}".
+    """
+    members = []
+    depth = 0
+    for index, (text, _, _) in enumerate(tokens):
+        if depth == 0 and (text in VAR_KEYWORDS or text in SUBROUTINE_KEYWORDS):
+            kind = "classVarDec" if text in VAR_KEYWORDS else "subroutineDec"
+            members.append([kind, index, index])
+        elif not members:
+            return None
+        elif text == "{":
+            depth += 1
+        elif text == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+        members[-1][2] = index
+    for kind, first, last in members:
+        if tokens[last][0] != ("}" if kind == "subroutineDec" else ";"):
+            return None
+        if kind == "classVarDec" and any(
+                token[0] in ("{", "}") for token in tokens[first:last + 1]):
+            return None
+    return [tuple(member) for member in members]
+
+
+def in_order(members: typing.List) -> bool:
+    """The CompilationEngine parses the fields and statics of a class before
+    its subroutines, a classVarDec after a subroutineDec ends the class."""
+    kinds = [member[0] for member in members]
+    return "subroutineDec" not in kinds or "classVarDec" not in kinds[
+        kinds.index("subroutineDec"):]
+
+
+def parse_member(source: str, kind: str, compact: bool) -> typing.Optional[str]:
+    """The XML of one classVarDec or subroutineDec, as the CompilationEngine
+    writes it inside a class. None if the member is not valid or does not
+    end at its last token, then parsing it alone is not what parsing the
+    class would do.
+
+    The engine is strict, so that it stops at the end of the member instead
+    of reading past it, like it would read the next member in the class.
+    """
+    tokenizer = JackTokenizer(io.StringIO(source))
+    output = io.StringIO()
+    engine = CompilationEngine(tokenizer, output, compact, strict=True)
+    engine.nested_number = 1
+    try:
+        if kind == "classVarDec":
+            engine.compile_class_var_dec()
+        else:
+            engine.compile_subroutine()
+    except JackSyntaxError:
+        return None
+    engine.flush()
+    if tokenizer.current_token_index != len(tokenizer.tokens) - 1:
+        return None
+    return output.getvalue()
+
+
+def write_fragment(compact: bool, *events: typing.Tuple) -> str:
+    """The XML of a few open_tag, terminal and close_tag calls."""
+    output = io.StringIO()
+    writer = XmlWriter(output, compact)
+    for method, *arguments in events:
+        getattr(writer, method)(*arguments)
+    writer.flush()
+    return output.getvalue()
+
+
+class IncrementalParser:
+    """Keeps what the last run parsed, so that after an edit only the class
+    members that changed are parsed again.
+
+    For every output it remembers the offsets and XML of every classVarDec
+    and subroutineDec of the source it was written from, but not the source
+    itself: only hashes of its pieces, so the state stays small next to
+    big classes. Every member has the hash of its text with what comes
+    before it ("lead", from the end of the member before) and with what
+    comes after it ("tail", up to the start of the next one). A new source
+    is compared with the old one from the start, member by member, with
+    the leads, and from the end with the tails (shifted by the change in
+    length). Only the text between the members that are the same at the
+    start and the ones that are the same at the end is tokenized and parsed
+    again. The XML of the others is reused, and the output is written from
+    the pieces.
+
+    Anything that makes the pieces differ from a parse of the whole file
+    (a change in the class header, a comment that now runs into the next
+    member, members that do not end where they should) makes analyze()
+    return None, and the file is parsed the normal way. The state is a json
+    file next to the outputs, like the BuildCache manifest.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, STATE_FILE)
+        self.files = {}
+        # how many members the last analyze() parsed, and how many it reused
+        self.parsed = 0
+        self.reused = 0
+        try:
+            with open(self.path, 'r') as state_file:
+                data = json.load(state_file)
+            if data.get("version") == INCREMENTAL_VERSION:
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            # no state yet, or a broken one: every file is parsed whole
+            pass
+
+    def name(self, output_path: str) -> str:
+        return os.path.relpath(output_path, self.directory)
+
+    def analyze(self, output_path: str, source: str,
+                compact: bool = False) -> typing.Optional[str]:
+        """The XML of source, parsing only what changed since the last
+        source of output_path.
+
+        Returns:
+            typing.Optional[str]: the XML, or None if the source cannot be
+            split into members safely and must be analyzed whole.
+        """
+        name = self.name(output_path)
+        old = self.files.get(name)
+        entry = None
+        if old is not None and old["compact"] == compact:
+            entry = self.reparse(old, source)
+        if entry is None:
+            entry = self.parse(source, compact)
+        if entry is None:
+            self.files.pop(name, None)
+            return None
+        self.files[name] = entry
+        return entry["header"] + "".join(
+            member[3] for member in entry["members"]) + entry["footer"]
+
+    def parse(self, source: str, compact: bool) -> typing.Optional[typing.Dict]:
+        """Parses a whole source member by member."""
+        tokens = scan_tokens(source, 0, len(source))
+        # class name { members } and nothing after it
+        if tokens is None or len(tokens) < 4 or tokens[0][0] != "class" \
+                or not IDENTIFIER_REGEX.fullmatch(tokens[1][0]) \
+                or tokens[1][0] in JackTokenizer.TOKEN_TYPES \
+                or tokens[2][0] != "{" or tokens[-1][0] != "}":
+            return None
+        members = self.parse_members(source, tokens[3:-1], compact)
+        if members is None or not in_order(members):
+            return None
+        self.reused = 0
+        return self.hashed(source, {
+            "compact": compact,
+            "header_end": tokens[2][2], "footer_start": tokens[-1][1],
+            "header": write_fragment(
+                compact, ("open_tag", "class", 0),
+                ("terminal", "keyword", "class", 1),
+                ("terminal", "identifier", tokens[1][0], 1),
+                ("terminal", "symbol", "{", 1)),
+            "footer": write_fragment(
+                compact, ("terminal", "symbol", "}", 1),
+                ("close_tag", "class", 0)),
+            "members": members})
+
+    def hashed(self, source: str, entry: typing.Dict) -> typing.Dict:
+        """entry, with the hashes of source that the next reparse compares
+        against: of all of it, of the header and the footer, and the lead
+        and tail of every member (which are appended to it)."""
+        header_end = entry["header_end"]
+        footer_start = entry["footer_start"]
+        members = entry["members"]
+        for index, member in enumerate(members):
+            previous_end = members[index - 1][2] if index else header_end
+            next_start = members[index + 1][1] if index + 1 < len(members) \
+                else footer_start
+            member[4:] = [text_hash(source[previous_end:member[2]]),
+                          text_hash(source[member[1]:next_start])]
+        return dict(entry, length=len(source), hash=text_hash(source),
+                    header_hash=text_hash(source[:header_end]),
+                    footer_hash=text_hash(source[footer_start:]))
+
+    def parse_members(self, source: str, tokens: typing.List[Token],
+                      compact: bool) -> typing.Optional[typing.List]:
+        """The [kind, start, end, xml] of the members made of tokens, the
+        hashes are added by hashed()."""
+        spans = split_members(tokens) if tokens else []
+        if spans is None:
+            return None
+        members = []
+        for kind, first, last in spans:
+            start, end = tokens[first][1], tokens[last][2]
+            xml = parse_member(source[start:end], kind, compact)
+            if xml is None:
+                return None
+            members.append([kind, start, end, xml])
+        self.parsed = len(members)
+        return members
+
+    def reparse(self, old: typing.Dict,
+                source: str) -> typing.Optional[typing.Dict]:
+        """Parses again only the members of old that the change overlaps."""
+        members = old["members"]
+        if len(source) == old["length"] and text_hash(source) == old["hash"]:
+            self.parsed = 0
+            self.reused = len(members)
+            return old
+        header_end = old["header_end"]
+        shift = len(source) - old["length"]
+        footer_start = old["footer_start"] + shift
+        if footer_start < header_end \
+                or text_hash(source[:header_end]) != old["header_hash"] \
+                or text_hash(source[footer_start:]) != old["footer_hash"]:
+            return None
+        # members whose text did not change, nor the text before them back
+        # to the header, are kept
+        first = 0
+        start = header_end
+        while first < len(members) and text_hash(
+                source[start:members[first][2]]) == members[first][4]:
+            start = members[first][2]
+            first += 1
+        # the same from the footer back, in the shifted new source
+        last = len(members)
+        end = footer_start
+        while last > first and members[last - 1][1] + shift >= start and \
+                text_hash(source[members[last - 1][1] + shift:end]) \
+                == members[last - 1][5]:
+            last -= 1
+            end = members[last][1] + shift
+        # the text between the kept members, in the new source. It starts
+        # after a "{", "}" or ";", which no change can extend
+        tokens = scan_tokens(source, start, end)
+        if tokens is None:
+            return None
+        changed = self.parse_members(source, tokens, old["compact"])
+        if changed is None:
+            return None
+        kept_after = [[kind, member_start + shift, member_end + shift, xml]
+                      for kind, member_start, member_end, xml, *_
+                      in members[last:]]
+        new_members = members[:first] + changed + kept_after
+        if not in_order(new_members):
+            return None
+        self.reused = len(new_members) - len(changed)
+        return self.hashed(source, dict(
+            old, members=new_members, footer_start=footer_start))
+
+    def forget(self, output_path: str) -> None:
+        self.files.pop(self.name(output_path), None)
+
+    def save(self) -> None:
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as state_file:
+            json.dump({"version": INCREMENTAL_VERSION, "files": self.files},
+                      state_file)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,199 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+The library API of the analyzer, for tools that embed it: everything takes
+the Jack source as a string (or utf-8 bytes) and returns its result in
+memory, no file is opened.
+
+    import JackAPI
+    xml = JackAPI.analyze_source(text)
+    tree = JackAPI.parse_source(text)
+    error = JackAPI.check_source(text)
+    vm_code = JackAPI.compile_source(text)
+
+The input is parsed strictly: analyze_source, parse_source and
+compile_source raise a JackSyntaxError for an input that is not valid Jack,
+check_source returns the error. The functions can be called from many
+threads at once. The tokenizer, the
+engine and the writers are kept in a pool and reused from call to call.
+"""
+import contextlib
+import io
+import threading
+import typing
+
+from BinaryTree import BinaryWriter
+from CodeGenerator import CodeGenerator
+from CompilationEngine import CompilationEngine
+from JackTokenizer import JackSyntaxError, JackTokenizer
+from SyntaxTree import SyntaxTree, TreeBuilder
+from VMWriter import VMWriter
+from XmlWriter import NullWriter, SkipWriter, XmlWriter
+
+# how many idle sessions a pool keeps, more threads than that still work
+# but their sessions are dropped after the call
+POOL_SIZE = 8
+
+Source = typing.Union[str, bytes]
+
+
+def source_stream(source: Source) -> typing.TextIO:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = bytes(source).decode('utf-8')
+    return io.StringIO(source)
+
+
+class AnalyzerSession:
+    """A tokenizer, a CompilationEngine and the writers they need, that are
+    reset for every input instead of being built again.
+
+    A session is used by one thread at a time, AnalyzerPool hands them out.
+    The XmlWriters keep the indentation and tag strings they computed, and
+    the output buffer is reused.
+    """
+
+    def __init__(self) -> None:
+        self.tokenizer = JackTokenizer(io.StringIO(""))
+        self.output = io.StringIO()
+        self.xml_writers = {compact: XmlWriter(self.output, compact)
+                            for compact in (False, True)}
+        self.null_writer = NullWriter()
+        self.skip_writer = SkipWriter()
+        self.engine = CompilationEngine(self.tokenizer, writer=self.null_writer,
+                                        strict=True)
+
+    def run(self, source: Source, writer) -> None:
+        """Parses source into writer, raises JackSyntaxError if it is not
+        valid Jack. A None writer only checks the source: its tokens are
+        checked at once and the engine then writes nothing."""
+        self.tokenizer.reset(source_stream(source))
+        if writer is None:
+            writer = self.null_writer
+            if writer.valid_tokens(self.tokenizer):
+                writer = self.skip_writer
+        self.engine.reset(writer, strict=True)
+        self.engine.compile()
+        self.engine.flush()
+
+    def analyze(self, source: Source, compact: bool = False,
+                binary: bool = False) -> typing.Union[str, bytes]:
+        """The XML of source, or its binary parse tree (see BinaryTree)."""
+        if binary:
+            output = io.BytesIO()
+            self.run(source, BinaryWriter(output))
+            return output.getvalue()
+        self.output.seek(0)
+        self.output.truncate()
+        writer = self.xml_writers[compact]
+        writer.reset(self.output)
+        self.run(source, writer)
+        return self.output.getvalue()
+
+    def parse(self, source: Source) -> SyntaxTree:
+        tree = SyntaxTree()
+        self.run(source, TreeBuilder(tree))
+        return tree
+
+    def check(self, source: Source) -> typing.Optional[str]:
+        """None if source is valid Jack, else the syntax error."""
+        try:
+            self.run(source, None)
+        except JackSyntaxError as error:
+            return str(error)
+        return None
+
+    def compile(self, source: Source, fold: bool = True) -> str:
+        """The VM code of a class, raises JackSyntaxError if it cannot be
+        compiled."""
+        output = io.StringIO()
+        CodeGenerator(self.parse(source), VMWriter(output), fold).compile()
+        return output.getvalue()
+
+
+class AnalyzerPool:
+    """Hands out AnalyzerSessions to threads, one thread per session at a
+    time, and takes them back after the call.
+
+    The idle sessions are a stack under a lock, the most recently used one
+    is handed out first. A session whose call raised is not taken back, it
+    might be in the middle of something.
+    """
+
+    def __init__(self, size: int = POOL_SIZE) -> None:
+        """
+        :param size: how many idle sessions to keep.
+        """
+        self.size = size
+        self.idle = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def session(self) -> typing.Iterator[AnalyzerSession]:
+        with self.lock:
+            session = self.idle.pop() if self.idle else None
+        if session is None:
+            session = AnalyzerSession()
+        yield session
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append(session)
+
+    def analyze_source(self, source: Source, compact: bool = False,
+                       binary: bool = False) -> typing.Union[str, bytes]:
+        with self.session() as session:
+            return session.analyze(source, compact, binary)
+
+    def parse_source(self, source: Source) -> SyntaxTree:
+        with self.session() as session:
+            return session.parse(source)
+
+    def check_source(self, source: Source) -> typing.Optional[str]:
+        with self.session() as session:
+            return session.check(source)
+
+    def compile_source(self, source: Source, fold: bool = True) -> str:
+        with self.session() as session:
+            return session.compile(source, fold)
+
+
+# the pool behind the functions of this module
+DEFAULT_POOL = AnalyzerPool()
+
+
+def analyze_source(source: Source, compact: bool = False,
+                   binary: bool = False) -> typing.Union[str, bytes]:
+    """The XML of a Jack source, like JackAnalyzer writes into a file.
+
+    Args:
+        source (Source): the Jack source, a string or utf-8 bytes.
+        compact (bool): write the XML without indentation.
+        binary (bool): return the binary parse tree (see BinaryTree) as
+            bytes instead.
+
+    Returns:
+        typing.Union[str, bytes]: the XML, or the binary parse tree.
+
+    Raises:
+        JackSyntaxError: if the source is not valid Jack.
+    """
+    return DEFAULT_POOL.analyze_source(source, compact, binary)
+
+
+def parse_source(source: Source) -> SyntaxTree:
+    """The syntax tree of a Jack source. Raises JackSyntaxError if the
+    source is not valid Jack."""
+    return DEFAULT_POOL.parse_source(source)
+
+
+def check_source(source: Source) -> typing.Optional[str]:
+    """None if a Jack source is valid, else its syntax error."""
+    return DEFAULT_POOL.check_source(source)
+
+
+def compile_source(source: Source, fold: bool = True) -> str:
+    """The VM code of a Jack class, with its constant expressions folded
+    unless fold is False. Raises JackSyntaxError if it cannot be compiled."""
+    return DEFAULT_POOL.compile_source(source, fold)
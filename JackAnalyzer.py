@@ -4,20 +4,78 @@ https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
 and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
 Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import io
+import mmap
 import os
 import sys
 import typing
+from BinaryTree import BinaryWriter
+from BuildCache import BuildCache
+from CodeGenerator import CodeGenerator
+from ConstantFolder import fold_constants
 from CompilationEngine import CompilationEngine
-from JackTokenizer import JackTokenizer
+from IncrementalParser import STATE_FILE as INCREMENTAL_STATE, \
+    IncrementalParser
+from JackTokenizer import JackSyntaxError, JackTokenizer, MappedJackTokenizer
+from OutputArchive import OutputArchive
+from OutputVerifier import reference_path, verify_files
+from RunStats import FileStats, RunStats
+from SyntaxTree import SyntaxTree, TreeBuilder
+from TableEngine import TableEngine
+from VMWriter import VMWriter
+from XmlWriter import NullWriter, SkipWriter, XmlWriter
+
+# what replaces ".jack" in the name of an output file
+XML_SUFFIX = "test.xml"
+BINARY_SUFFIX = ".jbt"
+VM_SUFFIX = ".vm"
+
+
+def engine_class(table: bool = False) -> typing.Type[CompilationEngine]:
+    """The hand written CompilationEngine, or the TableEngine that parses
+    with the LL(1) table of JackGrammar, they write the same output."""
+    return TableEngine if table else CompilationEngine
+
+
+def open_tokenizer(
+        input_file: typing.Union[typing.TextIO, mmap.mmap, bytes],
+        streaming: bool = False) -> JackTokenizer:
+    """A tokenizer over a text file, or over raw bytes such as a memory
+    mapped file (see map_file)."""
+    if isinstance(input_file, (mmap.mmap, bytes)):
+        return MappedJackTokenizer(input_file)
+    return JackTokenizer(input_file, streaming)
+
+
+def map_file(input_file: typing.BinaryIO) -> typing.Union[mmap.mmap, bytes]:
+    """Maps a file opened in binary mode into memory, read only."""
+    if os.fstat(input_file.fileno()).st_size == 0:
+        # an empty file cannot be mapped
+        return b''
+    return mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
 
 
 def analyze_file(
-        input_file: typing.TextIO, output_file: typing.TextIO) -> None:
+        input_file: typing.Union[typing.TextIO, mmap.mmap, bytes],
+        output_file: typing.Union[typing.TextIO, typing.BinaryIO],
+        streaming: bool = False, compact: bool = False,
+        stats: FileStats = None, binary: bool = False,
+        table: bool = False) -> None:
     """Analyzes a single file.
 
     Args:
-        input_file (typing.TextIO): the file to analyze.
+        input_file (typing.TextIO): the file to analyze, or its raw bytes.
         output_file (typing.TextIO): writes all output to this file.
+        streaming (bool): tokenize the input lazily, in chunks.
+        compact (bool): write the XML without indentation.
+        stats (FileStats): if given, collects timers and counters.
+        binary (bool): write a binary parse tree (see BinaryTree) into the
+            output file, opened in binary mode, instead of XML.
+        table (bool): parse with the table driven TableEngine.
     """
     """
     We propose implementing the project in two stages. First, write and test
@@ -124,32 +182,738 @@ def analyze_file(
       > 
       > Compiling "C:\...\projects\09\Reflect"
     """
-    tokenizer  = JackTokenizer(input_file)
-    compilation_engine = CompilationEngine(tokenizer, output_file)
-    compilation_engine.compile_subroutine()
+    with stats.timer("tokenize") if stats else contextlib.nullcontext():
+        tokenizer  = open_tokenizer(input_file, streaming)
+    compilation_engine = engine_class(table)(
+        tokenizer, output_file, compact,
+        writer=BinaryWriter(output_file) if binary else None)
+    run_engine(compilation_engine, stats)
 
 
+def parse_file(
+        input_file: typing.Union[typing.TextIO, mmap.mmap, bytes],
+        streaming: bool = False, stats: FileStats = None,
+        table: bool = False) -> SyntaxTree:
+    """Parses a single file into a syntax tree, without writing any XML.
 
-if "__main__" == __name__:
+    Args:
+        input_file (typing.TextIO): the file to parse, or its raw bytes.
+        streaming (bool): tokenize the input lazily, in chunks.
+        stats (FileStats): if given, collects timers and counters.
+        table (bool): parse with the table driven TableEngine.
+
+    Returns:
+        SyntaxTree: the parse tree of the file.
+    """
+    tree = SyntaxTree()
+    with stats.timer("tokenize") if stats else contextlib.nullcontext():
+        tokenizer = open_tokenizer(input_file, streaming)
+    run_engine(engine_class(table)(
+        tokenizer, writer=TreeBuilder(tree)), stats)
+    return tree
+
+
+def check_file(
+        input_file: typing.Union[typing.TextIO, mmap.mmap, bytes],
+        streaming: bool = False, table: bool = False,
+        stats: FileStats = None) -> typing.Optional[str]:
+    """Checks that a single file is valid Jack, without writing anything.
+
+    The tokens are checked first, all at once (see NullWriter.valid_tokens),
+    and then the engine only parses: no terminal or tag is sent anywhere.
+    With stats, the tags are counted, so they go to the NullWriter.
+
+    Args:
+        input_file (typing.TextIO): the file to check, or its raw bytes.
+        streaming (bool): tokenize the input lazily, in chunks.
+        table (bool): parse with the table driven TableEngine.
+        stats (FileStats): if given, collects timers and counters.
+
+    Returns:
+        typing.Optional[str]: None if the file parses, else the error.
+    """
+    try:
+        with stats.timer("tokenize") if stats else contextlib.nullcontext():
+            tokenizer = open_tokenizer(input_file, streaming)
+        writer = NullWriter()
+        if stats is None and writer.valid_tokens(tokenizer):
+            writer = SkipWriter()
+        run_engine(engine_class(table)(tokenizer, writer=writer, strict=True),
+                   stats)
+    except JackSyntaxError as error:
+        return str(error)
+    return None
+
+
+def run_engine(
+        compilation_engine: CompilationEngine, stats: FileStats = None) -> None:
+    """Compiles the whole input of the engine, and counts it into stats."""
+    if stats is None:
+        compilation_engine.compile()
+        compilation_engine.flush()
+        return
+    stats.instrument(compilation_engine)
+    with stats.parsing():
+        compilation_engine.compile()
+        compilation_engine.flush()
+    tokenizer = compilation_engine.tokenizer
+    stats.tokens = tokenizer.current_token_index + tokenizer.has_more_tokens()
+
+
+
+def analyze_streams(
+        input_file: typing.Union[typing.TextIO, mmap.mmap, bytes],
+        output_file: typing.Union[typing.TextIO, typing.BinaryIO],
+        options: argparse.Namespace, stats: FileStats = None) -> None:
+    """Analyzes an opened input into an opened output (a binary one with
+    --binary), the way the command line options say (directly or through a
+    syntax tree), or compiles it into VM code with --vm."""
+    if options.vm:
+        # one parse into a tree, the VM code is generated from the tree, and
+        # the code generator folds the constants itself
+        tree = parse_file(input_file, options.stream, stats, options.table)
+        with stats.timer("write") if stats else contextlib.nullcontext():
+            CodeGenerator(tree, VMWriter(output_file)).compile()
+    elif options.tree or options.fold:
+        tree = parse_file(input_file, options.stream, stats, options.table)
+        if options.fold:
+            with stats.timer("parse") if stats else contextlib.nullcontext():
+                fold_constants(tree)
+        with stats.timer("write") if stats else contextlib.nullcontext():
+            tree.write_xml(BinaryWriter(output_file) if options.binary
+                           else XmlWriter(output_file, options.compact))
+    else:
+        analyze_file(input_file, output_file, options.stream,
+                     options.compact, stats, options.binary, options.table)
+
+
+def analyze_path(
+        input_path: str, output_path: str, options: argparse.Namespace,
+        archive: OutputArchive = None
+) -> typing.Tuple[typing.Optional[str], typing.Optional[FileStats]]:
+    """Analyzes the file at input_path into output_path.
+
+    This is the unit of work of the process pool, so it takes paths and
+    reports failures as a message instead of raising.
+
+    Args:
+        input_path (str): the .jack file to analyze.
+        output_path (str): where to write the XML, the name of the entry
+            when there is an archive.
+        options (argparse.Namespace): the command line options.
+        archive (OutputArchive): if given, the output is written into it.
+
+    Returns:
+        typing.Tuple[typing.Optional[str], typing.Optional[FileStats]]: None
+        on success, else a description of the error, and the statistics of
+        the file if options.stats is set.
+    """
+    stats = FileStats(input_path) if options.stats else None
+    if options.check:
+        # no output file is opened, a syntax error is the result
+        try:
+            with open(input_path, 'rb' if options.mmap else 'r') as input_file:
+                if options.mmap:
+                    input_file = map_file(input_file)
+                error = check_file(input_file, options.stream, options.table,
+                                   stats)
+            if stats:
+                stats.bytes_read = os.path.getsize(input_path)
+            return error, stats
+        except Exception as error:
+            return "{}: {}".format(type(error).__name__, error), stats
+    if archive is not None:
+        open_output = archive.open_entry(output_path, options.binary)
+    else:
+        open_output = open(output_path, 'wb' if options.binary else 'w')
+    try:
+        with open(input_path, 'rb' if options.mmap else 'r') as input_file, \
+                open_output as output_file:
+            if options.mmap:
+                input_file = map_file(input_file)
+            analyze_streams(input_file, output_file, options, stats)
+        if stats:
+            stats.bytes_read = os.path.getsize(input_path)
+            stats.bytes_written = archive.sizes[output_path] if archive \
+                else os.path.getsize(output_path)
+    except Exception as error:
+        return "{}: {}".format(type(error).__name__, error), stats
+    return None, stats
+
+
+def analyze_incremental(
+        input_path: str, output_path: str, options: argparse.Namespace,
+        incremental: IncrementalParser
+) -> typing.Tuple[typing.Optional[str], typing.Optional[FileStats]]:
+    """Like analyze_path, but only parses the members of the class that
+    changed since the last run (see IncrementalParser). A file that cannot
+    be split into members is analyzed whole."""
+    stats = FileStats(input_path) if options.stats else None
+    try:
+        with open(input_path, 'r') as input_file:
+            source = input_file.read()
+        with stats.parsing() if stats else contextlib.nullcontext():
+            xml = incremental.analyze(output_path, source, options.compact)
+        with open(output_path, 'w') as output_file:
+            if xml is None:
+                analyze_streams(io.StringIO(source), output_file, options,
+                                stats)
+            else:
+                with stats.timer("write") if stats \
+                        else contextlib.nullcontext():
+                    output_file.write(xml)
+        if options.verbose and xml is not None:
+            print("{}: {} members parsed, {} reused".format(
+                input_path, incremental.parsed, incremental.reused),
+                file=sys.stderr)
+        if stats:
+            stats.bytes_read = os.path.getsize(input_path)
+            stats.bytes_written = os.path.getsize(output_path)
+    except Exception as error:
+        incremental.forget(output_path)
+        return "{}: {}".format(type(error).__name__, error), stats
+    return None, stats
+
+
+def analyze_paths(
+        paths: typing.List[typing.Tuple[str, str]],
+        options: argparse.Namespace,
+        archive: OutputArchive = None,
+        incremental: IncrementalParser = None
+) -> typing.List[typing.Optional[str]]:
+    """Analyzes (input path, output path) pairs, in options.jobs processes
+    or through the asynchronous pipeline (--pipeline). The outputs of an
+    archive are streamed into it one after the other, in this process, and
+    so are the incremental ones (--incremental), which share one state.
+
+    Returns:
+        typing.List[typing.Optional[str]]: the result of analyze_path for
+        every pair, in the order of paths.
+    """
+    if archive is not None:
+        return [analyze_path(input_path, entry_name, options, archive)
+                for input_path, entry_name in paths]
+    if incremental is not None:
+        return [analyze_incremental(input_path, output_path, options,
+                                    incremental)
+                for input_path, output_path in paths]
+    if options.pipeline and paths:
+        return asyncio.run(run_pipeline(paths, options))
+    jobs = options.jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) <= 1:
+        return [analyze_path(input_path, output_path, options)
+                for input_path, output_path in paths]
+    # the largest files are submitted first, so a big file does not start
+    # last and keep one process busy after all the others are done
+    by_size = sorted(range(len(paths)),
+                     key=lambda i: os.path.getsize(paths[i][0]), reverse=True)
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        futures = {i: executor.submit(analyze_path, *paths[i], options)
+                   for i in by_size}
+        return [futures[i].result() for i in range(len(paths))]
+
+
+def analyze_stdin(options: argparse.Namespace, stdin: typing.TextIO,
+                  stdout: typing.TextIO, stderr: typing.TextIO) -> int:
+    """Analyzes the Jack source read from stdin into XML written to stdout,
+    for the "-" input path. --mmap, --jobs and --cache do not apply to a
+    pipe and are ignored.
+
+    Returns:
+        int: the exit status.
+    """
+    stats = FileStats("-") if options.stats else None
+    try:
+        if options.check:
+            error = check_file(stdin, options.stream, options.table, stats)
+        elif options.binary and not hasattr(stdout, "buffer"):
+            error = "--binary needs a binary stdout"
+        else:
+            # a binary tree goes to the bytes under the text stream
+            analyze_streams(stdin, stdout.buffer if options.binary else stdout,
+                            options, stats)
+            if options.binary:
+                stdout.buffer.flush()
+            error = None
+    except Exception as exception:
+        error = "{}: {}".format(type(exception).__name__, exception)
+    if options.check:
+        print("-: {}".format("ok" if error is None else "FAILED, " + error),
+              file=stdout)
+    elif error is not None:
+        print("-: {}".format(error), file=stderr)
+    if stats:
+        run_stats = RunStats()
+        run_stats.add(stats)
+        # stdout holds the XML, so the statistics go to stderr
+        print(run_stats.format_json() if options.stats_format == "json"
+              else run_stats.format_text(), file=stderr)
+    return 0 if error is None else 1
+
+
+def read_manifest(
+        manifest_file: typing.TextIO, cwd: str,
+        output_suffix: str = XML_SUFFIX) -> typing.List[typing.Tuple[str, str]]:
+    """Reads the (input path, output path) pairs of a --manifest file.
+
+    Every line holds an input path and an output path, separated by a tab
+    (or by spaces, when neither path contains one). A line with only an
+    input path is written next to it, like a normal run. Empty lines and
+    lines starting with # are skipped.
+
+    Args:
+        manifest_file (typing.TextIO): the manifest.
+        cwd (str): relative paths are relative to this directory.
+        output_suffix (str): replaces the extension of an input path that
+            is given without an output path.
+
+    Returns:
+        typing.List[typing.Tuple[str, str]]: the pairs, in manifest order.
+    """
+    pairs = []
+    for line_number, line in enumerate(manifest_file, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split("\t") if "\t" in line else line.split()
+        if len(fields) > 2:
+            raise ValueError("line {} of the manifest has more than two "
+                             "paths".format(line_number))
+        input_path = os.path.abspath(os.path.join(cwd, fields[0].strip()))
+        if len(fields) == 2:
+            output_path = os.path.abspath(os.path.join(cwd, fields[1].strip()))
+        else:
+            output_path = os.path.splitext(input_path)[0] + output_suffix
+        pairs.append((input_path, output_path))
+    return pairs
+
+# how many files the asynchronous pipeline holds between two of its stages
+QUEUE_SIZE = 8
+
+
+def read_source(input_path: str) -> bytes:
+    """The read stage of the pipeline."""
+    with open(input_path, 'rb') as input_file:
+        return input_file.read()
+
+
+def write_output(output_path: str, xml: typing.Union[str, bytes]) -> int:
+    """The write stage of the pipeline, returns the size of the output."""
+    with open(output_path, 'wb' if isinstance(xml, bytes) else 'w') \
+            as output_file:
+        output_file.write(xml)
+    return os.path.getsize(output_path)
+
+
+def analyze_source(
+        input_path: str, source: bytes, options: argparse.Namespace
+) -> typing.Tuple[typing.Optional[str], typing.Optional[str],
+                  typing.Optional[FileStats]]:
+    """The parse stage of the pipeline: analyzes a source that was already
+    read into memory. Like analyze_path, it runs in a worker (a thread, or
+    a process with --jobs) and reports failures instead of raising.
+
+    Returns:
+        typing.Tuple: None on success, else a description of the error, the
+        XML (bytes with --binary, None with --check), and the statistics if
+        options.stats is set.
+    """
+    stats = FileStats(input_path) if options.stats else None
+    if stats:
+        stats.bytes_read = len(source)
+    try:
+        # the bytes are tokenized in place with --mmap, and decoded like
+        # open() would otherwise
+        input_file = source if options.mmap \
+            else io.TextIOWrapper(io.BytesIO(source))
+        if options.check:
+            return check_file(input_file, options.stream, options.table,
+                              stats), None, stats
+        output_file = io.BytesIO() if options.binary else io.StringIO()
+        analyze_streams(input_file, output_file, options, stats)
+    except Exception as error:
+        return "{}: {}".format(type(error).__name__, error), None, stats
+    return None, output_file.getvalue(), stats
+
+
+async def run_pipeline(
+        paths: typing.List[typing.Tuple[str, str]],
+        options: argparse.Namespace) -> typing.List[typing.Tuple]:
+    """Analyzes (input path, output path) pairs in three overlapping stages:
+    sources are read ahead by I/O threads, parsed by options.jobs workers
+    and written out by I/O threads, so that waiting for a slow disk (or a
+    network volume) is hidden behind the parsing of other files.
+
+    The stages are connected by queues of options.queue_size files, so at
+    most about three times that many sources and outputs are in memory.
+
+    Returns:
+        typing.List[typing.Tuple]: the result of analyze_path for every
+        pair, in the order of paths.
+    """
+    loop = asyncio.get_running_loop()
+    results = [(None, None)] * len(paths)
+    queue_size = max(1, options.queue_size)
+    jobs = options.jobs or os.cpu_count() or 1
+    # every read is started as soon as there is room in the queue, so up to
+    # queue_size reads are waited on at the same time
+    reads = asyncio.Queue(queue_size)
+    writes = asyncio.Queue(queue_size)
+    io_pool = concurrent.futures.ThreadPoolExecutor(
+        queue_size, thread_name_prefix="JackAnalyzer-io")
+    parse_pool = concurrent.futures.ThreadPoolExecutor(1) if jobs == 1 \
+        else concurrent.futures.ProcessPoolExecutor(jobs)
+
+    async def read_ahead() -> None:
+        for index, (input_path, _) in enumerate(paths):
+            await reads.put((index, loop.run_in_executor(
+                io_pool, read_source, input_path)))
+        for _ in range(jobs):
+            await reads.put(None)
+
+    async def parse() -> None:
+        while True:
+            item = await reads.get()
+            if item is None:
+                break
+            index, read = item
+            input_path, output_path = paths[index]
+            try:
+                source = await read
+            except Exception as error:
+                results[index] = (
+                    "{}: {}".format(type(error).__name__, error), None)
+                continue
+            error, xml, stats = await loop.run_in_executor(
+                parse_pool, analyze_source, input_path, source, options)
+            results[index] = (error, stats)
+            if xml is not None:
+                await writes.put((index, xml))
+
+    async def write() -> None:
+        while True:
+            item = await writes.get()
+            if item is None:
+                return
+            index, xml = item
+            try:
+                size = await loop.run_in_executor(
+                    io_pool, write_output, paths[index][1], xml)
+            except Exception as error:
+                results[index] = ("{}: {}".format(type(error).__name__, error),
+                                  results[index][1])
+                continue
+            if results[index][1]:
+                results[index][1].bytes_written = size
+
+    async def parse_all() -> None:
+        await asyncio.gather(*[parse() for _ in range(jobs)])
+        for _ in range(queue_size):
+            await writes.put(None)
+
+    with io_pool, parse_pool:
+        await asyncio.gather(
+            read_ahead(), parse_all(), *[write() for _ in range(queue_size)])
+    return results
+
+
+class AnalyzerExit(Exception):
+    """Raised instead of exiting the process by AnalyzerArgumentParser."""
+
+    def __init__(self, status: int) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+class AnalyzerArgumentParser(argparse.ArgumentParser):
+    """An argument parser that writes to the streams given to main() and
+    raises AnalyzerExit instead of exiting, so that main() can also serve
+    the requests of a JackServer."""
+    stdout = sys.stdout
+    stderr = sys.stderr
+
+    def print_help(self, file=None) -> None:
+        super().print_help(file or self.stdout)
+
+    def print_usage(self, file=None) -> None:
+        super().print_usage(file or self.stdout)
+
+    def error(self, message: str) -> None:
+        self.print_usage(self.stderr)
+        self.exit(2, "{}: error: {}\n".format(self.prog, message))
+
+    def exit(self, status: int = 0, message: str = None) -> None:
+        if message:
+            self.stderr.write(message)
+        raise AnalyzerExit(status)
+
+
+def main(argv: typing.List[str] = None, cwd: str = None,
+         stdout: typing.TextIO = None, stderr: typing.TextIO = None,
+         stdin: typing.TextIO = None, jobs: int = None) -> int:
+    """Runs the analyzer with the given command line arguments.
+
+    Args:
+        argv (typing.List[str]): the arguments, sys.argv[1:] by default.
+        cwd (str): relative paths are relative to this directory.
+        stdout (typing.TextIO): where reports (and the XML of "-") are
+            printed.
+        stderr (typing.TextIO): where errors are printed.
+        stdin (typing.TextIO): the source of "-", and of "--manifest -".
+        jobs (int): if given, overrides --jobs. JackServer runs every
+            request in its own process with jobs=1, instead of starting a
+            pool of processes per request.
+
+    Returns:
+        int: the exit status.
+    """
     # Parses the input path and calls analyze_file on each input file.
     # This opens both the input and the output files!
     # Both are closed automatically when the code finishes running.
     # If the output file does not exist, it is created automatically in the
     # correct path, using the correct filename.
-    if not len(sys.argv) == 2:
-        sys.exit("Invalid usage, please use: JackAnalyzer <input path>")
-    argument_path = os.path.abspath(sys.argv[1])
-    if os.path.isdir(argument_path):
-        files_to_assemble = [
-            os.path.join(argument_path, filename)
-            for filename in os.listdir(argument_path)]
+    cwd = cwd or os.getcwd()
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    stdin = stdin or sys.stdin
+    parser = AnalyzerArgumentParser(
+        prog="JackAnalyzer",
+        usage="JackAnalyzer [options] <input path | - | --manifest FILE>")
+    parser.stdout = stdout
+    parser.stderr = stderr
+    parser.add_argument(
+        "input_path", nargs="?",
+        help="a .jack file or a directory of them, - reads the source from "
+             "stdin and writes the XML to stdout")
+    parser.add_argument(
+        "--manifest", metavar="FILE",
+        help="analyze the input and output path pairs listed in FILE, one "
+             "pair per line (- reads them from stdin)")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="read the input in chunks instead of loading it whole")
+    parser.add_argument(
+        "--mmap", action="store_true",
+        help="memory map the input and tokenize its raw bytes")
+    parser.add_argument(
+        "--check", action="store_true",
+        help="only check that the files parse, write no output")
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="write the XML without indentation")
+    parser.add_argument(
+        "--binary", action="store_true",
+        help="write a binary parse tree (<name>{}) instead of XML, see "
+             "BinaryTree.py".format(BINARY_SUFFIX))
+    parser.add_argument(
+        "--fold", action="store_true",
+        help="write constant expressions as their value, like --vm "
+             "compiles them (implies --tree)")
+    parser.add_argument(
+        "--vm", action="store_true",
+        help="compile into VM code (<name>{}) instead of writing "
+             "XML".format(VM_SUFFIX))
+    parser.add_argument(
+        "--archive", metavar="PATH",
+        help="write all the outputs into one archive instead of one file "
+             "each: .zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz, or .gz "
+             "for a single gzip stream")
+    parser.add_argument(
+        "--table", action="store_true",
+        help="parse with the table driven LL(1) engine (TableEngine.py), "
+             "the output is the same")
+    parser.add_argument(
+        "--tree", action="store_true",
+        help="build a syntax tree first and write the XML from it")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only parse the subroutines and declarations that changed "
+             "since the last run, the state is kept in {}".format(
+                 INCREMENTAL_STATE))
+    parser.add_argument(
+        "--verify", metavar="REFDIR",
+        help="compare every XML output with REFDIR/<name>.xml as "
+             "whitespace-separated words, and report every difference")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=0, metavar="N",
+        help="analyze the files in N processes (default: number of cores)")
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="read ahead and write behind the parsing, for slow volumes")
+    parser.add_argument(
+        "--queue-size", type=int, default=QUEUE_SIZE, metavar="N",
+        help="how many files --pipeline holds between its stages "
+             "(default: {})".format(QUEUE_SIZE))
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="skip files whose source did not change since the last run")
+    parser.add_argument(
+        "--cache-stats", action="store_true",
+        help="print how many files were found in the cache")
+    parser.add_argument(
+        "--clear-cache", action="store_true",
+        help="forget all cached outputs before running")
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print timers and counters for every file and in total")
+    parser.add_argument(
+        "--stats-format", choices=["text", "json"], default="text",
+        help="how --stats are printed (default: text)")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true",
+        help="report every analyzed file (and with --incremental, the "
+             "members that were parsed again)")
+    try:
+        args = parser.parse_args(argv)
+        if jobs is not None:
+            args.jobs = jobs
+        if (args.input_path is None) == (args.manifest is None):
+            parser.error("give either an input path or --manifest")
+        if args.archive and args.cache:
+            parser.error("--cache cannot be used with --archive")
+        if args.vm and args.binary:
+            parser.error("--vm and --binary are different outputs")
+        if args.incremental and any(
+                (args.binary, args.vm, args.tree, args.fold, args.table,
+                 args.archive, args.check)):
+            parser.error("--incremental only writes XML files, it cannot be "
+                         "used with --binary, --vm, --tree, --fold, --table, "
+                         "--archive or --check")
+        if args.verify and any(
+                (args.binary, args.vm, args.archive, args.check,
+                 args.input_path == "-")):
+            parser.error("--verify compares XML files, it cannot be used "
+                         "with --binary, --vm, --archive, --check or -")
+        output_suffix = VM_SUFFIX if args.vm \
+            else BINARY_SUFFIX if args.binary else XML_SUFFIX
+        if args.manifest == "-":
+            paths_to_analyze = read_manifest(stdin, cwd, output_suffix)
+        elif args.manifest:
+            with open(os.path.join(cwd, args.manifest), 'r') as manifest:
+                paths_to_analyze = read_manifest(manifest, cwd, output_suffix)
+    except (OSError, ValueError) as error:
+        print("JackAnalyzer: --manifest: {}".format(error), file=stderr)
+        return 2
+    except AnalyzerExit as exit_request:
+        return exit_request.status
+    if args.input_path == "-":
+        return analyze_stdin(args, stdin, stdout, stderr)
+    if args.manifest:
+        # the cache of a batch is kept next to its manifest file
+        argument_path = cwd if args.manifest == "-" else os.path.dirname(
+            os.path.abspath(os.path.join(cwd, args.manifest)))
     else:
-        files_to_assemble = [argument_path]
-    for input_path in files_to_assemble:
-        filename, extension = os.path.splitext(input_path)
-        if extension.lower() != ".jack":
+        argument_path = os.path.abspath(os.path.join(cwd, args.input_path))
+        if os.path.isdir(argument_path):
+            files_to_assemble = [
+                os.path.join(argument_path, filename)
+                for filename in sorted(os.listdir(argument_path))]
+        else:
+            files_to_assemble = [argument_path]
+        paths_to_analyze = []
+        for input_path in files_to_assemble:
+            filename, extension = os.path.splitext(input_path)
+            if extension.lower() != ".jack":
+                continue
+            paths_to_analyze.append((input_path, filename + output_suffix))
+    # the cache manifest lives in the directory of the outputs
+    cache = None
+    if args.cache or args.clear_cache:
+        cache = BuildCache(argument_path if os.path.isdir(argument_path)
+                           else os.path.dirname(argument_path))
+        if args.clear_cache:
+            cache.clear()
+    cache_keys = {}
+    # the outputs the cache skips are verified as well
+    outputs_to_verify = paths_to_analyze
+    if args.cache and not args.check:
+        output_options = [
+            option for option in ("compact", "binary", "fold", "vm")
+            if getattr(args, option)]
+        uncached_paths = []
+        for input_path, output_path in paths_to_analyze:
+            key = cache.key(input_path, output_options)
+            if not cache.is_fresh(output_path, key):
+                cache_keys[output_path] = key
+                uncached_paths.append((input_path, output_path))
+        paths_to_analyze = uncached_paths
+    incremental = None
+    if args.incremental:
+        # like the cache, the state lives in the directory of the outputs
+        incremental = IncrementalParser(
+            argument_path if os.path.isdir(argument_path)
+            else os.path.dirname(argument_path))
+    archive = None
+    if args.archive and not args.check:
+        # entries are named like the output files would be, relative to the
+        # directory they would be written to
+        try:
+            archive = OutputArchive(
+                os.path.join(cwd, args.archive),
+                argument_path if os.path.isdir(argument_path)
+                else os.path.dirname(argument_path))
+        except (OSError, ValueError) as error:
+            print("JackAnalyzer: --archive: {}".format(error), file=stderr)
+            return 2
+        paths_to_analyze = [(input_path, archive.entry_name(output_path))
+                            for input_path, output_path in paths_to_analyze]
+    try:
+        results = analyze_paths(paths_to_analyze, args, archive, incremental)
+    finally:
+        if archive is not None:
+            archive.close()
+        if incremental is not None:
+            incremental.save()
+    # errors are reported in the (sorted) order of the files, not in the
+    # order the processes happened to finish them
+    failed = False
+    run_stats = RunStats()
+    for (input_path, output_path), (error, file_stats) in zip(
+            paths_to_analyze, results):
+        if file_stats is not None:
+            run_stats.add(file_stats)
+        if args.check:
+            print("{}: {}".format(
+                input_path, "ok" if error is None else "FAILED, " + error),
+                file=stdout)
+            failed = failed or error is not None
             continue
-        output_path = filename + "test.xml"
-        with open(input_path, 'r') as input_file, \
-                open(output_path, 'w') as output_file:
-            analyze_file(input_file, output_file)
+        if args.verbose and error is None:
+            print("{} -> {}".format(input_path, output_path), file=stderr)
+        if error is not None:
+            failed = True
+            print("{}: {}".format(input_path, error), file=stderr)
+            if args.cache:
+                cache.forget(output_path)
+        elif args.cache:
+            cache.record(output_path, cache_keys[output_path])
+    if args.verify:
+        failed_outputs = {
+            output_path for (_, output_path), (error, _) in zip(
+                paths_to_analyze, results) if error is not None}
+        reference_dir = os.path.join(cwd, args.verify)
+        reports = verify_files(
+            [(reference_path(reference_dir, input_path), output_path)
+             for input_path, output_path in outputs_to_verify
+             if output_path not in failed_outputs],
+            args.jobs or os.cpu_count() or 1)
+        for report in reports:
+            for line in report:
+                print(line, file=stdout)
+        differ = sum(1 for report in reports if report)
+        print("verified {} files, {} differ".format(len(reports), differ),
+              file=stdout)
+        failed = failed or differ > 0
+    if args.cache and not args.check:
+        cache.save()
+        if args.cache_stats:
+            print(cache.stats(), file=stdout)
+    if args.stats and args.stats_format == "json":
+        print(run_stats.format_json(), file=stdout)
+    elif args.stats:
+        print(run_stats.format_text(), file=stdout)
+    return 1 if failed else 0
+
+
+if "__main__" == __name__:
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import json
+import os
+import socket
+import sys
+import typing
+
+# this module is what runs for every call when a JackServer is up, so it
+# only imports what it needs to talk to the server
+
+
+def default_socket_path() -> str:
+    """$JACK_ANALYZER_SOCKET, or a per user socket in the temp directory."""
+    return os.environ.get("JACK_ANALYZER_SOCKET") or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"),
+        "jackanalyzer-{}.sock".format(os.getuid()))
+
+
+class JackClient:
+    """Sends requests to a JackServer over its Unix domain socket.
+
+    Every request and every response is one line of json.
+    """
+
+    def __init__(self, socket_path: str = None) -> None:
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path or default_socket_path())
+        self.responses = self.socket.makefile('rb')
+
+    def request(self, **request) -> typing.Dict:
+        self.socket.sendall(json.dumps(request).encode() + b"\n")
+        line = self.responses.readline()
+        if not line:
+            raise ConnectionError("the server closed the connection")
+        return json.loads(line)
+
+    def run(self, argv: typing.List[str], cwd: str = None,
+            stdin: str = "") -> typing.Dict:
+        """Runs JackAnalyzer with argv in the server, relative paths are
+        relative to cwd (the current directory by default), and stdin is
+        what the analyzer reads for "-"."""
+        return self.request(
+            op="run", argv=argv, cwd=cwd or os.getcwd(), stdin=stdin)
+
+    def analyze_source(self, source: str, compact: bool = False) -> str:
+        response = self.request(
+            op="analyze_source", source=source, compact=compact)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["xml"]
+
+    def check_source(self, source: str) -> typing.Optional[str]:
+        """None if the source parses, else the syntax error."""
+        response = self.request(op="check_source", source=source)
+        if not response["ok"] and "syntax_error" not in response:
+            raise RuntimeError(response["error"])
+        return response.get("syntax_error")
+
+    def close(self) -> None:
+        self.responses.close()
+        self.socket.close()
+
+
+if "__main__" == __name__:
+    # JackClient <analyzer arguments>: like JackAnalyzer, but the work is
+    # done by the warm server. Without a server it falls back to running
+    # the analyzer in this process.
+    try:
+        client = JackClient()
+    except OSError:
+        import JackAnalyzer
+        sys.exit(JackAnalyzer.main())
+    # the server cannot read our stdin, so it is sent along when needed
+    result = client.run(
+        sys.argv[1:], stdin=sys.stdin.read() if "-" in sys.argv else "")
+    client.close()
+    if not result["ok"]:
+        sys.exit("JackServer: " + result["error"])
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    sys.exit(result["status"])
@@ -0,0 +1,215 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+
+# the Jack grammar of the JackTokenizer docstring, written out so that a
+# program can read it, and factored so that one token always decides which
+# alternative to take (LL(1)):
+# - 'x' is a token that appears verbatim, identifier, integerConstant and
+#   stringConstant are any token of that type, EMPTY is the empty
+#   alternative, and alternatives are separated by a bare |
+# - x* and x? are spelled out as rules of their own, and the three kinds of
+#   term that start with a name share the name and differ in the token
+#   after it (_afterName)
+# - a rule writes a tag of its name around what it matched, unless its name
+#   starts with _
+# - the first rule is where parsing starts, a line that starts with
+#   whitespace continues the rule above it
+GRAMMAR = """
+_file: class | subroutineDec
+class: 'class' identifier '{' _classVarDecs _subroutineDecs '}'
+_classVarDecs: classVarDec _classVarDecs | EMPTY
+classVarDec: _fieldKind _type identifier _moreNames ';'
+_fieldKind: 'static' | 'field'
+_type: 'int' | 'char' | 'boolean' | identifier
+_moreNames: ',' identifier _moreNames | EMPTY
+_subroutineDecs: subroutineDec _subroutineDecs | EMPTY
+subroutineDec: _subroutineKind _returnType identifier
+    '(' parameterList ')' subroutineBody
+_subroutineKind: 'constructor' | 'function' | 'method'
+_returnType: 'void' | _type
+parameterList: _type identifier _moreParameters | EMPTY
+_moreParameters: ',' _type identifier _moreParameters | EMPTY
+subroutineBody: '{' _varDecs statements '}'
+_varDecs: varDec _varDecs | EMPTY
+varDec: 'var' _type identifier _moreNames ';'
+
+statements: _statements
+_statements: _statement _statements | EMPTY
+_statement: letStatement | ifStatement | whileStatement | doStatement
+    | returnStatement
+letStatement: 'let' identifier _index '=' expression ';'
+_index: '[' expression ']' | EMPTY
+ifStatement: 'if' '(' expression ')' '{' statements '}' _else
+_else: 'else' '{' statements '}' | EMPTY
+whileStatement: 'while' '(' expression ')' '{' statements '}'
+doStatement: 'do' identifier _call ';'
+returnStatement: 'return' _returnValue ';'
+_returnValue: expression | EMPTY
+
+expression: term _operations
+_operations: _op term _operations | EMPTY
+_op: '+' | '-' | '*' | '/' | '&' | '|' | '<' | '>' | '='
+term: integerConstant | stringConstant | _keywordConstant
+    | identifier _afterName | '(' expression ')' | _unaryOp term
+_keywordConstant: 'true' | 'false' | 'null' | 'this'
+_unaryOp: '-' | '~' | '^' | '#'
+_afterName: '[' expression ']' | _call | EMPTY
+_call: '(' expressionList ')' | '.' identifier '(' expressionList ')'
+expressionList: expression _moreExpressions | EMPTY
+_moreExpressions: ',' expression _moreExpressions | EMPTY
+"""
+# the terminals that stand for any token of a type
+TOKEN_TYPES = ("identifier", "integerConstant", "stringConstant")
+EMPTY = "EMPTY"
+# the lookahead after the last token
+END = "$end"
+
+SYMBOL_REGEX = re.compile(r"'[^']*'|\S+")
+
+
+class GrammarError(Exception):
+    """Raised when a grammar cannot be read, or is not LL(1)."""
+    pass
+
+
+def is_terminal(symbol: str) -> bool:
+    return symbol[0] == "'" or symbol in TOKEN_TYPES
+
+
+def terminal_key(symbol: str) -> str:
+    """The lookahead a terminal matches: the text of a verbatim token, or
+    a token type."""
+    return symbol[1:-1] if symbol[0] == "'" else symbol
+
+
+def parse_grammar(text: str) -> typing.Dict[str, typing.List[typing.List[str]]]:
+    """Reads a grammar written like GRAMMAR.
+
+    Returns:
+        typing.Dict[str, typing.List[typing.List[str]]]: the alternatives of
+        every rule, in the order of the text, an alternative is a list of
+        symbols (an empty list for EMPTY).
+    """
+    lines = []
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if line[0].isspace():
+            if not lines:
+                raise GrammarError("the grammar starts with a continuation")
+            lines[-1] += " " + line.strip()
+        else:
+            lines.append(line.strip())
+    rules = {}
+    for line in lines:
+        name, colon, body = line.partition(":")
+        name = name.strip()
+        if not colon or not name or name in rules:
+            raise GrammarError("bad or repeated rule: {!r}".format(line))
+        alternatives = [[]]
+        for symbol in SYMBOL_REGEX.findall(body):
+            if symbol == "|":
+                alternatives.append([])
+            elif symbol != EMPTY:
+                alternatives[-1].append(symbol)
+        rules[name] = alternatives
+    for name, alternatives in rules.items():
+        for alternative in alternatives:
+            for symbol in alternative:
+                if not is_terminal(symbol) and symbol not in rules:
+                    raise GrammarError("{} uses the undefined rule {}".format(
+                        name, symbol))
+    return rules
+
+
+def sequence_first(symbols: typing.List[str],
+                   first: typing.Dict[str, typing.Set[str]]) -> typing.Set[str]:
+    """The lookaheads a sequence of symbols can start with, with EMPTY in
+    the set when the whole sequence can match nothing."""
+    result = set()
+    for symbol in symbols:
+        if is_terminal(symbol):
+            result.add(terminal_key(symbol))
+            return result
+        result |= first[symbol] - {EMPTY}
+        if EMPTY not in first[symbol]:
+            return result
+    result.add(EMPTY)
+    return result
+
+
+def first_sets(rules: typing.Dict[str, typing.List[typing.List[str]]]
+               ) -> typing.Dict[str, typing.Set[str]]:
+    """The FIRST set of every rule, computed until nothing changes."""
+    first = {name: set() for name in rules}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in rules.items():
+            for alternative in alternatives:
+                new = sequence_first(alternative, first) - first[name]
+                if new:
+                    first[name] |= new
+                    changed = True
+    return first
+
+
+def follow_sets(rules: typing.Dict[str, typing.List[typing.List[str]]],
+                first: typing.Dict[str, typing.Set[str]]
+                ) -> typing.Dict[str, typing.Set[str]]:
+    """The FOLLOW set of every rule: the lookaheads that can come right
+    after it, END after the first rule."""
+    follow = {name: set() for name in rules}
+    follow[next(iter(rules))].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in rules.items():
+            for alternative in alternatives:
+                for i, symbol in enumerate(alternative):
+                    if is_terminal(symbol):
+                        continue
+                    rest = sequence_first(alternative[i + 1:], first)
+                    new = rest - {EMPTY}
+                    if EMPTY in rest:
+                        new |= follow[name]
+                    new -= follow[symbol]
+                    if new:
+                        follow[symbol] |= new
+                        changed = True
+    return follow
+
+
+def build_table(rules: typing.Dict[str, typing.List[typing.List[str]]]
+                ) -> typing.Dict[str, typing.Dict[str, int]]:
+    """Builds the LL(1) parse table of a grammar.
+
+    Returns:
+        typing.Dict[str, typing.Dict[str, int]]: for every rule, the index
+        of the alternative to take for every lookahead that can start it.
+
+    Raises:
+        GrammarError: if two alternatives of a rule can start with the same
+        lookahead, one token cannot decide between them.
+    """
+    first = first_sets(rules)
+    follow = follow_sets(rules, first)
+    table = {}
+    for name, alternatives in rules.items():
+        row = table[name] = {}
+        for index, alternative in enumerate(alternatives):
+            lookaheads = sequence_first(alternative, first)
+            if EMPTY in lookaheads:
+                lookaheads = (lookaheads - {EMPTY}) | follow[name]
+            for lookahead in lookaheads:
+                if row.setdefault(lookahead, index) != index:
+                    raise GrammarError(
+                        "{} is not LL(1): {!r} starts two alternatives".format(
+                            name, lookahead))
+    return table
@@ -0,0 +1,134 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import typing
+
+import JackAnalyzer
+import JackAPI
+from JackClient import default_socket_path
+
+
+class JackRequestHandler(socketserver.StreamRequestHandler):
+    """Answers the json requests of one connection, one line each:
+    {"op": "run", "argv": [...], "cwd": ..., "stdin": ...}: runs
+    JackAnalyzer.main in this process, returns its "status", "stdout" and
+    "stderr".
+    {"op": "analyze_source", "source": ..., "compact": false}: returns the
+    "xml" of the source.
+    {"op": "check_source", "source": ...}: returns the "syntax_error" of the
+    source, null if it parses.
+    {"op": "ping"} and {"op": "shutdown"}.
+    Every response has "ok", and "error" when the request failed.
+    """
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.answer(json.loads(line))
+                response.setdefault("ok", True)
+            except Exception as error:
+                response = {"ok": False, "error": "{}: {}".format(
+                    type(error).__name__, error)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+    def answer(self, request: typing.Dict) -> typing.Dict:
+        op = request.get("op")
+        if op == "run":
+            # in this warm process and with one job: a pool of processes
+            # per request would cost more than the server saves, and the
+            # requests of many connections would each start one
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            status = JackAnalyzer.main(
+                request["argv"], request.get("cwd"), stdout, stderr,
+                io.StringIO(request.get("stdin", "")), jobs=1)
+            return {"status": status, "stdout": stdout.getvalue(),
+                    "stderr": stderr.getvalue()}
+        # the connections are served by threads, the pooled sessions of
+        # JackAPI are shared between them
+        if op == "analyze_source":
+            return {"xml": JackAPI.analyze_source(
+                request["source"], request.get("compact", False))}
+        if op == "check_source":
+            error = JackAPI.check_source(request["source"])
+            return {"ok": error is None, "syntax_error": error}
+        if op == "ping":
+            return {"pid": os.getpid()}
+        if op == "shutdown":
+            # shutdown() waits for serve_forever, which waits for us
+            threading.Thread(target=self.server.shutdown).start()
+            return {}
+        raise ValueError("unknown op {!r}".format(op))
+
+
+def server_answers(socket_path: str) -> bool:
+    """Whether something accepts connections on the socket at socket_path."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        # refused: the process that bound it is gone
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class JackServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A warm analyzer process listening on a Unix domain socket, so that
+    every call pays for a connection instead of starting python."""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str) -> None:
+        """Listens on socket_path. A socket left there by a server that did
+        not shut down cleanly is replaced, but anything else at that path,
+        or a server that still answers on it, is an error.
+
+        Raises:
+            FileExistsError: socket_path is not a socket, or a live server
+                listens on it.
+        """
+        if os.path.lexists(socket_path):
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise FileExistsError(
+                    "{} exists and is not a socket".format(socket_path))
+            if server_answers(socket_path):
+                raise FileExistsError(
+                    "a server already listens on {}".format(socket_path))
+            os.remove(socket_path)
+        super().__init__(socket_path, JackRequestHandler)
+        self.socket_path = socket_path
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+if "__main__" == __name__:
+    # JackServer [socket path]: serves until interrupted or asked to shut
+    # down, use JackClient (or JACK_ANALYZER_SOCKET with the JackAnalyzer
+    # script) to send it work
+    path = sys.argv[1] if len(sys.argv) > 1 else default_socket_path()
+    try:
+        server = JackServer(path)
+    except FileExistsError as error:
+        sys.exit("JackServer: {}".format(error))
+    with server:
+        print("JackServer listening on {}".format(path), file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -4,8 +4,80 @@ https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
 and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
 Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import collections
+import contextlib
+import mmap
+import re
+import sys
 import typing
 
+# one alternation over the whole source, the order matters:
+# comments and whitespace are skipped (not captured), then the token kinds.
+# a block comment that is never closed runs until the end of the input
+TOKEN_REGEX = re.compile(r"""
+    (?:\s+|//[^\n]*|/\*.*?(?:\*/|\Z))
+    |("[^"\n]*"?
+    |\d+
+    |[A-Za-z_]\w*
+    |[{}()\[\].,;+\-*/&|<>=~^#]
+    |\S)
+""", re.DOTALL | re.VERBOSE)
+KEYWORD_TYPE = 'keyword'
+SYMBOL_TYPE = 'symbol'
+IDENTIFIER_TYPE = 'identifier'
+INT_CONST_TYPE = 'integerConstant'
+STRING_CONST_TYPE = 'stringConstant'
+# how many characters the streaming tokenizer reads from the input at a time
+CHUNK_SIZE = 64 * 1024
+# how far ahead peek() can look, the streaming tokenizer keeps this many
+# upcoming tokens in a ring buffer
+MAX_LOOKAHEAD = 4
+
+
+def stream_tokens(input_stream: typing.TextIO,
+                  chunk_size: int = CHUNK_SIZE) -> typing.Iterator[str]:
+    """Lazily breaks the input stream into tokens, reading it chunk by chunk.
+
+    Args:
+        input_stream (typing.TextIO): input stream.
+        chunk_size (int): how many characters to read at a time.
+
+    Yields:
+        str: the tokens of the input, in order.
+    """
+    buffer = ''
+    while True:
+        chunk = input_stream.read(chunk_size)
+        last_chunk = not chunk
+        buffer += chunk
+        position = 0
+        for match in TOKEN_REGEX.finditer(buffer):
+            # a match that touches the end of the buffer might continue in
+            # the next chunk (a longer name, an unclosed comment or string),
+            # so we keep it and scan it again once more input arrived
+            if not last_chunk and match.end() == len(buffer):
+                break
+            position = match.end()
+            token = match.group(1)
+            if token:
+                yield token
+        buffer = buffer[position:]
+        if last_chunk:
+            return
+
+
+class JackSyntaxError(Exception):
+    """Raised when the input is not valid Jack, by a strict
+    CompilationEngine or a checking writer."""
+    pass
+
+
+def string_text(token: str) -> str:
+    """The text of a stringConstant token, without its double quotes. An
+    unterminated string (outside of strict mode) only has the first one."""
+    return token[1:-1] if len(token) > 1 and token[-1] == '"' else token[1:]
+
 
 class JackTokenizer:
     """Removes all comments from the input stream and breaks it
@@ -84,113 +156,81 @@ class JackTokenizer:
     """
     KEYWORDS = [
         'class','constructor','function','method','field','static','var','int','char','boolean','void','true','false','null','this','let','do','if','else','while','return' ]
-    SYMBOL = ['{','}' , '(',')','[',']','.',',',';','+','-','*','/','&','|','<','>','=','~']
-    def __init__(self, input_stream: typing.TextIO) -> None:
+    SYMBOL = ['{','}' , '(',')','[',']','.',',',';','+','-','*','/','&','|','<','>','=','~','^','#']
+    # one dict lookup classifies keywords and symbols, see classify()
+    TOKEN_TYPES = {**dict.fromkeys(KEYWORDS, KEYWORD_TYPE),
+                   **dict.fromkeys(SYMBOL, SYMBOL_TYPE)}
+
+    def __init__(self, input_stream: typing.TextIO,
+                 streaming: bool = False) -> None:
         """Opens the input stream and gets ready to tokenize it.
 
         Args:
             input_stream (typing.TextIO): input stream.
+            streaming (bool): if True, tokens are read from the input on
+            demand instead of tokenizing the whole input up front.
         """
-        # Your code goes here!
-        # A good place to start is:
-        self.input_lines = input_stream.read().splitlines()
-        self.tokens= []
-        for line in self.input_lines:
-            new_line = self.remove_comments(line)
-            if len(new_line) == 0:
-                pass
-            else:
-                sup_line =  self.split_line(new_line)
-                sup_line = self.clear_line(sup_line)
-                for word in sup_line:
-                    if self.there_is_symbol(word):
-                        if len(word) == 1:
-                            self.tokens.append(word)
-                        else:
-                            split_word = self.split_word(word)
-                            for i in split_word:
-                                self.tokens.append(i)
-                    else:
-                        self.tokens.append(word)
-        print(self.tokens)
-        self.current_token_index = 0
-        self.current_token = self.tokens[0]
-        self.out_put = []
-
-
+        self.reset(input_stream, streaming)
 
+    def reset(self, input_stream: typing.TextIO,
+              streaming: bool = False) -> None:
+        """Starts over on another input, like a new tokenizer would, so that
+        a pooled tokenizer can be reused (see JackAPI).
 
-    def split_line(self,line):
-        split_line = []
-        flag_string = False
-        flag_end = False
-        if '"' in line:
-            word = ''
-            for l in line:
-                # print(l)
-                if l == '"':
-
-                    if flag_string is True:
-                        flag_end = True
-                        word += l
-                    split_line.append(word)
-                    word = ''
-                    flag_string = True
-                if l == ' ' and flag_string is False:
-                    split_line.append(word)
-                    word = ''
-                else:
-                    word += l
-                    if l == '"' and flag_end:
-                        flag_string = False
-                        flag_end = False
-                        word=''
-            split_line.append(word)
-
-            if split_line[0][:1] == '\t':
-                split_line[0] = split_line[0][1:]
-
-            return split_line
-        else:
-            return line.split()
-
-
-
-
-    def split_word(self,sentens):
-        split_words = []
-        word = ''
-        for i in sentens:
-            if i in self.SYMBOL:
-                if word != '':
-                    split_words.append(word)
-                split_words.append(i)
-                word = ''
-            else:
-                word += i
-        if word!='':
-            split_words.append(word)
-        return split_words
-    def there_is_symbol(self,word):
-
-        for sym in self.SYMBOL:
-            if sym in word:
-                return True
-        else:
-            return False
+        Args:
+            input_stream (typing.TextIO): input stream.
+            streaming (bool): tokenize the input lazily, in chunks.
+        """
+        self.streaming = streaming
+        self.current_token_index = 0
+        self.out_put = []
+        if streaming:
+            # no token list is kept, advance() pulls the next token
+            self.tokens = None
+            self.token_types = None
+            self.token_stream = stream_tokens(input_stream)
+            # (token, type) pairs that peek() already pulled from the stream
+            self.lookahead = collections.deque(maxlen=MAX_LOOKAHEAD)
+            self.current_token = next(self.token_stream, None)
+            self.stream_ended = self.current_token is None
+            if self.stream_ended:
+                self.current_token = ''
+            self.current_type = self.classify(self.current_token)
+            return
+        # the whole buffer is scanned once by TOKEN_REGEX, comments and
+        # whitespace match the non capturing alternatives so findall gives ''
+        self.set_tokens(TOKEN_REGEX.findall(input_stream.read()))
+
+    def set_tokens(self, found: typing.List[str]) -> None:
+        """Fills the token table from what findall found, '' for the
+        whitespace and comments between tokens, and makes the first token
+        current."""
+        # the token table is two parallel lists: the (interned) text of every
+        # token and its type, which is computed here once and never again
+        self.tokens = [sys.intern(token) for token in found if token]
+        self.token_types = [self.classify(token) for token in self.tokens]
+        self.current_token = self.tokens[0] if self.tokens else ''
+        self.current_type = self.token_types[0] if self.tokens else None
+
+    def classify(self, token: str) -> str:
+        """
+        Args:
+            token (str): the text of a token.
 
-    def remove_comments(self, line):
-        new_line = ''
-        if len(line) == 1:
-            return line
-        for i in range(len(line)-1):
-            if line[i]+line[i+1] == '//' or line[i]+line[i+1] == '/*':
-                break
-            new_line += line[i]
-        if new_line != '':
-            new_line+= line[-1]
+        Returns:
+            str: the type of the token, as returned by token_type().
+        """
+        token_type = self.TOKEN_TYPES.get(token)
+        if token_type is not None:
+            return token_type
+        if not token:
+            return None
+        if token[0].isdigit():
+            return INT_CONST_TYPE
+        if token[0] == '"':
+            return STRING_CONST_TYPE
+        return IDENTIFIER_TYPE
 
-        return new_line
     def has_more_tokens(self) -> bool:
         """Do we have more tokens in the input?
 
@@ -198,6 +238,8 @@ class JackTokenizer:
             bool: True if there are more tokens, False otherwise.
         """
         # Your code goes here!
+        if self.streaming:
+            return not self.stream_ended
         if self.current_token_index >= len(self.tokens):
             return False
         return True
@@ -210,8 +252,58 @@ class JackTokenizer:
         # Your code goes here!
         if self.has_more_tokens():
             self.current_token_index+=1
-            if self.current_token_index < len(self.tokens):
+            if self.streaming:
+                # like the list version, the last token stays current
+                if self.lookahead:
+                    self.current_token, self.current_type = \
+                        self.lookahead.popleft()
+                    return
+                next_token = next(self.token_stream, None)
+                if next_token is None:
+                    self.stream_ended = True
+                else:
+                    self.current_token = next_token
+                    self.current_type = self.classify(next_token)
+            elif self.current_token_index < len(self.tokens):
                 self.current_token = self.tokens[self.current_token_index]
+                self.current_type = self.token_types[self.current_token_index]
+
+    def peek_entry(self, k: int) -> typing.Tuple[str, str]:
+        """The (token, type) k tokens after the current one, ('', None)
+        past the end of the input."""
+        if not 0 < k <= MAX_LOOKAHEAD:
+            raise ValueError("can only peek 1 to {} tokens ahead".format(
+                MAX_LOOKAHEAD))
+        if self.streaming:
+            if self.stream_ended:
+                return '', None
+            # only pulls the tokens that were not pulled by an earlier peek
+            while len(self.lookahead) < k:
+                next_token = next(self.token_stream, None)
+                if next_token is None:
+                    return '', None
+                self.lookahead.append((next_token, self.classify(next_token)))
+            return self.lookahead[k - 1]
+        index = self.current_token_index + k
+        if index < len(self.tokens):
+            return self.tokens[index], self.token_types[index]
+        return '', None
+
+    def peek(self, k: int = 1) -> str:
+        """Looks at an upcoming token without advancing to it.
+
+        Args:
+            k (int): 1 is the token after the current one, up to
+            MAX_LOOKAHEAD.
+
+        Returns:
+            str: the token, or '' if the input ends before it.
+        """
+        return self.peek_entry(k)[0]
+
+    def peek_type(self, k: int = 1) -> str:
+        """The type of peek(k), None if the input ends before it."""
+        return self.peek_entry(k)[1]
 
     def token_type(self) -> str:
         """
@@ -220,22 +312,8 @@ class JackTokenizer:
             "KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST"
         """
         # Your code goes here!
-        if self.current_token in self.KEYWORDS:
-            return 'keyword'
-
-        elif self.current_token in self.SYMBOL:
-            return "symbol"
-
-        elif self.current_token.isnumeric() :
-            if 0 <= int(self.current_token) <= 32767:
-                return 'integerConstant'
-
-
-        elif '"' in self.current_token:
-
-            return 'stringConstant'
-        else:
-             return 'identifier'
+        # classified once when the token was read, see classify()
+        return self.current_type
 
 
     def keyword(self) -> str:
@@ -248,7 +326,7 @@ class JackTokenizer:
             "IF", "ELSE", "WHILE", "RETURN", "TRUE", "FALSE", "NULL", "THIS"
         """
         # Your code goes here!
-        if self.token_type() == 'keyword':
+        if self.current_type == KEYWORD_TYPE:
             return self.current_token
 
     def symbol(self) -> str:
@@ -258,7 +336,7 @@ class JackTokenizer:
             Should be called only when token_type() is "SYMBOL".
         """
         # Your code goes here!
-        if self.token_type() == 'symbol':
+        if self.current_type == SYMBOL_TYPE:
             return  self.current_token
 
 
@@ -270,7 +348,7 @@ class JackTokenizer:
         """
 
         # Your code goes here!
-        if self.token_type() == 'identifier':
+        if self.current_type == IDENTIFIER_TYPE:
             return self.current_token
 
 
@@ -281,7 +359,7 @@ class JackTokenizer:
             Should be called only when token_type() is "INT_CONST".
         """
         # Your code goes here!
-        if self.token_type() == 'integerConstant':
+        if self.current_type == INT_CONST_TYPE:
             return int(self.current_token)
 
 
@@ -292,20 +370,112 @@ class JackTokenizer:
             quotes. Should be called only when token_type() is "STRING_CONST".
         """
         # Your code goes here!
-        if self.token_type() == 'stringConstant':
-            return self.current_token
+        if self.current_type == STRING_CONST_TYPE:
+            return string_text(self.current_token)
+
 
-    def clear_line(self, sup_line):
-        new_line = []
-        for l in sup_line:
-            if l!='':
-                new_line.append(l)
-        return new_line
 
+class MappedJackTokenizer(JackTokenizer):
+    """A JackTokenizer over a bytes-like buffer, usually a memory mapped
+    file, that gives the tokens of a JackTokenizer over its text.
 
-if __name__ =='__main__':
-    input_file = open('Main.jack', 'r')
-    j=JackTokenizer(input_file)
-    while j.has_more_tokens():
-        print('<'+j.token_type()+'> '+j.current_token+' </'+j.token_type()+'>')
-        j.advance()
+    The buffer is decoded whole, in one C call, and scanned by TOKEN_REGEX.
+    A bytes pattern cannot scan it in place: it only knows ASCII, so a
+    no-break space is not \\s and "é" is not \\w in it. Decoding every token
+    on its own was also slower than decoding the buffer once.
+    """
+
+    def __init__(self, source: typing.Union[bytes, mmap.mmap],
+                 encoding: str = 'utf-8') -> None:
+        """
+        Args:
+            source: the raw bytes of the input, e.g. an mmap.mmap.
+            encoding (str): the encoding of the input.
+        """
+        self.source = source
+        self.encoding = encoding
+        self.streaming = False
+        self.current_token_index = 0
+        self.out_put = []
+        # where every token starts in the buffer, see token_view()
+        self.token_offsets = None
+        try:
+            self.text = str(source, encoding)
+        except UnicodeDecodeError as error:
+            # a byte that is not valid in the encoding, report it like any
+            # other problem with the input instead of crashing the run
+            raise JackSyntaxError("cannot decode byte {}: {}".format(
+                error.start, error.reason))
+        self.set_tokens(TOKEN_REGEX.findall(self.text))
+
+    def token_view(self, index: int) -> memoryview:
+        """The bytes of a token in the buffer, without copying them. The
+        offsets of the tokens are only found on the first call."""
+        if self.token_offsets is None:
+            self.token_offsets = []
+            # the text and the buffer are walked together, the offset in
+            # the buffer grows by the encoded length of the text passed
+            position = 0
+            offset = 0
+            for match in TOKEN_REGEX.finditer(self.text):
+                if match.group(1):
+                    offset += len(self.text[position:match.start()].encode(
+                        self.encoding))
+                    position = match.start()
+                    self.token_offsets.append(offset)
+        offset = self.token_offsets[index]
+        return memoryview(self.source)[
+            offset:offset + len(self.tokens[index].encode(self.encoding))]
+
+
+def main(argv: typing.List[str] = None) -> int:
+    """Writes the tokens of every given file (of stdin without one) to
+    stdout, in the format of the <name>T.xml files of the course.
+
+    Returns:
+        int: 1 if a file could not be read or tokenized, else 0.
+    """
+    # XmlWriter imports this module, so it is only imported here
+    from XmlWriter import NullWriter, XmlWriter
+    parser = argparse.ArgumentParser(
+        prog="python3 JackTokenizer.py",
+        description="Print the tokens of Jack files like the course's "
+                    "<name>T.xml files.")
+    parser.add_argument("files", nargs="*", metavar="file.jack",
+                        help="the files to tokenize, - or none for stdin")
+    args = parser.parse_args(argv)
+    writer = XmlWriter(sys.stdout, compact=True)
+    checker = NullWriter()
+    status = 0
+    for path in args.files or ["-"]:
+        try:
+            with open(path, 'r') if path != "-" \
+                    else contextlib.nullcontext(sys.stdin) as input_file:
+                tokenizer = JackTokenizer(input_file)
+            terminals = []
+            while tokenizer.has_more_tokens():
+                if tokenizer.token_type() == INT_CONST_TYPE:
+                    terminal = (INT_CONST_TYPE, tokenizer.int_val())
+                else:
+                    terminal = (tokenizer.token_type(),
+                                tokenizer.current_token)
+                # the tokenizer takes anything, the checks of the analyzer
+                # are in the NullWriter; nothing is written before they pass
+                checker.terminal(*terminal, 1)
+                terminals.append(terminal)
+                tokenizer.advance()
+            writer.open_tag("tokens", 0)
+            for label, name in terminals:
+                writer.terminal(label, name, 1)
+            # closing the outermost tag writes the tokens out
+            writer.close_tag("tokens", 0)
+        except (OSError, JackSyntaxError) as error:
+            print("{}: {}".format(path, error), file=sys.stderr)
+            status = 1
+    return status
+
+
+if "__main__" == __name__:
+    # through the module, so that its classes are the ones XmlWriter uses
+    import JackTokenizer
+    sys.exit(JackTokenizer.main())
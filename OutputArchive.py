@@ -0,0 +1,131 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import contextlib
+import gzip
+import io
+import os
+import tarfile
+import tempfile
+import time
+import typing
+import zipfile
+
+# the compression of a tar archive, by the end of its name
+TAR_COMPRESSIONS = {".tar": "", ".tar.gz": "gz", ".tgz": "gz",
+                    ".tar.bz2": "bz2", ".tar.xz": "xz"}
+# a tar header holds the size of the entry, so an entry is collected in a
+# temporary file first, which stays in memory up to this size
+SPOOL_SIZE = 1024 * 1024
+# like zip, gzip streams are compressed at the default level of zlib, the
+# best compression (9) is several times slower for a few percent
+COMPRESS_LEVEL = 6
+
+
+class CountingStream(io.RawIOBase):
+    """Passes writes through to another binary stream and counts them. It
+    does not close the stream under it."""
+
+    def __init__(self, stream: typing.BinaryIO) -> None:
+        super().__init__()
+        self.stream = stream
+        self.count = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.stream.write(data)
+        self.count += len(data)
+        return len(data)
+
+
+class OutputArchive:
+    """A single file that takes the place of all the output files of a run:
+    a zip archive, a (compressed) tar archive, or a gzip stream with one
+    member per output, chosen by the extension of its path.
+
+    Outputs are streamed into their entry as they are written, so no output
+    has to be held in memory whole.
+    """
+
+    def __init__(self, path: str, root: str) -> None:
+        """
+        :param path: the archive to create.
+        :param root: entries are named by their output path relative to it.
+        """
+        self.path = path
+        self.root = root
+        # entry name -> uncompressed size
+        self.sizes = {}
+        lower_path = path.lower()
+        compression = next((TAR_COMPRESSIONS[extension]
+                            for extension in TAR_COMPRESSIONS
+                            if lower_path.endswith(extension)), None)
+        if lower_path.endswith(".zip"):
+            self.kind = "zip"
+            self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        elif compression is not None:
+            self.kind = "tar"
+            self.archive = tarfile.open(
+                path, 'w:' + compression,
+                **({"compresslevel": COMPRESS_LEVEL}
+                   if compression in ("gz", "bz2") else {}))
+        elif lower_path.endswith(".gz"):
+            self.kind = "gzip"
+            self.archive = open(path, 'wb')
+        else:
+            raise ValueError("unknown archive type {!r}, use .zip, .tar, "
+                             ".tar.gz, .tgz, .tar.bz2, .tar.xz or .gz".format(
+                                 path))
+
+    def entry_name(self, output_path: str) -> str:
+        return os.path.relpath(output_path, self.root).replace(os.sep, '/')
+
+    @contextlib.contextmanager
+    def open_binary_entry(self, name: str) -> typing.Iterator[typing.BinaryIO]:
+        if self.kind == "zip":
+            # zip64, because the size of the entry is not known in advance
+            with self.archive.open(name, 'w', force_zip64=True) as entry:
+                yield entry
+        elif self.kind == "tar":
+            with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as spool:
+                yield spool
+                info = tarfile.TarInfo(name)
+                info.size = spool.tell()
+                info.mtime = int(time.time())
+                spool.seek(0)
+                self.archive.addfile(info, spool)
+        else:
+            # a gzip member per output, named after it, zcat prints them all
+            with gzip.GzipFile(name, 'wb', COMPRESS_LEVEL,
+                               fileobj=self.archive) as entry:
+                yield entry
+
+    @contextlib.contextmanager
+    def open_entry(self, name: str, binary: bool = False
+                   ) -> typing.Iterator[typing.Union[typing.TextIO,
+                                                     typing.BinaryIO]]:
+        """Opens an entry to write, in text mode unless binary is set."""
+        with self.open_binary_entry(name) as entry:
+            counter = CountingStream(entry)
+            if binary:
+                yield counter
+            else:
+                # encoded like open() would encode an output file
+                text = io.TextIOWrapper(counter)
+                yield text
+                text.flush()
+            self.sizes[name] = counter.count
+
+    def close(self) -> None:
+        self.archive.close()
+
+    def __enter__(self) -> "OutputArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,263 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import concurrent.futures
+import difflib
+import os
+import re
+import typing
+
+# how many bytes are read from a file at a time, files are never read whole
+CHUNK_SIZE = 1 << 16
+# how many differences are reported for one file before giving up on it
+MAX_MISMATCHES = 10
+# how many words of each file are looked at to line them up again after a
+# difference
+SYNC_WINDOW = 256
+# how many words in a row the files must have in common to be lined up
+# again, a word or two (like a closing tag) match by chance
+SYNC_LENGTH = 8
+# the extension of the reference files, next to the .jack files in the
+# course material
+REFERENCE_SUFFIX = ".xml"
+# a word is anything between whitespace, like bytes.split() splits
+WORD_REGEX = re.compile(rb"\S+")
+
+# a word of a file and where it starts: (word, line, column)
+Word = typing.Tuple[bytes, int, int]
+
+
+def reference_path(reference_dir: str, input_path: str) -> str:
+    """Where the reference output of a .jack file is: Main.jack is compared
+    with reference_dir/Main.xml."""
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(reference_dir, name + REFERENCE_SUFFIX)
+
+
+def word_chunks(file: typing.BinaryIO) -> typing.Iterator[typing.List[bytes]]:
+    """The words of a file, a list of them for every chunk read. A word that
+    a chunk ends in the middle of is completed from the next chunk."""
+    rest = b""
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        words = (rest + chunk).split()
+        rest = words.pop() if words and not chunk[-1:].isspace() else b""
+        if words:
+            yield words
+    if rest:
+        yield [rest]
+
+
+def same_bytes(reference_file: typing.BinaryIO,
+               output_file: typing.BinaryIO) -> bool:
+    """Whether two files are identical, which is what a reference written by
+    an earlier run usually is. Stops at the first chunk that differs."""
+    while True:
+        expected = reference_file.read(CHUNK_SIZE)
+        if expected != output_file.read(CHUNK_SIZE):
+            return False
+        if not expected:
+            return True
+
+
+def same_words(reference_file: typing.BinaryIO,
+               output_file: typing.BinaryIO) -> bool:
+    """Whether two files have the same words, whatever the whitespace
+    between them (indentation, line breaks, \\r\\n or \\n).
+
+    This is the fast path: the words of a chunk of each file are compared
+    as whole lists, so the comparison itself runs in C.
+    """
+    expected_chunks = word_chunks(reference_file)
+    actual_chunks = word_chunks(output_file)
+    # the words that were read but not compared yet
+    expected = []
+    actual = []
+    while True:
+        if not expected:
+            expected = next(expected_chunks, None)
+        if not actual:
+            actual = next(actual_chunks, None)
+        if expected is None or actual is None:
+            return expected is None and actual is None
+        length = min(len(expected), len(actual))
+        if expected[:length] != actual[:length]:
+            return False
+        expected = expected[length:]
+        actual = actual[length:]
+
+
+def located_words(file: typing.BinaryIO) -> typing.Iterator[Word]:
+    """The words of a file with the line and column they start at, read in
+    chunks like word_chunks."""
+    line = 1
+    # the offset in the file of the first character of the current line
+    line_start = 0
+    # the offset in the file of data[0]
+    position = 0
+    data = b""
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        data += chunk
+        # the newlines before counted were already counted
+        counted = 0
+        keep = len(data)
+        for match in WORD_REGEX.finditer(data):
+            if chunk and match.end() == len(data):
+                # the word might go on in the next chunk
+                keep = match.start()
+                break
+            newlines = data.count(b"\n", counted, match.start())
+            if newlines:
+                line += newlines
+                line_start = position + data.rindex(
+                    b"\n", counted, match.start()) + 1
+            counted = match.end()
+            yield match.group(), line, position + match.start() - line_start + 1
+        if not chunk:
+            return
+        newlines = data.count(b"\n", counted, keep)
+        if newlines:
+            line += newlines
+            line_start = position + data.rindex(b"\n", counted, keep) + 1
+        position += keep
+        data = data[keep:]
+
+
+def fill(window: typing.List[Word], words: typing.Iterator[Word]) -> None:
+    while len(window) < SYNC_WINDOW:
+        word = next(words, None)
+        if word is None:
+            return
+        window.append(word)
+
+
+def mismatches(reference_file: typing.BinaryIO,
+               output_file: typing.BinaryIO
+               ) -> typing.List[typing.Tuple[typing.Optional[Word],
+                                             typing.Optional[Word]]]:
+    """Every place where two files differ, at most MAX_MISMATCHES of them.
+
+    The words are compared one by one. After a difference, the next
+    SYNC_WINDOW words of each file are lined up with difflib, so that a
+    missing or an extra word is reported once and not as a difference of
+    every word after it.
+
+    Returns:
+        the (reference word, output word) at the start of every difference,
+        None for the end of a file.
+    """
+    expected_words = located_words(reference_file)
+    actual_words = located_words(output_file)
+    expected = []
+    actual = []
+    found = []
+    while len(found) < MAX_MISMATCHES:
+        fill(expected, expected_words)
+        fill(actual, actual_words)
+        if not expected and not actual:
+            break
+        same = 0
+        while same < len(expected) and same < len(actual) \
+                and expected[same][0] == actual[same][0]:
+            same += 1
+        if same:
+            del expected[:same]
+            del actual[:same]
+            continue
+        found.append((expected[0] if expected else None,
+                      actual[0] if actual else None))
+        if not expected or not actual:
+            break
+        # the first long enough block the windows have in common is where
+        # the files agree again, the difference is what comes before it
+        blocks = difflib.SequenceMatcher(
+            None, [word[0] for word in expected],
+            [word[0] for word in actual], autojunk=False
+        ).get_matching_blocks()[:-1]
+        long_blocks = [block for block in blocks if block[2] >= SYNC_LENGTH]
+        if long_blocks:
+            expected_end, actual_end, _ = long_blocks[0]
+        elif blocks:
+            expected_end, actual_end, _ = max(blocks, key=lambda b: b[2])
+        else:
+            # nothing in common, the whole windows differ
+            expected_end, actual_end = len(expected), len(actual)
+        # the first words differ, so the block does not start at 0 in both
+        del expected[:expected_end]
+        del actual[:actual_end]
+    return found
+
+
+def describe(word: typing.Optional[Word], path: str) -> str:
+    if word is None:
+        return "end of file ({})".format(path)
+    return "{!r} ({}:{}:{})".format(
+        word[0].decode('utf-8', 'replace'), path, word[1], word[2])
+
+
+def verify_file(reference: str, output: str) -> typing.List[str]:
+    """Compares an output with its reference as whitespace-separated words:
+    the indentation and line breaks may differ, the words may not.
+
+    Args:
+        reference (str): the path of the reference output.
+        output (str): the path of the output.
+
+    Returns:
+        typing.List[str]: a line for every difference, empty if the files
+        have the same words.
+    """
+    try:
+        with open(reference, 'rb') as reference_file, \
+                open(output, 'rb') as output_file:
+            # identical files need no splitting into words
+            if os.fstat(reference_file.fileno()).st_size == os.fstat(
+                    output_file.fileno()).st_size \
+                    and same_bytes(reference_file, output_file):
+                return []
+            reference_file.seek(0)
+            output_file.seek(0)
+            if same_words(reference_file, output_file):
+                return []
+            reference_file.seek(0)
+            output_file.seek(0)
+            found = mismatches(reference_file, output_file)
+    except OSError as error:
+        return ["{}: cannot compare with {}: {}".format(
+            output, reference, error.strerror or error)]
+    lines = []
+    for expected, actual in found:
+        where = "{}:{}:{}".format(output, actual[1], actual[2]) \
+            if actual is not None else output
+        lines.append("{}: expected {}, got {}".format(
+            where, describe(expected, reference),
+            "end of file" if actual is None
+            else repr(actual[0].decode('utf-8', 'replace'))))
+    if len(found) == MAX_MISMATCHES:
+        lines.append("{}: stopped after {} differences".format(
+            output, MAX_MISMATCHES))
+    return lines
+
+
+def verify_files(pairs: typing.List[typing.Tuple[str, str]],
+                 jobs: int = 1) -> typing.List[typing.List[str]]:
+    """Runs verify_file on (reference path, output path) pairs, in jobs
+    processes.
+
+    Returns:
+        typing.List[typing.List[str]]: the differences of every pair, in the
+        order of pairs.
+    """
+    if jobs == 1 or len(pairs) <= 1:
+        return [verify_file(reference, output) for reference, output in pairs]
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        # thousands of small files are sent to the processes in batches
+        return list(executor.map(
+            verify_file, *zip(*pairs),
+            chunksize=max(1, len(pairs) // (jobs * 4))))
@@ -0,0 +1,125 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import contextlib
+import json
+import time
+import typing
+
+PHASES = ("tokenize", "parse", "write")
+
+
+class FileStats:
+    """Timers and counters of the analysis of one file.
+
+    The engine and its writer are only instrumented when statistics were
+    asked for, so a normal run does not pay for counting.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.tokens = 0
+        self.nonterminals = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # how many times every non-terminal was opened, by tag name
+        self.tags = {}
+
+    @contextlib.contextmanager
+    def timer(self, phase: str) -> typing.Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += time.perf_counter() - start
+
+    def instrument(self, engine) -> None:
+        """Counts the non-terminals an engine opens in its writer, by tag
+        name, and times the writes of the writer.
+
+        The counts are taken from the writer and not from the methods of the
+        engine, so they are the same for the CompilationEngine (which parses
+        expressions without a call per non-terminal) and the TableEngine.
+        """
+        writer = engine.writer
+        open_tag = writer.open_tag
+        flush = writer.flush
+        tags = self.tags
+
+        def counted_open_tag(tag_name, depth):
+            self.nonterminals += 1
+            tags[tag_name] = tags.get(tag_name, 0) + 1
+            open_tag(tag_name, depth)
+
+        def timed_flush():
+            with self.timer("write"):
+                flush()
+        writer.open_tag = counted_open_tag
+        writer.flush = timed_flush
+
+    @contextlib.contextmanager
+    def parsing(self) -> typing.Iterator[None]:
+        """Times the parse, without the writes that happen during it."""
+        written = self.seconds["write"]
+        with self.timer("parse"):
+            yield
+        self.seconds["parse"] -= self.seconds["write"] - written
+
+    def as_dict(self) -> typing.Dict:
+        return {
+            "path": self.path,
+            "seconds": dict(self.seconds),
+            "tokens": self.tokens,
+            "nonterminals": self.nonterminals,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "tags": dict(sorted(self.tags.items())),
+        }
+
+
+class RunStats:
+    """The statistics of every file of a run, and their totals."""
+
+    def __init__(self) -> None:
+        self.files = []
+
+    def add(self, file_stats: FileStats) -> None:
+        self.files.append(file_stats)
+
+    def totals(self) -> typing.Dict:
+        total = FileStats("total")
+        for file_stats in self.files:
+            for phase in PHASES:
+                total.seconds[phase] += file_stats.seconds[phase]
+            total.tokens += file_stats.tokens
+            total.nonterminals += file_stats.nonterminals
+            total.bytes_read += file_stats.bytes_read
+            total.bytes_written += file_stats.bytes_written
+            for name, count in file_stats.tags.items():
+                total.tags[name] = total.tags.get(name, 0) + count
+        return total.as_dict()
+
+    def format_json(self) -> str:
+        return json.dumps({
+            "files": [file_stats.as_dict() for file_stats in self.files],
+            "total": self.totals()}, indent=2)
+
+    def format_text(self) -> str:
+        lines = []
+        rows = [file_stats.as_dict() for file_stats in self.files]
+        for row in rows + [self.totals()]:
+            seconds = row["seconds"]
+            lines.append(
+                "{}: tokenize {:.3f}s, parse {:.3f}s, write {:.3f}s, "
+                "{} tokens, {} nonterminals, {} bytes read, "
+                "{} bytes written".format(
+                    row["path"], seconds["tokenize"], seconds["parse"],
+                    seconds["write"], row["tokens"], row["nonterminals"],
+                    row["bytes_read"], row["bytes_written"]))
+        for name, count in self.totals()["tags"].items():
+            lines.append("  {:<26} {}".format(name, count))
+        return "\n".join(lines)
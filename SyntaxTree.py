@@ -0,0 +1,138 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+from XmlWriter import XmlWriter
+
+NO_NODE = -1
+
+
+class SyntaxTree:
+    """A parse tree of a Jack program, stored in a flat arena.
+
+    Every node is an index into parallel lists (struct of arrays):
+    kinds[node] is the tag of a non-terminal ("class", "term", ...) or the
+    label of a terminal ("keyword", "symbol", ...), token[node] is an index
+    into texts for terminals and NO_NODE for non-terminals, first_child and
+    next_sibling link the nodes into a tree.
+    """
+
+    def __init__(self) -> None:
+        self.kinds = []
+        self.token = []
+        self.first_child = []
+        self.next_sibling = []
+        self.texts = []
+        self.root = NO_NODE
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add_node(self, kind: str, text: typing.Optional[str] = None) -> int:
+        """Adds an unlinked node and returns its index."""
+        node = len(self.kinds)
+        self.kinds.append(kind)
+        if text is None:
+            self.token.append(NO_NODE)
+        else:
+            self.token.append(len(self.texts))
+            self.texts.append(text)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        return node
+
+    def is_terminal(self, node: int) -> bool:
+        return self.token[node] != NO_NODE
+
+    def text(self, node: int) -> typing.Optional[str]:
+        """The text of a terminal, None for a non-terminal."""
+        index = self.token[node]
+        return None if index == NO_NODE else self.texts[index]
+
+    def children(self, node: int) -> typing.Iterator[int]:
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def walk(self, node: int = None) -> typing.Iterator[typing.Tuple[bool, int, int]]:
+        """Visits the tree in preorder without recursion.
+
+        Yields:
+            (entering, node, depth): every non-terminal is yielded twice,
+            once when entering (True) and once when leaving (False) it,
+            terminals are yielded once with entering True.
+        """
+        if node is None:
+            node = self.root
+        if node == NO_NODE:
+            return
+        # stack of (node, depth, entering)
+        stack = [(node, 0, True)]
+        while stack:
+            node, depth, entering = stack.pop()
+            yield entering, node, depth
+            if not entering or self.token[node] != NO_NODE:
+                continue
+            stack.append((node, depth, False))
+            children = list(self.children(node))
+            for child in reversed(children):
+                stack.append((child, depth + 1, True))
+
+    def write_xml(self, writer: XmlWriter) -> None:
+        """Writes the tree as the same XML the CompilationEngine writes."""
+        kinds = self.kinds
+        for entering, node, depth in self.walk():
+            text = self.text(node)
+            if text is not None:
+                writer.terminal(kinds[node], text, depth)
+            elif entering:
+                writer.open_tag(kinds[node], depth)
+            else:
+                writer.close_tag(kinds[node], depth)
+        writer.flush()
+
+
+class TreeBuilder:
+    """Takes the place of an XmlWriter in the CompilationEngine and builds a
+    SyntaxTree from the tags it is given, instead of writing text.
+    """
+
+    def __init__(self, tree: SyntaxTree = None) -> None:
+        self.tree = tree if tree is not None else SyntaxTree()
+        # the open non-terminals, and the last child added to each of them
+        self.open_nodes = []
+        self.last_children = []
+
+    def link(self, node: int) -> None:
+        tree = self.tree
+        if not self.open_nodes:
+            if tree.root == NO_NODE:
+                tree.root = node
+            return
+        last_child = self.last_children[-1]
+        if last_child == NO_NODE:
+            tree.first_child[self.open_nodes[-1]] = node
+        else:
+            tree.next_sibling[last_child] = node
+        self.last_children[-1] = node
+
+    def open_tag(self, tag_name: str, depth: int) -> None:
+        node = self.tree.add_node(tag_name)
+        self.link(node)
+        self.open_nodes.append(node)
+        self.last_children.append(NO_NODE)
+
+    def close_tag(self, tag_name: str, depth: int) -> None:
+        self.open_nodes.pop()
+        self.last_children.pop()
+
+    def terminal(self, label: str, name, depth: int) -> None:
+        self.link(self.tree.add_node(label, str(name)))
+
+    def flush(self) -> None:
+        pass
@@ -0,0 +1,210 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+from JackGrammar import END, GRAMMAR, build_table, is_terminal, \
+    parse_grammar, terminal_key
+from JackTokenizer import JackSyntaxError, JackTokenizer
+from XmlWriter import XmlWriter
+
+KEYWORD = "keyword"
+SYMBOL = "symbol"
+INT_CONSTANT = "integerConstant"
+
+# what the items of the parse stack do
+MATCH = 0
+EXPAND = 1
+CLOSE = 2
+
+
+def token_sets(rules: typing.Dict[str, typing.List[typing.List[str]]]
+               ) -> typing.Dict[str, typing.FrozenSet[str]]:
+    """The rules that only choose one token out of a set, like _type or
+    _op, and their sets. They write no tag, so matching any token of the
+    set does the same as expanding them."""
+    sets = {}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in rules.items():
+            if name in sets or not name.startswith("_") or not all(
+                    len(alternative) == 1 and (is_terminal(alternative[0])
+                                               or alternative[0] in sets)
+                    for alternative in alternatives):
+                continue
+            sets[name] = frozenset().union(*(
+                sets[symbol] if symbol in sets
+                else {terminal_key(symbol)}
+                for symbol, in alternatives))
+            changed = True
+    return sets
+
+
+def make_rows(rules: typing.Dict[str, typing.List[typing.List[str]]]
+              ) -> typing.Tuple[typing.Dict, typing.Dict, typing.Dict]:
+    """Turns the LL(1) table of a grammar into what the engine runs.
+
+    Every rule gets a row: lookahead -> (tag, items), the tag to open (None
+    for rules starting with _) and the stack items of the alternative, in
+    reverse so that they can be pushed as they are. A stack item is
+    (MATCH, set of lookaheads, None) or (EXPAND, rule name, row of the
+    rule), a rule that only chooses a token (see token_sets) is matched
+    instead of expanded.
+
+    Returns:
+        typing.Tuple[typing.Dict, typing.Dict, typing.Dict]: the row of every
+        rule, the (tag, items) of the empty alternative of the rules that
+        have one, and of the first alternative of the others.
+    """
+    table = build_table(rules)
+    sets = token_sets(rules)
+    rows = {name: {} for name in rules}
+    empties = {}
+    firsts = {}
+    for name, alternatives in rules.items():
+        tag = None if name.startswith("_") else name
+        entries = []
+        for alternative in alternatives:
+            items = tuple(
+                (MATCH, frozenset([terminal_key(symbol)]), None)
+                if is_terminal(symbol)
+                else (MATCH, sets[symbol], None) if symbol in sets
+                else (EXPAND, symbol, rows[symbol])
+                for symbol in reversed(alternative))
+            entries.append((tag, items))
+        for lookahead, index in table[name].items():
+            rows[name][lookahead] = entries[index]
+        for entry, alternative in zip(entries, alternatives):
+            if not alternative:
+                empties[name] = entry
+        if name not in empties:
+            firsts[name] = entries[0]
+    return rows, empties, firsts
+
+
+def describe(lookaheads: typing.Iterable[str]) -> str:
+    return " or ".join(sorted(
+        lookahead if lookahead in (END, "identifier", INT_CONSTANT,
+                                   "stringConstant")
+        else repr(lookahead) for lookahead in lookaheads))
+
+
+RULES = parse_grammar(GRAMMAR)
+START = next(iter(RULES))
+ROWS, EMPTIES, FIRSTS = make_rows(RULES)
+
+
+class TableEngine:
+    """A drop in replacement for the CompilationEngine that is driven by
+    the LL(1) table of the grammar in JackGrammar instead of hand written
+    if chains, and writes exactly the same output.
+
+    Parsing is one loop over an explicit stack, like the expression machine
+    of the CompilationEngine, so it does not recurse either. An item of the
+    stack is a token to match, a rule to expand or a tag to close, and the
+    alternative a rule expands to is one dict lookup with the current token
+    (its text for keywords and symbols, else its type). Extending the
+    grammar only changes the table, not this loop.
+    """
+
+    def __init__(self, input_stream: JackTokenizer,
+                 output_stream: typing.TextIO = None,
+                 compact: bool = False, writer=None,
+                 strict: bool = False) -> None:
+        """
+        Takes the same arguments as the CompilationEngine.
+        :param input_stream: The input stream.
+        :param output_stream: The output stream.
+        :param compact: write the XML without indentation.
+        :param writer: receives the parsed structure instead of an XmlWriter
+        over output_stream, e.g. a SyntaxTree.TreeBuilder.
+        :param strict: raise a JackSyntaxError on problems with the input.
+        """
+        self.tokenizer = input_stream
+        self.output = output_stream
+        if writer is None:
+            writer = XmlWriter(output_stream, compact)
+        self.writer = writer
+        self.strict = strict
+        self.nested_number = 0
+
+    def syntax_error(self, message):
+        raise JackSyntaxError("{} at token {} ({!r})".format(
+            message, self.tokenizer.current_token_index,
+            self.tokenizer.current_token))
+
+    def flush(self):
+        self.writer.flush()
+
+    def compile(self) -> None:
+        """Compiles the whole input: a class, or a single subroutine like the
+        files in samtest."""
+        tokenizer = self.tokenizer
+        has_more_tokens = tokenizer.has_more_tokens
+        token_type = tokenizer.token_type
+        advance = tokenizer.advance
+        terminal = self.writer.terminal
+        open_tag = self.writer.open_tag
+        close_tag = self.writer.close_tag
+        strict = self.strict
+        depth = self.nested_number
+        stack = [(EXPAND, START, ROWS[START])]
+        # the table is indexed with the text of keywords and symbols, and
+        # with the type of the other tokens
+        current_type = token_type()
+        key = END if not has_more_tokens() \
+            else tokenizer.current_token \
+            if current_type == KEYWORD or current_type == SYMBOL \
+            else current_type
+        while stack:
+            action, value, row = stack.pop()
+            if action == MATCH:
+                if key not in value:
+                    # running out of tokens is an error in every mode, like
+                    # in the CompilationEngine
+                    if strict or key == END:
+                        self.nested_number = depth
+                        self.syntax_error("unexpected end of input"
+                                          if key == END else
+                                          "expected {}".format(describe(value)))
+                # like compile_line, the current token is written even when
+                # it is not the expected one (unless strict)
+                terminal(current_type, tokenizer.int_val()
+                         if current_type == INT_CONSTANT
+                         else tokenizer.current_token, depth)
+                advance()
+                current_type = token_type()
+                key = END if not has_more_tokens() \
+                    else tokenizer.current_token \
+                    if current_type == KEYWORD or current_type == SYMBOL \
+                    else current_type
+            elif action == EXPAND:
+                entry = row.get(key)
+                if entry is None:
+                    # a rule that can be empty is left empty, the token is
+                    # then reported by what comes after the rule
+                    entry = EMPTIES.get(value)
+                if entry is None:
+                    if strict or key == END:
+                        self.nested_number = depth
+                        self.syntax_error("unexpected end of input"
+                                          if key == END else
+                                          "expected {} ({})".format(
+                                              value.lstrip("_"), describe(row)))
+                    entry = FIRSTS[value]
+                tag, items = entry
+                if tag is not None:
+                    open_tag(tag, depth)
+                    depth += 1
+                    stack.append((CLOSE, tag, None))
+                stack.extend(items)
+            else:
+                depth -= 1
+                close_tag(value, depth)
+        self.nested_number = depth
+        if strict and key != END:
+            self.syntax_error("unexpected token after the end")
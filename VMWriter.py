@@ -0,0 +1,111 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+# how many commands are collected in memory before they are written out
+BUFFER_SIZE = 4096
+
+
+class VMWriter:
+    """
+    Writes VM commands into a file. Encapsulates the VM command syntax.
+
+    Like the XmlWriter, the commands are collected in a buffer and written
+    to the output stream in big blocks.
+    """
+
+    def __init__(self, output_stream: typing.TextIO) -> None:
+        """Creates a new file and prepares it for writing VM commands."""
+        self.output = output_stream
+        self.buffer = []
+
+    def write(self, command: str) -> None:
+        self.buffer.append(command)
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.flush()
+
+    def write_push(self, segment: str, index: int) -> None:
+        """Writes a VM push command.
+
+        Args:
+            segment (str): the segment to push from, can be "constant",
+            "argument", "local", "static", "this", "that", "pointer", "temp".
+            index (int): the index in the segment.
+        """
+        self.write("push {} {}\n".format(segment, index))
+
+    def write_pop(self, segment: str, index: int) -> None:
+        """Writes a VM pop command.
+
+        Args:
+            segment (str): the segment to pop into, can be "argument",
+            "local", "static", "this", "that", "pointer", "temp".
+            index (int): the index in the segment.
+        """
+        self.write("pop {} {}\n".format(segment, index))
+
+    def write_arithmetic(self, command: str) -> None:
+        """Writes a VM arithmetic command.
+
+        Args:
+            command (str): the command to write, can be "add", "sub", "neg",
+            "eq", "gt", "lt", "and", "or", "not", "shiftleft", "shiftright".
+        """
+        self.write(command + "\n")
+
+    def write_label(self, label: str) -> None:
+        """Writes a VM label command.
+
+        Args:
+            label (str): the label to write.
+        """
+        self.write("label {}\n".format(label))
+
+    def write_goto(self, label: str) -> None:
+        """Writes a VM goto command.
+
+        Args:
+            label (str): the label to go to.
+        """
+        self.write("goto {}\n".format(label))
+
+    def write_if(self, label: str) -> None:
+        """Writes a VM if-goto command.
+
+        Args:
+            label (str): the label to go to.
+        """
+        self.write("if-goto {}\n".format(label))
+
+    def write_call(self, name: str, n_args: int) -> None:
+        """Writes a VM call command.
+
+        Args:
+            name (str): the name of the function to call.
+            n_args (int): the number of arguments the function receives.
+        """
+        self.write("call {} {}\n".format(name, n_args))
+
+    def write_function(self, name: str, n_locals: int) -> None:
+        """Writes a VM function command.
+
+        Args:
+            name (str): the name of the function.
+            n_locals (int): the number of local variables the function uses.
+        """
+        self.write("function {} {}\n".format(name, n_locals))
+
+    def write_return(self) -> None:
+        """Writes a VM return command."""
+        self.write("return\n")
+
+    def flush(self) -> None:
+        """Writes out the buffered commands. The output stream belongs to
+        the caller and stays open."""
+        if self.buffer:
+            self.output.write("".join(self.buffer))
+            self.buffer = []
@@ -0,0 +1,171 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+
+from JackTokenizer import JackSyntaxError, string_text
+
+INDENTATION = "  "
+# the symbols that XML gives a meaning to, written as in the reference
+# files of the course
+SYMBOL_ESCAPES = {"<": "&lt;", ">": "&gt;", "&": "&amp;"}
+# how many characters are collected in memory before they are written out
+BUFFER_SIZE = 256 * 1024
+
+
+def escape(text: str) -> str:
+    """text as XML character data."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class XmlWriter:
+    """Writes the XML of a parsed Jack program into an output stream.
+
+    The fragments are collected in an in-memory buffer and written to the
+    output stream in big blocks, and the indentation of every nesting depth
+    is computed once.
+    """
+
+    def __init__(self, output_stream: typing.TextIO, compact: bool = False,
+                 buffer_size: int = BUFFER_SIZE) -> None:
+        """
+        :param output_stream: The output stream.
+        :param compact: if True, no indentation is written.
+        :param buffer_size: how many characters to buffer before writing.
+        """
+        self.output = output_stream
+        self.compact = compact
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+        self.indents = [""] if compact else [INDENTATION * i for i in range(32)]
+        # "<keyword> " and " </keyword>\n" for every terminal label
+        self.terminal_tags = {}
+
+    def reset(self, output_stream: typing.TextIO) -> None:
+        """Writes into another output stream, dropping what was not written
+        yet. The indentation and tag strings computed so far are kept, that
+        is what a pooled writer saves (see JackAPI)."""
+        self.output = output_stream
+        self.buffer = []
+        self.buffered = 0
+
+    def indent(self, depth: int) -> str:
+        if self.compact:
+            return ""
+        while depth >= len(self.indents):
+            self.indents.append(INDENTATION * len(self.indents))
+        return self.indents[depth]
+
+    def write(self, fragment: str) -> None:
+        self.buffer.append(fragment)
+        self.buffered += len(fragment)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def open_tag(self, tag_name: str, depth: int) -> None:
+        self.write("{}<{}>\n".format(self.indent(depth), tag_name))
+
+    def close_tag(self, tag_name: str, depth: int) -> None:
+        self.write("{}</{}>\n".format(self.indent(depth), tag_name))
+        # the outermost tag is closed, nothing else will be written
+        if depth == 0:
+            self.flush()
+
+    def terminal(self, label: str, name, depth: int) -> None:
+        # every output (tree, binary, table and incremental) is written
+        # here, so this is the one place where the text is made XML
+        if label == "symbol":
+            name = SYMBOL_ESCAPES.get(name, name)
+        elif label == "stringConstant":
+            name = escape(string_text(name))
+        tags = self.terminal_tags.get(label)
+        if tags is None:
+            tags = self.terminal_tags[label] = (
+                "<{}> ".format(label), " </{}>\n".format(label))
+        self.write(self.indent(depth) + tags[0] + str(name) + tags[1])
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.output.write("".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+
+IDENTIFIER_REGEX = re.compile(r"[A-Za-z_]\w*")
+MAX_INT_CONSTANT = 32767
+
+
+class NullWriter:
+    """Takes the place of an XmlWriter when only the syntax is checked: it
+    writes and builds nothing, and only checks that every terminal is a
+    valid Jack token, raising a JackSyntaxError otherwise.
+    """
+
+    def open_tag(self, tag_name: str, depth: int) -> None:
+        pass
+
+    def close_tag(self, tag_name: str, depth: int) -> None:
+        pass
+
+    def terminal(self, label: str, name, depth: int) -> None:
+        if label == "identifier":
+            if IDENTIFIER_REGEX.fullmatch(name) is None:
+                raise JackSyntaxError("invalid token {!r}".format(name))
+        elif label == "integerConstant":
+            if name > MAX_INT_CONSTANT:
+                raise JackSyntaxError("integer constant {} is too big".format(name))
+        elif label == "stringConstant":
+            if len(name) < 2 or name[-1] != '"':
+                raise JackSyntaxError("unterminated string constant {}".format(name))
+        elif label is None:
+            raise JackSyntaxError("unexpected end of input")
+
+    def flush(self) -> None:
+        pass
+
+    def valid_tokens(self, tokenizer) -> bool:
+        """Whether every token of a tokenizer would pass terminal(), checked
+        once per distinct token. Then a SkipWriter can take the place of
+        this writer: the engine still parses everything, but need not send
+        the terminals anywhere.
+
+        Returns:
+            bool: False as well when the tokenizer has no token table (it is
+            streaming) or no tokens, the terminals are checked one by one
+            then.
+        """
+        if not tokenizer.tokens:
+            return False
+        try:
+            # the type of a token only depends on its text
+            for token, token_type in dict(zip(tokenizer.tokens,
+                                              tokenizer.token_types)).items():
+                self.terminal(token_type, int(token) if token_type ==
+                              "integerConstant" else token, 0)
+        except JackSyntaxError:
+            return False
+        return True
+
+
+class SkipWriter:
+    """Takes the place of a NullWriter once NullWriter.valid_tokens() has
+    checked the tokens: it does nothing at all. A CompilationEngine does not
+    even call it (see CompilationEngine.set_writer).
+    """
+
+    def open_tag(self, tag_name: str, depth: int) -> None:
+        pass
+
+    def close_tag(self, tag_name: str, depth: int) -> None:
+        pass
+
+    def terminal(self, label: str, name, depth: int) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
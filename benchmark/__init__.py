@@ -0,0 +1,10 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Benchmarks for the Jack analyzer: a generator of synthetic Jack programs
+(corpus.py) and a harness that times every phase of the analyzer on them
+(harness.py). Run with: python3 -m benchmark --help
+"""
@@ -0,0 +1,168 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Generates valid Jack classes to benchmark the analyzer on.
+
+The same seed and sizes always give the same programs, so numbers from
+different runs can be compared.
+"""
+import os
+import random
+import typing
+
+TYPES = ["int", "char", "boolean", "Array"]
+OPS = ["+", "-", "*", "/", "&", "|", "<", ">", "="]
+UNARY_OPS = ["-", "~"]
+KEYWORD_CONSTANTS = ["true", "false", "null", "this"]
+INDENTATION = "   "
+
+
+class ClassGenerator:
+    """Writes one random Jack class."""
+
+    def __init__(self, rng: random.Random, name: str, subroutines: int,
+                 statements: int, depth: int) -> None:
+        """
+        :param rng: the random generator to draw from.
+        :param name: the name of the class.
+        :param subroutines: how many subroutines the class has.
+        :param statements: how many statements every subroutine has.
+        :param depth: how deep expressions are nested.
+        """
+        self.rng = rng
+        self.name = name
+        self.subroutines = subroutines
+        self.statements = statements
+        self.depth = depth
+        self.variables = ["v{}".format(i) for i in range(4)]
+        self.arrays = ["a{}".format(i) for i in range(2)]
+        self.lines = []
+
+    def line(self, level: int, text: str) -> None:
+        self.lines.append(INDENTATION * level + text)
+
+    def generate(self) -> str:
+        rng = self.rng
+        self.line(0, "/** Generated class {}. */".format(self.name))
+        self.line(0, "class {} {{".format(self.name))
+        self.line(1, "field int x, y; // fields")
+        self.line(1, "static Array table;")
+        for i in range(self.subroutines):
+            kind = rng.choice(["function", "method", "constructor"]) if i \
+                else "constructor"
+            return_type = self.name if kind == "constructor" \
+                else rng.choice(["void"] + TYPES)
+            parameters = ", ".join(
+                "{} p{}".format(rng.choice(TYPES), j)
+                for j in range(rng.randint(0, 3)))
+            self.line(1, "{} {} f{}({}) {{".format(
+                kind, return_type, i, parameters))
+            self.line(2, "var int {};".format(", ".join(self.variables)))
+            self.line(2, "var Array {};".format(", ".join(self.arrays)))
+            self.generate_statements(2, self.statements, 2)
+            if kind == "constructor":
+                self.line(2, "return this;")
+            elif return_type == "void":
+                self.line(2, "return;")
+            else:
+                self.line(2, "return {};".format(self.expression(self.depth)))
+            self.line(1, "}")
+        self.line(0, "}")
+        return "\n".join(self.lines) + "\n"
+
+    def generate_statements(self, level: int, count: int, nesting: int) -> None:
+        rng = self.rng
+        while count > 0:
+            choice = rng.random()
+            count -= 1
+            if nesting and choice < 0.15:
+                # the statements of the block count towards the budget
+                inner = min(count, rng.randint(1, 4))
+                count -= inner
+                self.line(level, "if ({}) {{".format(self.expression(self.depth)))
+                self.generate_statements(level + 1, inner, nesting - 1)
+                if rng.random() < 0.5:
+                    self.line(level, "} else {")
+                    self.generate_statements(level + 1, 1, 0)
+                self.line(level, "}")
+            elif nesting and choice < 0.25:
+                inner = min(count, rng.randint(1, 4))
+                count -= inner
+                self.line(level, "while ({}) {{".format(self.expression(self.depth)))
+                self.generate_statements(level + 1, inner, nesting - 1)
+                self.line(level, "}")
+            elif choice < 0.45:
+                self.line(level, "do {};".format(self.call(self.depth)))
+            elif choice < 0.6:
+                self.line(level, "let {}[{}] = {};".format(
+                    rng.choice(self.arrays), self.expression(self.depth),
+                    self.expression(self.depth)))
+            else:
+                self.line(level, "let {} = {}; // assignment".format(
+                    rng.choice(self.variables), self.expression(self.depth)))
+
+    def expression(self, depth: int) -> str:
+        terms = [self.term(depth) for _ in range(self.rng.randint(1, 3))]
+        expression = terms[0]
+        for term in terms[1:]:
+            expression += " {} {}".format(self.rng.choice(OPS), term)
+        return expression
+
+    def call(self, depth: int) -> str:
+        rng = self.rng
+        arguments = ", ".join(self.expression(depth - 1)
+                              for _ in range(rng.randint(0, 2))) \
+            if depth > 0 else ""
+        target = rng.choice(["", "Output.", "Math.", self.name + "."])
+        return "{}f{}({})".format(target, rng.randint(0, 9), arguments)
+
+    def term(self, depth: int) -> str:
+        rng = self.rng
+        choice = rng.random()
+        if depth <= 0 or choice < 0.3:
+            simple = rng.random()
+            if simple < 0.4:
+                return str(rng.randint(0, 32767))
+            if simple < 0.5:
+                return '"string {}"'.format(rng.randint(0, 99))
+            if simple < 0.6:
+                return rng.choice(KEYWORD_CONSTANTS)
+            return rng.choice(self.variables)
+        if choice < 0.45:
+            return "({})".format(self.expression(depth - 1))
+        if choice < 0.6:
+            return rng.choice(UNARY_OPS) + self.term(depth - 1)
+        if choice < 0.8:
+            return "{}[{}]".format(rng.choice(self.arrays),
+                                   self.expression(depth - 1))
+        return self.call(depth)
+
+
+def generate_source(seed: int, name: str = "Main", subroutines: int = 10,
+                    statements: int = 20, depth: int = 3) -> str:
+    """The source of one generated class."""
+    rng = random.Random("{}:{}".format(seed, name))
+    return ClassGenerator(rng, name, subroutines, statements, depth).generate()
+
+
+def generate_corpus(directory: str, files: int = 10, subroutines: int = 10,
+                    statements: int = 20, depth: int = 3,
+                    seed: int = 0) -> typing.List[str]:
+    """Writes files generated classes into directory.
+
+    Returns:
+        typing.List[str]: the paths of the .jack files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(files):
+        name = "Class{}".format(i)
+        path = os.path.join(directory, name + ".jack")
+        with open(path, 'w') as output_file:
+            output_file.write(generate_source(
+                seed, name, subroutines, statements, depth))
+        paths.append(path)
+    return paths
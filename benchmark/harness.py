@@ -0,0 +1,182 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Times the analyzer over a corpus of Jack files and writes the results to a
+json report. Two cases are timed: "analyze", the path JackAnalyzer takes by
+default (JackAnalyzer.analyze_file, the engine writing the XML as it
+parses), and "tree" (--tree), whose tokenizer, parser and XML output are
+timed separately.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import JackAnalyzer
+from JackTokenizer import JackTokenizer
+from SyntaxTree import SyntaxTree, TreeBuilder
+from XmlWriter import XmlWriter
+
+from benchmark.corpus import generate_corpus
+
+# the cases of the report, and the phases timed in each
+PHASES = {"analyze": ["analyze"], "tree": ["tokenize", "parse", "write"]}
+
+
+def analyze(source: str, table: bool = False) -> str:
+    """The XML of source, the way JackAnalyzer writes it by default."""
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(source), output, table=table)
+    return output.getvalue()
+
+
+def tokenize(source: str) -> JackTokenizer:
+    return JackTokenizer(io.StringIO(source))
+
+
+def parse(tokenizer: JackTokenizer, table: bool = False) -> SyntaxTree:
+    tree = SyntaxTree()
+    JackAnalyzer.engine_class(table)(
+        tokenizer, writer=TreeBuilder(tree)).compile()
+    return tree
+
+
+def write(tree: SyntaxTree) -> str:
+    output = io.StringIO()
+    tree.write_xml(XmlWriter(output))
+    return output.getvalue()
+
+
+def time_phases(sources: typing.List[str],
+                table: bool = False) -> typing.Dict[str, float]:
+    """One pass over the corpus, the seconds spent in every phase of every
+    case, by "case/phase"."""
+    times = dict.fromkeys(
+        ["{}/{}".format(case, phase)
+         for case, phases in PHASES.items() for phase in phases], 0.0)
+    for source in sources:
+        start = time.perf_counter()
+        analyze(source, table)
+        times["analyze/analyze"] += time.perf_counter() - start
+        start = time.perf_counter()
+        tokenizer = tokenize(source)
+        times["tree/tokenize"] += time.perf_counter() - start
+        start = time.perf_counter()
+        tree = parse(tokenizer, table)
+        times["tree/parse"] += time.perf_counter() - start
+        start = time.perf_counter()
+        write(tree)
+        times["tree/write"] += time.perf_counter() - start
+    return times
+
+
+def peak_memory(sources: typing.List[str], table: bool = False,
+                tree: bool = False) -> int:
+    """The largest amount of memory used to analyze one file, in bytes, in
+    the tree case if tree is set. tracemalloc slows everything down, so
+    this is a pass of its own."""
+    peak = 0
+    for source in sources:
+        tracemalloc.start()
+        if tree:
+            write(parse(tokenize(source), table))
+        else:
+            analyze(source, table)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def run(sources: typing.List[str], repeat: int,
+        table: bool = False) -> typing.Dict:
+    token_count = sum(len(tokenize(source).tokens) for source in sources)
+    output_bytes = sum(len(analyze(source, table).encode())
+                       for source in sources)
+    # the best of the passes is the least disturbed by the machine
+    runs = [time_phases(sources, table) for _ in range(repeat)]
+    input_bytes = sum(len(source.encode()) for source in sources)
+    cases = {}
+    for case, phases in PHASES.items():
+        cases[case] = {"peak_memory_bytes": peak_memory(
+            sources, table, case == "tree"), "phases": {}}
+        for phase in phases:
+            seconds = min(times["{}/{}".format(case, phase)]
+                          for times in runs)
+            megabytes = (output_bytes if phase == "write"
+                         else input_bytes) / 1e6
+            cases[case]["phases"][phase] = {
+                "seconds": seconds,
+                "tokens_per_second": token_count / seconds if seconds
+                else None,
+                "mb_per_second": megabytes / seconds if seconds else None,
+            }
+    return {
+        "files": len(sources),
+        "tokens": token_count,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "cases": cases,
+    }
+
+
+def main(argv: typing.List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmark",
+        description="Benchmark the Jack analyzer on a generated corpus.")
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="benchmark the .jack files of DIR instead")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--subroutines", type=int, default=10)
+    parser.add_argument("--statements", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=3,
+                        help="how deep expressions are nested")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="time this many passes and keep the best")
+    parser.add_argument("--table", action="store_true",
+                        help="parse with the table driven TableEngine")
+    parser.add_argument("--output", default="benchmark.json",
+                        help="where to write the json report")
+    args = parser.parse_args(argv)
+    corpus = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if args.corpus:
+            paths = [os.path.join(args.corpus, name)
+                     for name in sorted(os.listdir(args.corpus))
+                     if name.lower().endswith(".jack")]
+            corpus["directory"] = args.corpus
+        else:
+            paths = generate_corpus(
+                directory, args.files, args.subroutines, args.statements,
+                args.depth, args.seed)
+            corpus.update(files=args.files, subroutines=args.subroutines,
+                          statements=args.statements, depth=args.depth,
+                          seed=args.seed)
+        sources = []
+        for path in paths:
+            with open(path, 'r') as input_file:
+                sources.append(input_file.read())
+    report = run(sources, args.repeat, args.table)
+    report["corpus"] = corpus
+    report["engine"] = JackAnalyzer.engine_class(args.table).__name__
+    report["python"] = platform.python_version()
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    for case, result in report["cases"].items():
+        for phase, timing in result["phases"].items():
+            print("{:<16} {:8.3f}s {:12.0f} tokens/s {:8.2f} MB/s".format(
+                "{}/{}".format(case, phase) if phase != case else case,
+                timing["seconds"], timing["tokens_per_second"] or 0,
+                timing["mb_per_second"] or 0))
+        print("{:<16} peak memory {:.1f} MB".format(
+            case, result["peak_memory_bytes"] / 1e6))
+    print("report written to {}".format(args.output), file=sys.stderr)
@@ -0,0 +1,607 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the analyzer: every mode writes the same XML. Run with
+python -m pytest.
+"""
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import zipfile
+from xml.dom import minidom
+
+import pytest
+
+import JackAnalyzer
+from JackTokenizer import JackTokenizer
+from RunStats import FileStats
+from XmlWriter import XmlWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMTEST = os.path.join(ROOT, "samtest")
+DATA = os.path.join(ROOT, "tests", "data")
+
+# a small class that has every kind of statement and term
+POINT = """\
+/** A point, with every kind of statement and term. */
+class Point {
+    field int x, y;
+    static int count;
+
+    constructor Point new(int ax, int ay) {
+        let x = ax;
+        let y = ay;
+        let count = count + 1;
+        return this;
+    }
+
+    method int distance(Point other, boolean manhattan) {
+        var int dx, dy;
+        var Array cache;
+        let dx = Math.abs(x - other.getX());
+        let dy = Math.abs(y - other.getY());
+        if (manhattan & ~(dx = 0)) {
+            return dx + dy;
+        } else {
+            let cache = Array.new(2);
+            let cache[0] = dx * dx;
+            let cache[1] = -(dy * dy);
+        }
+        while ((dx > 0) | (dy < 0)) {
+            let dx = dx / 2;
+        }
+        do Output.printString("a < b & c > d");
+        return Math.sqrt(cache[0] - cache[1]);
+    }
+
+    method int getX() { return x; }
+    method int getY() { return y; }
+    function void reset() { let count = null; return; }
+}
+"""
+
+CORPUS = {"Point.jack": POINT}
+
+
+def analyze(text, **options):
+    """The XML that analyze_file writes for a text."""
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(text), output, **options)
+    return output.getvalue()
+
+
+def sample():
+    with open(os.path.join(SAMTEST, "func_dec.jack"), 'r') as sample_file:
+        return sample_file.read()
+
+
+def outputs(directory):
+    """The XML outputs of a directory, by file name."""
+    found = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith("test.xml"):
+            with open(os.path.join(directory, name), 'r') as output_file:
+                found[name] = output_file.read()
+    return found
+
+
+def write_corpus(directory, sources=None):
+    """Writes the sources (the corpus by default) and the samtest
+    subroutine into a directory."""
+    os.makedirs(directory, exist_ok=True)
+    for name, text in (sources or CORPUS).items():
+        with open(os.path.join(directory, name), 'w') as source_file:
+            source_file.write(text)
+    shutil.copy(os.path.join(SAMTEST, "func_dec.jack"), directory)
+    return str(directory)
+
+
+def write_unreadable(directory, name="Bad.jack"):
+    """Writes a source that is not utf-8, which fails in every mode."""
+    with open(os.path.join(directory, name), 'wb') as bad_file:
+        bad_file.write(b"class Bad { \xff }")
+
+
+def run_command(*argv):
+    """Runs JackAnalyzer.py as the JackAnalyzer script does."""
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT, "JackAnalyzer.py")] + list(argv),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+
+def test_streaming_writes_the_same_xml():
+    for text in (POINT, sample()):
+        assert analyze(text, streaming=True) == analyze(text)
+
+
+def test_command_line_stream(tmp_path):
+    default = write_corpus(tmp_path / "default")
+    stream = write_corpus(tmp_path / "stream")
+    assert run_command(default).returncode == 0
+    assert run_command("--stream", stream).returncode == 0
+    assert outputs(stream) == outputs(default)
+    assert list(outputs(stream)) == ["Pointtest.xml", "func_dectest.xml"]
+
+
+def test_let_writes_the_array_index():
+    xml = analyze("function void f() { let a[i] = 1; return; }")
+    assert "<symbol> [ </symbol>" in xml
+    assert "<symbol> ] </symbol>" in xml
+
+
+def test_compact_writes_the_same_tags():
+    text = POINT
+    assert analyze(text, compact=True) == "".join(
+        line.lstrip() for line in analyze(text).splitlines(True))
+
+
+def test_empty_argument_list():
+    xml = analyze("function void f() { do g(); return; }")
+    assert "<expressionList>\n" in xml
+
+
+def test_tree_writes_the_same_xml(tmp_path):
+    for text in (POINT, sample()):
+        output = io.StringIO()
+        JackAnalyzer.parse_file(io.StringIO(text)).write_xml(
+            XmlWriter(output))
+        assert output.getvalue() == analyze(text)
+    default = write_corpus(tmp_path / "default")
+    tree = write_corpus(tmp_path / "tree")
+    assert run_command(default).returncode == 0
+    assert run_command("--tree", tree).returncode == 0
+    assert outputs(tree) == outputs(default)
+
+
+def test_jobs_write_the_same_outputs(tmp_path):
+    sources = {"Point{}.jack".format(i): POINT.replace(
+        "Point", "Point{}".format(i)) for i in range(6)}
+    serial = write_corpus(tmp_path / "serial", sources)
+    parallel = write_corpus(tmp_path / "parallel", sources)
+    # a file that cannot be read, in the middle of the listing
+    for directory in (serial, parallel):
+        write_unreadable(directory, "Point3.jack")
+    serial_run = run_command("--jobs", "1", serial)
+    parallel_run = run_command("--jobs", "2", parallel)
+    assert serial_run.returncode == parallel_run.returncode == 1
+    assert outputs(parallel) == outputs(serial)
+    # the errors are reported in the order of the files either way
+    assert parallel_run.stderr.replace(parallel, serial) == serial_run.stderr
+    assert parallel_run.stderr.startswith(
+        os.path.join(parallel, "Point3.jack") + ": ")
+
+
+def test_cache_skips_unchanged_files(tmp_path):
+    directory = write_corpus(tmp_path)
+
+    def cache_stats(*options):
+        result = run_command("--cache", "--cache-stats", *options, directory)
+        assert result.returncode == 0, result.stderr
+        return result.stdout.splitlines()[-1]
+
+    assert cache_stats() == "cache: 0 hits, 2 misses (0% hit rate)"
+    expected = outputs(directory)
+    assert cache_stats() == "cache: 2 hits, 0 misses (100% hit rate)"
+    assert outputs(directory) == expected
+    with open(os.path.join(directory, "Point.jack"), 'a') as source_file:
+        source_file.write("// edited\n")
+    assert cache_stats() == "cache: 1 hits, 1 misses (50% hit rate)"
+    assert cache_stats("--compact") == "cache: 0 hits, 2 misses (0% hit rate)"
+    assert cache_stats("--clear-cache") == \
+        "cache: 0 hits, 2 misses (0% hit rate)"
+
+
+def test_mmap_writes_the_same_xml(tmp_path):
+    for text in (POINT, sample()):
+        output = io.StringIO()
+        JackAnalyzer.analyze_file(text.encode(), output)
+        assert output.getvalue() == analyze(text)
+    default = write_corpus(tmp_path / "default")
+    mapped = write_corpus(tmp_path / "mapped")
+    # an empty file cannot be mapped, but it is still read, and fails
+    for directory in (default, mapped):
+        open(os.path.join(directory, "Empty.jack"), 'w').close()
+    assert run_command(default).returncode == 1
+    result = run_command("--mmap", mapped)
+    assert result.returncode == 1
+    assert "Empty.jack: JackSyntaxError: unexpected end of input" \
+        in result.stderr
+    assert outputs(mapped) == outputs(default)
+
+
+def test_mmap_reads_unicode_like_text(tmp_path):
+    sources = {"U.jack": "class U {\u00a0field int classé;\n  method void f()"
+                         " {\u00a0let classé = 1; return; }\n}\n"}
+    default = write_corpus(tmp_path / "default", sources)
+    mapped = write_corpus(tmp_path / "mapped", sources)
+    assert run_command(default).returncode == 0
+    result = run_command("--mmap", mapped)
+    assert result.returncode == 0, result.stderr
+    assert outputs(mapped) == outputs(default)
+    assert "<identifier> classé </identifier>" in outputs(mapped)["Utest.xml"]
+
+
+def test_the_analyzer_is_quiet(tmp_path):
+    directory = write_corpus(tmp_path)
+    result = run_command(directory)
+    assert (result.returncode, result.stdout, result.stderr) == (0, "", "")
+    result = run_command("-v", directory)
+    assert result.stderr.splitlines() == [
+        "{} -> {}".format(os.path.join(directory, name + ".jack"),
+                          os.path.join(directory, name + "test.xml"))
+        for name in ("Point", "func_dec")]
+
+
+def test_stats_count_the_file(tmp_path):
+    directory = write_corpus(tmp_path)
+    result = run_command("--stats", "--stats-format", "json", directory)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    point = report["files"][0]
+    assert point["path"] == os.path.join(directory, "Point.jack")
+    with open(point["path"], 'rb') as source_file:
+        assert point["bytes_read"] == len(source_file.read())
+    xml = outputs(directory)["Pointtest.xml"]
+    assert point["bytes_written"] == len(xml.encode())
+    assert point["tokens"] == len(JackTokenizer(io.StringIO(POINT)).tokens)
+    assert point["nonterminals"] == len(re.findall(r"(?m)^ *<\w+>$", xml))
+    assert point["tags"]["class"] == 1
+    assert point["tags"]["subroutineDec"] == 5
+    assert sum(point["tags"].values()) == point["nonterminals"]
+    # every engine opens the same tags
+    result = run_command("--stats", "--stats-format", "json", "--table",
+                         directory)
+    assert json.loads(result.stdout)["files"][0]["tags"] == point["tags"]
+    total = report["total"]
+    assert total["tokens"] == sum(
+        file_stats["tokens"] for file_stats in report["files"])
+    # the text report has a line for every file and the totals
+    result = run_command("--stats", directory)
+    lines = result.stdout.splitlines()
+    assert lines[0].startswith(point["path"] + ": tokenize ")
+    assert lines[2].startswith("total: tokenize ")
+    assert "{} tokens".format(total["tokens"]) in lines[2]
+
+
+@pytest.mark.parametrize("expression, terms, expressions", [
+    ("(" * 2000 + "1" + ")" * 2000, 2001, 2001),
+    ("-~" * 2000 + "1", 4001, 1),
+    ("a[" * 2000 + "1" + "]" * 2000, 2001, 2001),
+    ("f(" * 2000 + ")" * 2000, 2000, 2000),
+], ids=["parentheses", "unary", "index", "call"])
+def test_deep_expressions_do_not_recurse(expression, terms, expressions):
+    # far deeper than the recursion limit of a recursive descent parser
+    xml = analyze("function void f() { let x = " + expression + "; }")
+    assert xml.count("<term>") == terms
+    assert xml.count("<expression>") == expressions
+    assert xml.endswith("</subroutineDec>\n")
+
+
+def test_check_writes_nothing(tmp_path):
+    directory = write_corpus(tmp_path, dict(
+        CORPUS,
+        **{"Bad.jack": "class Bad { function void f() { let x = ; } }"}))
+    for options in ([], ["--mmap"], ["--jobs", "2"]):
+        result = run_command("--check", *options, directory)
+        assert result.returncode == 1
+        assert result.stdout.splitlines() == [
+            os.path.join(directory, "Bad.jack")
+            + ": FAILED, expected a term at token 12 (';')",
+            os.path.join(directory, "Point.jack") + ": ok",
+            os.path.join(directory, "func_dec.jack") + ": ok"]
+        assert outputs(directory) == {}
+
+
+@pytest.mark.parametrize("text", [
+    "class A { function void f() { let x = ; } }",
+    "class A { function void f() { let x = 99999; } }",
+    "class A { function void f() { let x = 1; } } }",
+    "class A { function void f() { do x; } }",
+], ids=["term", "integer", "trailing", "call"])
+def test_check_reports_the_same_error_with_stats(tmp_path, text):
+    # with --stats the tags are counted, so the tokens are checked as they
+    # are parsed instead of all at once
+    path = str(tmp_path / "A.jack")
+    with open(path, 'w') as source_file:
+        source_file.write(text)
+    errors = set()
+    for options in ({}, {"stats": FileStats(path)}):
+        with open(path) as input_file:
+            errors.add(JackAnalyzer.check_file(input_file, **options))
+    assert len(errors) == 1 and None not in errors
+
+
+def test_check_stats_count_the_file(tmp_path):
+    directory = write_corpus(tmp_path)
+    result = run_command("--check", "--stats", "--stats-format", "json",
+                         directory)
+    assert result.returncode == 0, result.stderr
+    # the report follows the ok of every file
+    report = result.stdout[result.stdout.index("{"):]
+    point = json.loads(report)["files"][0]
+    with open(point["path"], 'rb') as source_file:
+        assert point["bytes_read"] == len(source_file.read())
+    assert point["bytes_written"] == 0
+    assert point["tokens"] == len(JackTokenizer(io.StringIO(POINT)).tokens)
+    assert point["tags"]["subroutineDec"] == 5
+
+
+def test_main_runs_in_process(tmp_path):
+    directory = write_corpus(tmp_path)
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    # relative paths are relative to cwd, output goes to the given streams
+    status = JackAnalyzer.main(["--check", "Point.jack"], directory,
+                               stdout, stderr)
+    assert (status, stdout.getvalue(), stderr.getvalue()) == (
+        0, os.path.join(directory, "Point.jack") + ": ok\n", "")
+    # a bad command line returns its status instead of exiting
+    assert JackAnalyzer.main([], directory, stdout, stderr) == 2
+    assert "usage: JackAnalyzer" in stderr.getvalue()
+
+
+def test_stdin_to_stdout():
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "JackAnalyzer.py"), "-"],
+        input=POINT, stdout=subprocess.PIPE, universal_newlines=True)
+    assert (result.returncode, result.stdout) == (0, analyze(POINT))
+    stdout = io.StringIO()
+    status = JackAnalyzer.main(["--check", "-"], None, stdout, io.StringIO(),
+                               io.StringIO("class A { field; }"))
+    assert status == 1
+    assert stdout.getvalue().startswith("-: FAILED, ")
+
+
+def test_manifest_paths_are_relative_to_cwd(tmp_path):
+    directory = write_corpus(tmp_path / "src")
+    os.makedirs(str(tmp_path / "out"))
+    manifest = ("# input, then output\n"
+                "src/Point.jack\tout/Point.xml\n"
+                "\n"
+                "src/func_dec.jack\n")
+    (tmp_path / "batch.txt").write_text(manifest)
+    stderr = io.StringIO()
+    assert JackAnalyzer.main(["--manifest", "batch.txt"], str(tmp_path),
+                             io.StringIO(), stderr) == 0, stderr.getvalue()
+    assert (tmp_path / "out" / "Point.xml").read_text() == analyze(POINT)
+    assert list(outputs(directory)) == ["func_dectest.xml"]
+    # the manifest can also come from stdin, and the pairs from spaces
+    assert JackAnalyzer.main(
+        ["--check", "--manifest", "-"], str(tmp_path), io.StringIO(),
+        io.StringIO(), io.StringIO("src/Point.jack out/Point.xml\n")) == 0
+    stderr = io.StringIO()
+    assert JackAnalyzer.main(
+        ["--manifest", "-"], str(tmp_path), io.StringIO(), stderr,
+        io.StringIO("a b c\n")) == 2
+    assert stderr.getvalue() == "JackAnalyzer: --manifest: line 1 of the " \
+        "manifest has more than two paths\n"
+
+
+def test_pipeline_writes_the_same_outputs(tmp_path):
+    sources = {"Point{}.jack".format(i): POINT.replace(
+        "Point", "Point{}".format(i)) for i in range(12)}
+    default = write_corpus(tmp_path / "default", sources)
+    write_unreadable(default)
+    default_run = run_command(default)
+    for options in (["--queue-size", "1"], ["--jobs", "2"]):
+        directory = write_corpus(tmp_path / options[0].strip("-"), sources)
+        write_unreadable(directory)
+        result = run_command("--pipeline", *options, directory)
+        assert result.returncode == default_run.returncode == 1
+        # (a normal run leaves the empty output of the file that failed)
+        assert outputs(directory) == {
+            name: xml for name, xml in outputs(default).items()
+            if name != "Badtest.xml"}
+        # the errors are reported in the same order
+        assert result.stderr.replace(directory, default) == default_run.stderr
+
+
+def test_binary_prints_back_the_same_xml(tmp_path):
+    default = write_corpus(tmp_path / "default")
+    assert run_command(default).returncode == 0
+    for options in ([], ["--tree"], ["--pipeline"]):
+        directory = write_corpus(tmp_path / "binary{}".format(len(options)))
+        assert run_command("--binary", *options, directory).returncode == 0
+        for name, expected in outputs(default).items():
+            result = subprocess.run(
+                [sys.executable, os.path.join(ROOT, "BinaryTree.py"),
+                 os.path.join(directory, name[:-len("test.xml")] + ".jbt")],
+                stdout=subprocess.PIPE, universal_newlines=True)
+            assert result.stdout == expected
+
+
+@pytest.mark.parametrize("suffix", [".zip", ".tar", ".tar.gz", ".tar.xz"])
+def test_archive_holds_the_outputs(tmp_path, suffix):
+    default = write_corpus(tmp_path / "default")
+    assert run_command(default).returncode == 0
+    directory = write_corpus(tmp_path / "src")
+    archive_path = str(tmp_path / ("out" + suffix))
+    result = run_command("--archive", archive_path, directory)
+    assert result.returncode == 0, result.stderr
+    if suffix == ".zip":
+        with zipfile.ZipFile(archive_path) as archive:
+            found = {name: archive.read(name).decode()
+                     for name in archive.namelist()}
+    else:
+        with tarfile.open(archive_path) as archive:
+            found = {member.name: archive.extractfile(member).read().decode()
+                     for member in archive.getmembers()}
+    assert found == outputs(default)
+    # nothing is written next to the sources
+    assert outputs(directory) == {}
+
+
+def test_gzip_archive_has_a_member_per_output(tmp_path):
+    default = write_corpus(tmp_path / "default")
+    assert run_command(default).returncode == 0
+    archive_path = str(tmp_path / "out.gz")
+    assert run_command("--archive", archive_path,
+                       write_corpus(tmp_path / "src")).returncode == 0
+    with gzip.open(archive_path, 'rt') as archive:
+        assert archive.read() == "".join(outputs(default).values())
+    assert run_command("--archive", archive_path, "--cache",
+                       default).returncode == 2
+
+
+def test_vm_compiles_every_class(tmp_path):
+    directory = write_corpus(tmp_path)
+    result = run_command("--vm", directory)
+    # the samtest subroutine is not a class, and cannot be compiled
+    assert result.returncode == 1
+    assert result.stderr.startswith(
+        os.path.join(directory, "func_dec.jack") + ": JackSyntaxError: ")
+    with open(os.path.join(directory, "Point.vm"), 'r') as vm_file:
+        code = vm_file.read().splitlines()
+    assert code[:4] == ["function Point.new 0", "push constant 2",
+                        "call Memory.alloc 1", "pop pointer 0"]
+    assert [line for line in code if line.startswith("function ")] == [
+        "function Point.new 0", "function Point.distance 3",
+        "function Point.getX 0", "function Point.getY 0",
+        "function Point.reset 0"]
+    assert outputs(directory) == {}
+
+
+def test_fold_writes_the_folded_tree(tmp_path):
+    sources = dict(CORPUS, **{
+        "A.jack": "class A { function int f() { return 2 * 3; } }"})
+    default = write_corpus(tmp_path / "default", sources)
+    folded = write_corpus(tmp_path / "folded", sources)
+    assert run_command(default).returncode == 0
+    assert run_command("--fold", folded).returncode == 0
+    assert "<integerConstant> 6 </integerConstant>" in \
+        outputs(folded)["Atest.xml"]
+    assert "<integerConstant> 6 </integerConstant>" not in \
+        outputs(default)["Atest.xml"]
+    assert outputs(folded)["Pointtest.xml"] == \
+        outputs(default)["Pointtest.xml"]
+
+
+def test_table_writes_the_same_xml(tmp_path):
+    default = write_corpus(tmp_path / "default")
+    assert run_command(default).returncode == 0
+    for options in (["--table"], ["--table", "--stream"],
+                    ["--table", "--tree"]):
+        directory = write_corpus(tmp_path / "_".join(options).strip("-"))
+        assert run_command(*options, directory).returncode == 0
+        assert outputs(directory) == outputs(default)
+
+
+def test_incremental_matches_a_full_parse(tmp_path):
+    directory = write_corpus(tmp_path / "incremental")
+    default = write_corpus(tmp_path / "default")
+    assert run_command(default).returncode == 0
+    for _ in range(2):
+        assert run_command("--incremental", directory).returncode == 0
+        assert outputs(directory) == outputs(default)
+    edited = {"Point.jack": POINT.replace(
+        "method int getX() { return x; }",
+        "method int getX() { var int z; let z = x * 2; return z; }")}
+    write_corpus(directory, edited)
+    result = run_command("--incremental", "-v", directory)
+    assert result.returncode == 0
+    # only the edited subroutine was parsed again
+    assert "Point.jack: 1 members parsed, 6 reused" in result.stderr
+    full = write_corpus(tmp_path / "full", edited)
+    assert run_command(full).returncode == 0
+    assert outputs(directory) == outputs(full)
+    assert outputs(directory) != outputs(default)
+
+
+def test_verify_compares_with_the_references(tmp_path):
+    references = write_corpus(tmp_path / "references")
+    assert run_command(references).returncode == 0
+    for name in outputs(references):
+        os.rename(os.path.join(references, name), os.path.join(
+            references, name[:-len("test.xml")] + ".xml"))
+    directory = write_corpus(tmp_path / "outputs")
+    result = run_command("--verify", references, directory)
+    assert result.returncode == 0, result.stdout
+    assert result.stdout == "verified 2 files, 0 differ\n"
+    with open(os.path.join(references, "Point.xml"), 'r+') as reference_file:
+        end_line = len(reference_file.readlines()) + 1
+        reference_file.write("<extra/>\n")
+    result = run_command("--verify", references, directory)
+    assert result.returncode == 1
+    assert result.stdout.splitlines() == [
+        os.path.join(directory, "Pointtest.xml")
+        + ": expected '<extra/>' ({}:{}:1), got end of file".format(
+            os.path.join(references, "Point.xml"), end_line),
+        "verified 2 files, 1 differ"]
+
+
+def test_output_is_well_formed_xml():
+    xml = analyze(POINT)
+    assert minidom.parseString(xml).documentElement.tagName == "class"
+    assert "<stringConstant> a &lt; b &amp; c &gt; d </stringConstant>" in xml
+    assert "<symbol> &amp; </symbol>" in xml
+
+
+def test_verify_accepts_a_course_reference(tmp_path):
+    shutil.copy(os.path.join(DATA, "Main.jack"), str(tmp_path))
+    with open(os.path.join(DATA, "Main.xml"), 'rb') as reference_file:
+        # the reference is as the course tools write it, not as we do
+        assert b"\r\n" in reference_file.read()
+    result = run_command("--verify", DATA, str(tmp_path))
+    assert result.returncode == 0, result.stdout
+    assert result.stdout == "verified 1 files, 0 differ\n"
+
+
+@pytest.mark.skipif(not os.environ.get("JACK_COURSE_DIR"),
+                    reason="JACK_COURSE_DIR is not set")
+def test_verify_against_the_course_files(tmp_path):
+    # the references in tests/data were written by hand, these are the
+    # official ones: JACK_COURSE_DIR is the course's projects/10 directory,
+    # whose programs (ArrayTest, Square, ...) each have <name>.xml files
+    course = os.environ["JACK_COURSE_DIR"]
+    programs = [os.path.join(course, name) for name in sorted(os.listdir(
+        course)) if os.path.isdir(os.path.join(course, name))]
+    verified = 0
+    for program in programs:
+        names = [name for name in os.listdir(program)
+                 if name.endswith(".jack") and os.path.exists(os.path.join(
+                     program, name[:-len(".jack")] + ".xml"))]
+        if not names:
+            continue
+        directory = tmp_path / os.path.basename(program)
+        directory.mkdir()
+        for name in names:
+            shutil.copy(os.path.join(program, name), str(directory))
+        result = run_command("--verify", program, str(directory))
+        assert result.returncode == 0, result.stdout
+        verified += len(names)
+    assert verified, "no .jack file with a reference in " + course
+
+
+def test_verify_reports_every_difference(tmp_path):
+    references = tmp_path / "references"
+    references.mkdir()
+    with open(os.path.join(DATA, "Main.xml"), 'r', newline='') \
+            as reference_file:
+        reference = reference_file.read()
+    # quoted strings and unescaped symbols, like the output before the
+    # XmlWriter escaped them
+    (references / "Main.xml").write_text(reference.replace(
+        "<stringConstant> done </stringConstant>",
+        '<stringConstant> "done" </stringConstant>').replace(
+        "<symbol> &amp; </symbol>", "<symbol> & </symbol>"))
+    shutil.copy(os.path.join(DATA, "Main.jack"), str(tmp_path))
+    result = run_command("--verify", str(references), str(tmp_path))
+    assert result.returncode == 1
+    lines = result.stdout.splitlines()
+    assert lines[-1] == "verified 1 files, 1 differ"
+    assert len(lines) == 3
+    assert lines[0].startswith(os.path.join(
+        str(tmp_path), "Maintest.xml:84:22: expected '&' ("))
+    assert lines[0].endswith("Main.xml:84:22), got '&amp;'")
+    assert "expected '\"done\"' (" in lines[1]
+    assert lines[1].endswith("got 'done'")
@@ -0,0 +1,78 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the benchmark corpus generator and harness. Run with
+python -m pytest.
+"""
+import io
+import json
+import os
+
+import JackAnalyzer
+from benchmark import harness
+from benchmark.corpus import generate_corpus, generate_source
+
+
+def test_the_corpus_depends_only_on_the_seed(tmp_path):
+    assert generate_source(7, "Main") == generate_source(7, "Main")
+    assert generate_source(7, "Main") != generate_source(8, "Main")
+    first = generate_corpus(str(tmp_path / "first"), files=3, seed=7)
+    second = generate_corpus(str(tmp_path / "second"), files=3, seed=7)
+    assert [os.path.basename(path) for path in first] == [
+        "Class0.jack", "Class1.jack", "Class2.jack"]
+    for first_path, second_path in zip(first, second):
+        with open(first_path, 'r') as first_file, \
+                open(second_path, 'r') as second_file:
+            assert first_file.read() == second_file.read()
+
+
+def test_the_corpus_is_valid_jack():
+    for seed in range(5):
+        source = generate_source(seed, "Main", subroutines=4, depth=5)
+        output = io.StringIO()
+        JackAnalyzer.analyze_file(io.StringIO(source), output)
+        xml = output.getvalue()
+        assert xml.startswith("<class>\n")
+        assert xml.endswith("</class>\n")
+        assert xml.count("<subroutineDec>") == 4
+
+
+def test_the_harness_writes_a_report(tmp_path):
+    report_path = str(tmp_path / "report.json")
+    harness.main(["--files", "2", "--subroutines", "2", "--statements", "3",
+                  "--repeat", "1", "--output", report_path])
+    with open(report_path, 'r') as report_file:
+        report = json.load(report_file)
+    assert report["files"] == 2
+    assert report["corpus"]["seed"] == 0
+    assert report["engine"] == "CompilationEngine"
+    # the default path of the analyzer, and --tree phase by phase
+    assert sorted(report["cases"]) == ["analyze", "tree"]
+    assert list(report["cases"]["analyze"]["phases"]) == ["analyze"]
+    assert sorted(report["cases"]["tree"]["phases"]) == [
+        "parse", "tokenize", "write"]
+    for case in report["cases"].values():
+        assert case["peak_memory_bytes"] > 0
+        assert all(phase["seconds"] > 0 for phase in case["phases"].values())
+
+
+def test_the_harness_times_the_analyzer(monkeypatch):
+    # the analyze case is JackAnalyzer.analyze_file itself
+    calls = []
+    analyze_file = JackAnalyzer.analyze_file
+
+    def counted(*args, **kwargs):
+        calls.append(kwargs.get("table"))
+        analyze_file(*args, **kwargs)
+
+    monkeypatch.setattr(JackAnalyzer, "analyze_file", counted)
+    source = generate_source(0, "Main", subroutines=2)
+    times = harness.time_phases([source], table=True)
+    assert calls == [True]
+    assert sorted(times) == ["analyze/analyze", "tree/parse",
+                             "tree/tokenize", "tree/write"]
+    assert harness.analyze(source) == harness.write(
+        harness.parse(harness.tokenize(source)))
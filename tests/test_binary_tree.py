@@ -0,0 +1,61 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the binary parse tree format. Run with python -m pytest.
+"""
+import io
+import os
+
+import pytest
+
+import JackAnalyzer
+from BinaryTree import MAGIC, BinaryTreeReader, encode_varint, read_tree
+from XmlWriter import XmlWriter
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def source():
+    with open(os.path.join(DATA, "Statements.jack"), 'r') as source_file:
+        return source_file.read()
+
+
+def encode(text, **options):
+    """The binary parse tree of a source."""
+    output = io.BytesIO()
+    JackAnalyzer.analyze_file(io.StringIO(text), output, binary=True,
+                              **options)
+    return output.getvalue()
+
+
+def xml(tree):
+    output = io.StringIO()
+    tree.write_xml(XmlWriter(output))
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 16383, 16384, 2 ** 40])
+def test_varints_round_trip(value):
+    output = bytearray()
+    encode_varint(value, output)
+    assert len(output) == max(1, (value.bit_length() + 6) // 7)
+    assert BinaryTreeReader(bytes(output)).varint() == value
+
+
+def test_the_tree_round_trips_to_the_same_xml():
+    text = source()
+    data = encode(text)
+    assert data.startswith(MAGIC)
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(text), output)
+    assert xml(read_tree(data)) == output.getvalue()
+    # a much smaller file than the XML
+    assert len(data) * 5 < len(output.getvalue())
+
+
+def test_other_files_are_refused():
+    with pytest.raises(ValueError):
+        read_tree(b"<class>\n</class>\n")
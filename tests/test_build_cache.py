@@ -0,0 +1,62 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the content hash BuildCache. Run with python -m pytest.
+"""
+import BuildCache
+from BuildCache import BuildCache as Cache
+
+
+def source(tmp_path, text="class A { }"):
+    path = tmp_path / "A.jack"
+    path.write_text(text)
+    (tmp_path / "Atest.xml").write_text("<class>\n</class>\n")
+    return str(path), str(tmp_path / "Atest.xml")
+
+
+def test_a_recorded_output_is_a_hit(tmp_path):
+    input_path, output_path = source(tmp_path)
+    cache = Cache(str(tmp_path))
+    key = cache.key(input_path, [])
+    assert not cache.is_fresh(output_path, key)
+    cache.record(output_path, key)
+    cache.save()
+    # a new run reads the manifest the last one saved
+    cache = Cache(str(tmp_path))
+    assert cache.is_fresh(output_path, cache.key(input_path, []))
+    assert cache.stats() == "cache: 1 hits, 0 misses (100% hit rate)"
+
+
+def test_the_key_changes_with_the_source_and_the_options(tmp_path):
+    input_path, output_path = source(tmp_path)
+    cache = Cache(str(tmp_path))
+    cache.record(output_path, cache.key(input_path, []))
+    assert not cache.is_fresh(output_path, cache.key(input_path, ["compact"]))
+    source(tmp_path, "class A { field int x; }")
+    assert not cache.is_fresh(output_path, cache.key(input_path, []))
+    assert cache.stats() == "cache: 0 hits, 2 misses (0% hit rate)"
+
+
+def test_a_new_version_misses(tmp_path, monkeypatch):
+    input_path, output_path = source(tmp_path)
+    cache = Cache(str(tmp_path))
+    cache.record(output_path, cache.key(input_path, []))
+    cache.save()
+    monkeypatch.setattr(BuildCache, "ANALYZER_VERSION",
+                        BuildCache.ANALYZER_VERSION + ".1")
+    # the manifest of the old version is not even read
+    cache = Cache(str(tmp_path))
+    assert cache.entries == {}
+    assert not cache.is_fresh(output_path, cache.key(input_path, []))
+
+
+def test_a_deleted_output_misses(tmp_path):
+    input_path, output_path = source(tmp_path)
+    cache = Cache(str(tmp_path))
+    key = cache.key(input_path, [])
+    cache.record(output_path, key)
+    (tmp_path / "Atest.xml").unlink()
+    assert not cache.is_fresh(output_path, key)
@@ -0,0 +1,120 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the persistent ClassIndex. Run with python -m pytest.
+"""
+import os
+
+import ClassIndex
+from ClassIndex import ClassIndex as Index
+
+SHAPE = """\
+class Shape {
+    field int x, y;
+    static Array shapes;
+    constructor Shape new(int ax, int ay) { let x = ax; return this; }
+    method void draw() { return; }
+}
+"""
+
+CIRCLE = """\
+class Circle {
+    field Shape center;
+    method void draw() { return; }
+    function Circle unit(boolean filled, char c) { return null; }
+}
+"""
+
+
+def write(directory, name, text):
+    with open(os.path.join(str(directory), name), 'w') as source_file:
+        source_file.write(text)
+
+
+def index(directory, jobs=1):
+    index = Index(str(directory))
+    index.update(jobs)
+    index.save()
+    return index
+
+
+def test_the_declarations_are_indexed(tmp_path):
+    write(tmp_path, "Shape.jack", SHAPE)
+    write(tmp_path, "Circle.jack", CIRCLE)
+    found = index(tmp_path)
+    assert found.find_class("Shape")["fields"] == [
+        {"kind": "field", "type": "int", "name": "x"},
+        {"kind": "field", "type": "int", "name": "y"},
+        {"kind": "static", "type": "Array", "name": "shapes"}]
+    assert ClassIndex.format_signature(
+        "Circle", found.find_subroutine("Circle", "unit")) == \
+        "function Circle Circle.unit(boolean filled, char c)"
+    assert found.classes_defining("draw") == ["Circle", "Shape"]
+    assert found.find_class("Square") is None
+    assert found.errors() == {}
+    # a pool of processes builds the same index
+    parallel = Index(str(tmp_path))
+    parallel.files = {}
+    parallel.update(jobs=2)
+    assert parallel.parsed == 2
+    assert parallel.files == found.files
+
+
+def test_only_changed_files_are_parsed_again(tmp_path):
+    write(tmp_path, "Shape.jack", SHAPE)
+    write(tmp_path, "Circle.jack", CIRCLE)
+    index(tmp_path)
+    found = index(tmp_path)
+    assert (found.parsed, found.reused) == (0, 2)
+    # the same content with a new modification time is still fresh
+    write(tmp_path, "Shape.jack", SHAPE)
+    os.utime(str(tmp_path / "Shape.jack"), ns=(1, 1))
+    assert found.is_fresh("Shape.jack", str(tmp_path / "Shape.jack"))
+    write(tmp_path, "Circle.jack", CIRCLE.replace("unit", "unti"))
+    found = index(tmp_path)
+    assert (found.parsed, found.reused) == (1, 1)
+    assert found.classes_defining("unti") == ["Circle"]
+    os.remove(str(tmp_path / "Circle.jack"))
+    found = index(tmp_path)
+    assert found.find_class("Circle") is None
+    assert list(found.files) == ["Shape.jack"]
+
+
+def test_the_command_line_answers_from_the_index(tmp_path, capsys):
+    write(tmp_path, "Shape.jack", SHAPE)
+    write(tmp_path, "Circle.jack", CIRCLE)
+    assert ClassIndex.main([str(tmp_path), "--jobs", "1",
+                            "--subroutine", "draw"]) == 0
+    captured = capsys.readouterr()
+    assert captured.out == "method void Circle.draw()\n" \
+                           "method void Shape.draw()\n"
+    assert captured.err == \
+        "indexed 2 files (2 parsed, 0 unchanged), 2 classes\n"
+    assert ClassIndex.main([str(tmp_path), "--class", "Circle"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "class Circle (Circle.jack)", "  field Shape center",
+        "  method void Circle.draw()",
+        "  function Circle Circle.unit(boolean filled, char c)"]
+    assert ClassIndex.main([str(tmp_path), "--subroutine", "Shape.x"]) == 1
+
+
+def test_a_broken_file_keeps_its_last_good_entry(tmp_path):
+    write(tmp_path, "Shape.jack", SHAPE)
+    write(tmp_path, "Circle.jack", CIRCLE)
+    index(tmp_path)
+    # saved in the middle of an edit
+    write(tmp_path, "Circle.jack", CIRCLE.replace("return null;", "return"))
+    write(tmp_path, "Square.jack", "class Square { field int side; method")
+    found = index(tmp_path)
+    assert sorted(found.errors()) == ["Circle.jack", "Square.jack"]
+    assert found.classes_defining("unit") == ["Circle"]
+    # the declarations before the error are not indexed
+    assert found.find_class("Square") is None
+    write(tmp_path, "Circle.jack", CIRCLE.replace("unit", "origin"))
+    found = index(tmp_path)
+    assert sorted(found.errors()) == ["Square.jack"]
+    assert found.classes_defining("unit") == []
+    assert found.classes_defining("origin") == ["Circle"]
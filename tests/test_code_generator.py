@@ -0,0 +1,264 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the VM code generator: the commands of every statement and term,
+and the results of running the generated code. Run with python -m pytest.
+"""
+import io
+
+import pytest
+
+import JackAnalyzer
+from CodeGenerator import CodeGenerator
+from JackTokenizer import JackSyntaxError
+from VMWriter import VMWriter
+
+
+def compile_source(text, fold=True):
+    """The VM code of a class, as --vm writes it."""
+    output = io.StringIO()
+    CodeGenerator(JackAnalyzer.parse_file(io.StringIO(text)),
+                  VMWriter(output), fold).compile()
+    return output.getvalue().splitlines()
+
+
+def compile_body(body, variables="var Array a; var int i;"):
+    """The VM code of the statements of a function Main.f."""
+    code = compile_source("class Main { static String s; function void f() {"
+                          + variables + body + " return; } }")
+    assert code[0].startswith("function Main.f ")
+    assert code[-2:] == ["push constant 0", "return"]
+    return code[1:-2]
+
+
+def test_let_with_arrays():
+    # the address of the target is computed before the value
+    assert compile_body("let a[i] = a[i + 1];") == [
+        "push local 0", "push local 1", "add",
+        "push local 0", "push local 1", "push constant 1", "add", "add",
+        "pop pointer 1", "push that 0",
+        "pop temp 0", "pop pointer 1", "push temp 0", "pop that 0"]
+
+
+def test_constructor_method_and_function_calls():
+    assert compile_source("""class Point {
+        field int x, y;
+        constructor Point new(int ax) { let x = ax; return this; }
+        method int getX() { return x; }
+        method int twice() { return getX() + Point.zero(); }
+        function int zero() { return 0; }
+    }""") == [
+        "function Point.new 0",
+        "push constant 2", "call Memory.alloc 1", "pop pointer 0",
+        "push argument 0", "pop this 0", "push pointer 0", "return",
+        "function Point.getX 0",
+        "push argument 0", "pop pointer 0", "push this 0", "return",
+        "function Point.twice 0",
+        "push argument 0", "pop pointer 0",
+        "push pointer 0", "call Point.getX 1", "call Point.zero 0", "add",
+        "return",
+        "function Point.zero 0", "push constant 0", "return"]
+    # a method of a variable gets the variable as its first argument, and
+    # the value of a do is thrown away
+    assert compile_body("do a.dispose(i);") == [
+        "push local 0", "push local 1", "call Array.dispose 2",
+        "pop temp 0"]
+
+
+def test_string_constants():
+    assert compile_body('let s = "hi";') == [
+        "push constant 2", "call String.new 1",
+        "push constant 104", "call String.appendChar 2",
+        "push constant 105", "call String.appendChar 2",
+        "pop static 0"]
+
+
+def test_if_and_while_labels():
+    assert compile_body(
+        "if (i < 2) { let i = -i; } else { let i = ~i; }"
+        "while (true) { let i = i * 2; }"
+        "if (i) { }", "var int i;") == [
+        "push local 0", "push constant 2", "lt",
+        "if-goto IF_TRUE0", "goto IF_FALSE0", "label IF_TRUE0",
+        "push local 0", "neg", "pop local 0", "goto IF_END0",
+        "label IF_FALSE0", "push local 0", "not", "pop local 0",
+        "label IF_END0",
+        "label WHILE_EXP0", "push constant 0", "not", "not",
+        "if-goto WHILE_END0",
+        "push local 0", "push constant 2", "call Math.multiply 2",
+        "pop local 0", "goto WHILE_EXP0", "label WHILE_END0",
+        "push local 0", "if-goto IF_TRUE1", "goto IF_FALSE1",
+        "label IF_TRUE1", "label IF_FALSE1"]
+
+
+@pytest.mark.parametrize("text", [
+    "class Main { function void f() { let x = 1; return; } }",
+    "function void f() { return; }",
+])
+def test_errors_are_syntax_errors(text):
+    with pytest.raises(JackSyntaxError):
+        compile_source(text)
+
+
+def word(value):
+    """A number wrapped into 16 bits, like the Hack ALU does."""
+    return ((value + 0x8000) & 0xffff) - 0x8000
+
+
+class VirtualMachine:
+    """Just enough of the VM emulator to run the generated code, with
+    Memory.alloc, String and Math.multiply/divide built in."""
+
+    def __init__(self, code):
+        self.code = code
+        self.labels = {}
+        function = None
+        for line, command in enumerate(code):
+            words = command.split()
+            if words[0] == "function":
+                function = words[1]
+                self.labels[function] = line
+            elif words[0] == "label":
+                self.labels[function, words[1]] = line
+        self.ram = [0] * 4096
+        self.heap = 2048
+
+    def run(self, function, *args):
+        stack = list(args)
+        # (return line, function, local, argument, this, that) of the callers
+        frames = []
+        local, argument, pointers = [], list(args), [0, 0]
+        line = self.labels[function]
+        while True:
+            words = self.code[line].split()
+            line += 1
+            command = words[0]
+            if command in ("push", "pop"):
+                segment, index = words[1], int(words[2])
+                if segment == "constant":
+                    stack.append(index)
+                    continue
+                if segment in ("local", "argument", "pointer"):
+                    memory = {"local": local, "argument": argument,
+                              "pointer": pointers}[segment]
+                    address = index
+                else:
+                    memory = self.ram
+                    address = {"this": pointers[0], "that": pointers[1],
+                               "temp": 5, "static": 16}[segment] + index
+                if command == "push":
+                    stack.append(memory[address])
+                else:
+                    memory[address] = stack.pop()
+            elif command == "function":
+                local = [0] * int(words[2])
+            elif command == "call":
+                n_args = int(words[2])
+                args = stack[len(stack) - n_args:]
+                del stack[len(stack) - n_args:]
+                builtin = self.builtin(words[1], args)
+                if builtin is not None:
+                    stack.append(builtin)
+                    continue
+                frames.append((line, function, local, argument,
+                               list(pointers)))
+                function = words[1]
+                line = self.labels[function]
+                argument = args
+            elif command == "return":
+                if not frames:
+                    return stack.pop()
+                line, function, local, argument, pointers = frames.pop()
+            elif command == "label":
+                pass
+            elif command == "goto":
+                line = self.labels[function, words[1]]
+            elif command == "if-goto":
+                if stack.pop():
+                    line = self.labels[function, words[1]]
+            elif command in ("neg", "not"):
+                value = stack.pop()
+                stack.append(word(-value if command == "neg" else ~value))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(word({
+                    "add": left + right, "sub": left - right,
+                    "and": left & right, "or": left | right,
+                    "eq": -(left == right), "lt": -(left < right),
+                    "gt": -(left > right)}[command]))
+
+    def builtin(self, name, args):
+        if name in ("Memory.alloc", "Array.new", "String.new"):
+            address = self.heap
+            self.heap += max(args[0], 1) + 1
+            return address
+        if name == "String.appendChar":
+            self.ram[args[0]] += 1
+            self.ram[args[0] + self.ram[args[0]]] = args[1]
+            return args[0]
+        if name == "Math.multiply":
+            return word(args[0] * args[1])
+        if name == "Math.divide":
+            return int(args[0] / args[1])
+        return None
+
+
+def test_the_generated_code_runs():
+    machine = VirtualMachine(compile_source("""class Main {
+        field int value;
+        field Array items;
+        static int calls;
+        static String text;
+        constructor Main new(int n) {
+            var int i;
+            let items = Array.new(n);
+            while (i < n) { let items[i] = i * i; let i = i + 1; }
+            let value = n;
+            return this;
+        }
+        method int sum() {
+            var int i, total;
+            while (i < value) {
+                let total = total + items[i];
+                let i = i + 1;
+            }
+            return total;
+        }
+        function int fact(int n) {
+            let calls = calls + 1;
+            if (n < 2) { return 1; }
+            return n * Main.fact(n - 1);
+        }
+        function int main() {
+            var Main m;
+            let m = Main.new(5);
+            let text = "abc";
+            if (~(m.sum() = 30) | false) { return -1; }
+            return Main.fact(6) + (-m.sum() / 7);
+        }
+    }"""))
+    # the sum of the squares is 30, 6! is 720 and -30 / 7 is -4
+    assert machine.run("Main.main") == 716
+    calls, text = machine.ram[16:18]
+    assert calls == 6
+    # the built in String keeps its length, then its characters
+    assert machine.ram[text:text + 4] == [3, 97, 98, 99]
+
+
+def test_folding_keeps_the_results():
+    source = """class Main { function int main() {
+        var int x;
+        let x = 3;
+        return ((4 * 8) + 2) * (~0 + x) - ((32767 + 1) / 2) + (x / (2 - 2 + 1))
+            + (2 * 3 + x) - (200 * 200);
+    } }"""
+    folded = compile_source(source)
+    unfolded = compile_source(source, fold=False)
+    assert len(folded) < len(unfolded)
+    # left to right in 16 bits: 68 + 16384 + 3 + 9 + 25536 wraps around
+    assert VirtualMachine(folded).run("Main.main") == \
+        VirtualMachine(unfolded).run("Main.main") == -23536
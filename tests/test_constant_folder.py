@@ -0,0 +1,83 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the ConstantFolder. Run with python -m pytest.
+"""
+import io
+
+import pytest
+
+import JackAnalyzer
+from ConstantFolder import divide, fold_constants, to_word
+
+
+def fold(expression):
+    """The tokens of an expression once it is folded."""
+    tree = JackAnalyzer.parse_file(io.StringIO(
+        "class A { function void f() { let x = " + expression
+        + "; return; } }"))
+    fold_constants(tree)
+    words = [tree.text(node) for _, node, _ in tree.walk()
+             if tree.is_terminal(node)]
+    return " ".join(words[words.index("=") + 1:words.index(";")])
+
+
+@pytest.mark.parametrize("expression, folded", [
+    ("(4*8)+2", "34"),
+    ("- (- 5)", "5"),
+    ("true & false", "0"),
+    ("null = 0", "- 1"),
+    ("#8", "4"),
+    ("-7 / 2", "- 3"),
+    ("f(1 + 1)", "f ( 2 )"),
+    ("a[2 * 2]", "a [ 4 ]"),
+    ("x + (2 + 3)", "x + 5"),
+])
+def test_constants_are_folded(expression, folded):
+    assert fold(expression) == folded
+
+
+def test_literals_are_kept():
+    # ~0 is already how -1 can be written, but its value is known
+    assert fold("~0") == "~ 0"
+    assert fold("~0 + 1") == "0"
+    assert fold("- 3") == "- 3"
+    assert fold("x") == "x"
+
+
+@pytest.mark.parametrize("expression, folded", [
+    ("32767 + 1", "~ 32767"),
+    ("^16384", "~ 32767"),
+    ("-32767 - 2", "32767"),
+    ("200 * 200", "- 25536"),
+])
+def test_results_wrap_to_16_bits(expression, folded):
+    assert fold(expression) == folded
+
+
+def test_division_by_zero_is_left_for_run_time():
+    assert divide(1, 0) is None
+    assert fold("1 / 0") == "1 / 0"
+    # the chain stops folding at the division, the rest stays as written
+    assert fold("1 / 0 + 2") == "1 / 0 + 2"
+    assert fold("2 + 2 / 0") == "4 / 0"
+    # a shift of a negative number is left as well
+    assert fold("#(-4)") == "# - 4"
+
+
+def test_chains_are_folded_left_to_right():
+    # Jack has no operator precedence
+    assert fold("2 + 3 * 4") == "20"
+    assert fold("2 * 3 + x") == "6 + x"
+    assert fold("x + 2 * 3") == "x + 2 * 3"
+    assert fold("(1 < 2) | x") == "- 1 | x"
+
+
+def test_words_are_16_bits():
+    assert to_word(32768) == -32768
+    assert to_word(-32769) == 32767
+    assert divide(-7, 2) == -3
+    assert divide(-32768, -1) == -32768
@@ -0,0 +1,99 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the CompilationEngine: the XML of every statement, and the inputs
+that a strict engine rejects. Run with python -m pytest.
+"""
+import io
+import os
+
+import pytest
+
+import JackAnalyzer
+from JackTokenizer import TOKEN_REGEX, JackSyntaxError
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# inputs that are not valid Jack, each with a different mistake
+INVALID = [
+    "class A { field int; }",
+    "class A { static int x, ; }",
+    "class A { function void f() { do x; return; } }",
+    "class A { function void f() { let 3 = 4; return; } }",
+    "class A { function void f() { return let; } }",
+    "class A { function 3 f() { return; } }",
+    "class A { function void f() { do x.y; return; } }",
+    "class A { function void f() { let x = ; return; } }",
+    "class A { function void f() { let x = 1 +; return; } }",
+    "class A { function void f() { let x = *1; return; } }",
+    "class A { function void f(int) { return; } }",
+    "class A { function void f() { if (x) { return; } }",
+    "class A { } }",
+    "class { }",
+    "let x = 1;",
+    "",
+]
+
+
+def test_every_statement_is_written_as_the_course_does():
+    # Statements.xml was written by hand, in the format of the course's
+    # compare files
+    with open(os.path.join(DATA, "Statements.jack"), 'r') as source_file, \
+            open(os.path.join(DATA, "Statements.xml"), 'r') as xml_file:
+        output = io.StringIO()
+        JackAnalyzer.analyze_file(source_file, output)
+        assert output.getvalue() == xml_file.read()
+
+
+def test_valid_programs_check():
+    with open(os.path.join(DATA, "Statements.jack"), 'r') as source_file:
+        assert JackAnalyzer.check_file(source_file) is None
+
+
+@pytest.mark.parametrize("text", INVALID)
+def test_invalid_input_fails(text):
+    assert JackAnalyzer.check_file(io.StringIO(text)) is not None
+    assert JackAnalyzer.check_file(text.encode()) is not None
+    assert JackAnalyzer.check_file(io.StringIO(text), streaming=True) \
+        is not None
+    assert JackAnalyzer.check_file(io.StringIO(text), table=True) is not None
+
+
+def test_truncated_input_fails():
+    # every prefix of a class is missing at least its last "}", a parse
+    # that does not stop at the end of the input would never finish
+    with open(os.path.join(DATA, "Statements.jack"), 'r') as source_file:
+        words = [match.group(1) for match in
+                 TOKEN_REGEX.finditer(source_file.read()) if match.group(1)]
+    for length in range(len(words)):
+        text = " ".join(words[:length])
+        for streaming in (False, True):
+            with pytest.raises(JackSyntaxError):
+                JackAnalyzer.analyze_file(io.StringIO(text), io.StringIO(),
+                                          streaming)
+        with pytest.raises(JackSyntaxError):
+            JackAnalyzer.analyze_file(text.encode(), io.StringIO())
+        with pytest.raises(JackSyntaxError):
+            JackAnalyzer.parse_file(io.StringIO(text))
+        with pytest.raises(JackSyntaxError):
+            JackAnalyzer.analyze_file(io.StringIO(text), io.StringIO(),
+                                      table=True)
+
+
+@pytest.mark.parametrize("symbol", [";", ")", "}", "*", "="])
+def test_only_unary_ops_start_a_term(symbol):
+    text = "class A { function void f() { let x = " + symbol + " 1; } }"
+    with pytest.raises(JackSyntaxError, match="expected a term"):
+        JackAnalyzer.analyze_file(io.StringIO(text), io.StringIO())
+
+
+@pytest.mark.parametrize("op", ["-", "~", "^", "#"])
+def test_unary_ops(op):
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(
+        "class A { function void f() { let x = " + op + "1; return; } }"),
+        output)
+    assert "<symbol> " + op + " </symbol>" in output.getvalue()
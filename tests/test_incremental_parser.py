@@ -0,0 +1,90 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the IncrementalParser: whatever the edit, the XML it returns is the
+XML of a full parse. Run with python -m pytest.
+"""
+import io
+import json
+import random
+
+import JackAnalyzer
+from IncrementalParser import IncrementalParser
+
+SOURCE = """\
+class Main {
+    field int x; // the x
+    static boolean y;
+
+    /** the first */
+    function void a() { let x = 1; return; }
+
+    method int b(int n) {
+        while (n > 0) { let n = n - 1; }
+        return n;
+    }
+
+    function void c() { do Output.printString("a } b"); return; }
+}
+"""
+# edits that can move the borders of members, tokens and comments
+PIECES = [" ", "\n", "x", "1", ";", "}", "{", "/*", "*/", "//", '"',
+          "var int z;", "function void d() { return; }"]
+
+
+def full_parse(source):
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(source), output)
+    return output.getvalue()
+
+
+def test_only_the_changed_member_is_parsed(tmp_path):
+    parser = IncrementalParser(str(tmp_path))
+    assert parser.analyze("Main.xml", SOURCE) == full_parse(SOURCE)
+    assert (parser.parsed, parser.reused) == (5, 0)
+    edited = SOURCE.replace("let n = n - 1;", "let n = n - 2;")
+    assert parser.analyze("Main.xml", edited) == full_parse(edited)
+    assert (parser.parsed, parser.reused) == (1, 4)
+    assert parser.analyze("Main.xml", edited) == full_parse(edited)
+    assert (parser.parsed, parser.reused) == (0, 5)
+
+
+def test_the_state_keeps_hashes_not_sources(tmp_path):
+    parser = IncrementalParser(str(tmp_path))
+    parser.analyze("Main.xml", SOURCE)
+    parser.save()
+    with open(parser.path, 'r') as state_file:
+        state = state_file.read()
+    # the comments are only in the source
+    assert "the first" not in state and "the x" not in state
+    # a new run reads it back and reuses it
+    parser = IncrementalParser(str(tmp_path))
+    edited = SOURCE.replace("let x = 1;", "let x = 2;")
+    assert parser.analyze("Main.xml", edited) == full_parse(edited)
+    assert (parser.parsed, parser.reused) == (1, 4)
+    assert json.loads(state)["files"][parser.name("Main.xml")]["length"] \
+        == len(SOURCE)
+
+
+def test_every_edit_gives_the_xml_of_a_full_parse(tmp_path):
+    rng = random.Random(0)
+    incremental = 0
+    for _ in range(300):
+        parser = IncrementalParser(str(tmp_path))
+        parser.analyze("Main.xml", SOURCE)
+        position = rng.randrange(len(SOURCE))
+        removed = rng.choice([0, 0, 1, 3])
+        edited = SOURCE[:position] + rng.choice(PIECES) \
+            + SOURCE[position + removed:]
+        xml = parser.analyze("Main.xml", edited)
+        if xml is None:
+            # analyzed whole by the caller
+            continue
+        assert xml == full_parse(edited), edited
+        incremental += parser.reused > 0
+    # most of these edits break the syntax, and are analyzed whole, but the
+    # ones inside a member reuse the others
+    assert incremental > 50
@@ -0,0 +1,113 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the library API: it returns what the analyzer writes into files,
+from many threads at once. Run with python -m pytest.
+"""
+import io
+import os
+import threading
+
+import pytest
+
+import JackAnalyzer
+import JackAPI
+from BinaryTree import read_tree
+from JackTokenizer import JackSyntaxError
+from XmlWriter import XmlWriter
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+SQUARE = """\
+class Square {
+    function int area(int side) { return side * side; }
+}
+"""
+
+
+def statements():
+    with open(os.path.join(DATA, "Statements.jack"), 'r') as source_file:
+        return source_file.read()
+
+
+def analyze(text, **options):
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(text), output, **options)
+    return output.getvalue()
+
+
+def test_analyze_source_returns_the_xml():
+    text = statements()
+    assert JackAPI.analyze_source(text) == analyze(text)
+    assert JackAPI.analyze_source(text.encode()) == analyze(text)
+    assert JackAPI.analyze_source(text, compact=True) == \
+        analyze(text, compact=True)
+
+
+def test_parse_source_returns_the_tree():
+    text = statements()
+    output = io.StringIO()
+    JackAPI.parse_source(text).write_xml(XmlWriter(output))
+    assert output.getvalue() == analyze(text)
+    output = io.StringIO()
+    read_tree(JackAPI.analyze_source(text, binary=True)) \
+        .write_xml(XmlWriter(output))
+    assert output.getvalue() == analyze(text)
+
+
+def test_check_source():
+    assert JackAPI.check_source(statements()) is None
+    assert JackAPI.check_source("class A { } }") is not None
+
+
+@pytest.mark.parametrize("text", [
+    "class A { function void f() { do x; return; } }",
+    "class A { function void f() { return let; } }",
+    "class A { function void f(int) { return; } }",
+    "class A { } }",
+])
+def test_invalid_source_raises(text):
+    assert JackAPI.check_source(text) is not None
+    for call in (JackAPI.analyze_source, JackAPI.parse_source,
+                 JackAPI.compile_source):
+        with pytest.raises(JackSyntaxError):
+            call(text)
+    # the session of a call that raised still works
+    assert JackAPI.analyze_source(SQUARE) == analyze(SQUARE)
+
+
+def test_compile_source():
+    vm_code = JackAPI.compile_source(SQUARE)
+    assert vm_code.startswith("function Square.area 0\n")
+    assert "call Math.multiply 2\n" in vm_code
+
+
+def test_sessions_are_reused():
+    pool = JackAPI.AnalyzerPool(size=1)
+    with pool.session() as session:
+        pass
+    with pool.session() as again:
+        assert again is session
+    # a session that is still in use is not handed out twice
+    with pool.session() as first, pool.session() as second:
+        assert first is not second
+    assert len(pool.idle) == 1
+
+
+def test_threads_get_the_same_results():
+    texts = [statements(), SQUARE] * 8
+    results = [None] * len(texts)
+
+    def analyze_one(index):
+        results[index] = JackAPI.analyze_source(texts[index])
+
+    threads = [threading.Thread(target=analyze_one, args=(index,))
+               for index in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [analyze(text) for text in texts]
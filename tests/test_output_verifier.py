@@ -0,0 +1,88 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the OutputVerifier: the words of the files are compared, whatever
+the whitespace between them, and every difference is reported once. Run
+with python -m pytest.
+"""
+import io
+
+import pytest
+
+import OutputVerifier
+
+OUTPUT = """\
+<class>
+  <keyword> class </keyword>
+  <identifier> Main </identifier>
+  <symbol> { </symbol>
+  <symbol> } </symbol>
+</class>
+"""
+
+
+def write(path, text):
+    with open(str(path), 'w', newline='') as file:
+        file.write(text)
+    return str(path)
+
+
+def test_whitespace_does_not_matter(tmp_path):
+    output = write(tmp_path / "Maintest.xml", OUTPUT)
+    assert OutputVerifier.verify_file(
+        write(tmp_path / "same.xml", OUTPUT), output) == []
+    # the course files have \r\n line ends and their own indentation
+    assert OutputVerifier.verify_file(write(
+        tmp_path / "crlf.xml", OUTPUT.replace("\n", "\r\n").replace(
+            "  ", "\t")), output) == []
+
+
+def test_a_changed_word_is_reported_where_it_is(tmp_path):
+    output = write(tmp_path / "Maintest.xml", OUTPUT)
+    reference = write(tmp_path / "Main.xml",
+                      OUTPUT.replace("Main", "Other"))
+    assert OutputVerifier.verify_file(reference, output) == [
+        "{}:3:16: expected 'Other' ({}:3:16), got 'Main'".format(
+            output, reference)]
+
+
+def test_a_missing_word_is_reported_once(tmp_path):
+    body = "".join("  <symbol> {} </symbol>\n".format(index)
+                   for index in range(100))
+    output = write(tmp_path / "Maintest.xml",
+                   "<class>\n" + body + "</class>\n")
+    reference = write(tmp_path / "Main.xml",
+                      "<class>\n  <extra/>\n" + body + "</class>\n")
+    assert OutputVerifier.verify_file(reference, output) == [
+        "{}:2:3: expected '<extra/>' ({}:2:3), got '<symbol>'".format(
+            output, reference)]
+    assert OutputVerifier.verify_file(
+        reference, write(tmp_path / "Short.xml", "<class>\n")) == [
+        "{}: expected '<extra/>' ({}:2:3), got end of file".format(
+            tmp_path / "Short.xml", reference)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+def test_words_cross_chunks(monkeypatch, chunk_size):
+    monkeypatch.setattr(OutputVerifier, "CHUNK_SIZE", chunk_size)
+    data = OUTPUT.replace("\n", "\r\n").encode()
+    words = list(OutputVerifier.located_words(io.BytesIO(data)))
+    assert [word[0] for word in words] == data.split()
+    assert words[4] == (b"<identifier>", 3, 3)
+    assert [word for chunk in OutputVerifier.word_chunks(io.BytesIO(data))
+            for word in chunk] == data.split()
+
+
+def test_verify_files_keeps_the_order(tmp_path):
+    output = write(tmp_path / "Maintest.xml", OUTPUT)
+    same = write(tmp_path / "Main.xml", OUTPUT)
+    other = write(tmp_path / "Other.xml", OUTPUT.replace("Main", "Other"))
+    pairs = [(same, output), (other, output), (same, output)]
+    reports = OutputVerifier.verify_files(pairs, jobs=2)
+    assert reports == OutputVerifier.verify_files(pairs)
+    assert [len(report) for report in reports] == [0, 1, 0]
+    assert "cannot compare" in OutputVerifier.verify_file(
+        str(tmp_path / "None.xml"), output)[0]
@@ -0,0 +1,164 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the warm JackServer and its JackClient. Run with python -m pytest.
+"""
+import io
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import JackAnalyzer
+from JackClient import JackClient
+from JackServer import JackServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = "class A { function void f() { do Output.printInt(1 + 2); return; } }"
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    """The socket of a server that runs in a thread of this process."""
+    path = str(tmp_path / "jack.sock")
+    server = JackServer(path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield path
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+@pytest.fixture
+def client(socket_path):
+    client = JackClient(socket_path)
+    yield client
+    client.close()
+
+
+def analyze(text):
+    output = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(text), output)
+    return output.getvalue()
+
+
+def test_sources_are_analyzed(client):
+    assert client.request(op="ping")["pid"] == os.getpid()
+    assert client.analyze_source(SOURCE) == analyze(SOURCE)
+    assert client.check_source(SOURCE) is None
+    assert "expected" in client.check_source("class A { field; }")
+
+
+def test_the_command_line_runs_in_the_server(client, tmp_path):
+    source = tmp_path / "A.jack"
+    source.write_text(SOURCE)
+    # relative paths are relative to the directory of the client
+    result = client.run(["--check", "A.jack"], cwd=str(tmp_path))
+    assert result == {"ok": True, "status": 0, "stdout": "{}: ok\n".format(
+        source), "stderr": ""}
+    result = client.run(["A.jack"], cwd=str(tmp_path))
+    assert result["status"] == 0
+    assert (tmp_path / "Atest.xml").read_text() == analyze(SOURCE)
+    # a bad command line is an answer, not the end of the server
+    result = client.run(["--no-such-option", "A.jack"], cwd=str(tmp_path))
+    assert result["status"] == 2
+    assert "--no-such-option" in result["stderr"]
+    assert client.request(op="ping")["ok"]
+
+
+def test_a_bad_request_is_an_error(client):
+    response = client.request(op="no such op")
+    assert not response["ok"]
+    assert response["error"] == "ValueError: unknown op 'no such op'"
+    response = client.request(op="analyze_source")
+    assert not response["ok"]
+
+
+def test_the_client_runs_the_analyzer_without_a_server(tmp_path):
+    (tmp_path / "A.jack").write_text(SOURCE)
+    environment = dict(os.environ, JACK_ANALYZER_SOCKET=str(
+        tmp_path / "no-server.sock"))
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "JackClient.py"), "--check",
+         "A.jack"], cwd=str(tmp_path), env=environment,
+        stdout=subprocess.PIPE, universal_newlines=True)
+    assert (result.returncode, result.stdout) == (
+        0, "{}: ok\n".format(tmp_path / "A.jack"))
+
+
+def test_requests_run_in_the_server_process(client, tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a request started a pool of processes")
+
+    monkeypatch.setattr(JackAnalyzer.concurrent.futures,
+                        "ProcessPoolExecutor", no_pool)
+    for name in ("A.jack", "B.jack"):
+        (tmp_path / name).write_text(SOURCE.replace("A", name[0]))
+    result = client.run(["--jobs", "4", str(tmp_path)])
+    assert result["status"] == 0, result["stderr"]
+    assert (tmp_path / "Btest.xml").exists()
+
+
+def test_a_live_server_is_not_replaced(socket_path):
+    with pytest.raises(FileExistsError, match="already listens"):
+        JackServer(socket_path)
+    # the first server still answers
+    client = JackClient(socket_path)
+    assert client.request(op="ping")["ok"]
+    client.close()
+
+
+def test_only_a_dead_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "jack.sock")
+    with open(path, 'w') as not_a_socket:
+        not_a_socket.write("data")
+    with pytest.raises(FileExistsError, match="is not a socket"):
+        JackServer(path)
+    assert (tmp_path / "jack.sock").read_text() == "data"
+    os.remove(path)
+    # bound and closed without a server: the file stays, nobody answers
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    dead.bind(path)
+    dead.close()
+    server = JackServer(path)
+    server.server_close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("server", [False, True], ids=["local", "server"])
+def test_the_script_keeps_every_argument_whole(tmp_path, server):
+    directory = tmp_path / "with space"
+    directory.mkdir()
+    (directory / "A.jack").write_text(SOURCE)
+    # the script is kept with CRLF line ends like the rest of the course
+    # files, so an LF copy of it is run next to the analyzer
+    with open(os.path.join(ROOT, "JackAnalyzer"), newline="") as script:
+        text = script.read().replace("\r\n", "\n")
+    script_path = os.path.join(str(tmp_path), "JackAnalyzer")
+    with open(script_path, 'w') as script:
+        script.write(text)
+    environment = dict(os.environ, JACK_ANALYZER_SOCKET="")
+    if server:
+        environment["JACK_ANALYZER_SOCKET"] = str(tmp_path / "jack.sock")
+        jack_server = JackServer(environment["JACK_ANALYZER_SOCKET"])
+        thread = threading.Thread(target=jack_server.serve_forever)
+        thread.start()
+    try:
+        result = subprocess.run(
+            ["sh", script_path, "--check", str(directory / "A.jack")],
+            cwd=ROOT, env=environment, stdout=subprocess.PIPE,
+            universal_newlines=True)
+    finally:
+        if server:
+            jack_server.shutdown()
+            thread.join()
+            jack_server.server_close()
+    assert (result.returncode, result.stdout) == (
+        0, "{}: ok\n".format(directory / "A.jack"))
@@ -0,0 +1,50 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the flat SyntaxTree and the TreeBuilder. Run with python -m pytest.
+"""
+from SyntaxTree import SyntaxTree, TreeBuilder
+
+
+def build():
+    """The tree of "class A { }", given to a TreeBuilder like the engine
+    gives it to an XmlWriter."""
+    builder = TreeBuilder()
+    builder.open_tag("class", 0)
+    builder.terminal("keyword", "class", 1)
+    builder.terminal("identifier", "A", 1)
+    builder.open_tag("classVarDec", 1)
+    builder.close_tag("classVarDec", 1)
+    builder.terminal("symbol", "}", 1)
+    builder.close_tag("class", 0)
+    return builder.tree
+
+
+def test_nodes_are_linked():
+    tree = build()
+    assert isinstance(tree, SyntaxTree)
+    assert len(tree) == 5
+    assert tree.kinds[tree.root] == "class"
+    children = list(tree.children(tree.root))
+    assert [tree.kinds[child] for child in children] == [
+        "keyword", "identifier", "classVarDec", "symbol"]
+    assert [tree.text(child) for child in children] == [
+        "class", "A", None, "}"]
+    assert [tree.is_terminal(child) for child in children] == [
+        True, True, False, True]
+
+
+def test_walk_is_preorder():
+    tree = build()
+    assert [(entering, tree.kinds[node], depth)
+            for entering, node, depth in tree.walk()] == [
+        (True, "class", 0), (True, "keyword", 1), (True, "identifier", 1),
+        (True, "classVarDec", 1), (False, "classVarDec", 1),
+        (True, "symbol", 1), (False, "class", 0)]
+
+
+def test_an_empty_tree_has_no_nodes():
+    assert list(SyntaxTree().walk()) == []
@@ -0,0 +1,81 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the grammar tables and the table driven TableEngine. Run with
+python -m pytest.
+"""
+import io
+import os
+
+import pytest
+
+import JackAnalyzer
+from JackGrammar import GRAMMAR, GrammarError, build_table, parse_grammar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, "tests", "data")
+
+
+def sources():
+    found = []
+    for path in (os.path.join(DATA, "Statements.jack"),
+                 os.path.join(ROOT, "samtest", "func_dec.jack")):
+        with open(path, 'r') as source_file:
+            found.append(source_file.read())
+    return found
+
+
+def test_the_jack_grammar_is_ll1():
+    rules = parse_grammar(GRAMMAR)
+    table = build_table(rules)
+    assert next(iter(rules)) == "_file"
+    assert table["_statement"] == {
+        "let": 0, "if": 1, "while": 2, "do": 3, "return": 4}
+    # an empty alternative is taken on what can follow the rule
+    assert table["_else"]["else"] == 0
+    assert table["_else"]["}"] == 1
+
+
+def test_a_grammar_that_is_not_ll1_is_refused():
+    rules = parse_grammar("""
+        start: 'a' 'b' | 'a' 'c'
+    """.replace("        ", ""))
+    assert rules == {"start": [["'a'", "'b'"], ["'a'", "'c'"]]}
+    with pytest.raises(GrammarError):
+        build_table(rules)
+    with pytest.raises(GrammarError):
+        parse_grammar("start: missing")
+
+
+def test_the_table_engine_writes_the_same_xml():
+    for text in sources():
+        expected = io.StringIO()
+        JackAnalyzer.analyze_file(io.StringIO(text), expected)
+        for options in ({}, {"streaming": True}, {"compact": True}):
+            output = io.StringIO()
+            JackAnalyzer.analyze_file(io.StringIO(text), output, table=True,
+                                      **options)
+            if options.get("compact"):
+                assert output.getvalue() == "".join(
+                    line.lstrip()
+                    for line in expected.getvalue().splitlines(True))
+            else:
+                assert output.getvalue() == expected.getvalue()
+        output = io.StringIO()
+        JackAnalyzer.analyze_file(text.encode(), output, table=True)
+        assert output.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize("text", [
+    "class A { function void f() { do x.y; return; } }",
+    "class A { function void f() { let x = 1 +; return; } }",
+    "class A { field int; }",
+    "class A { function void f() { return let; } }",
+    "class A { } }",
+    "",
+])
+def test_the_table_engine_checks_every_token(text):
+    assert JackAnalyzer.check_file(io.StringIO(text), table=True) is not None
@@ -0,0 +1,229 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the one pass, the streaming and the memory mapped tokenizer. Run
+with python -m pytest.
+"""
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import JackTokenizer as tokenizer_module
+from JackTokenizer import MAX_LOOKAHEAD, JackSyntaxError, JackTokenizer, \
+    MappedJackTokenizer, stream_tokens
+
+# a source where tokens, comments and strings cross every small chunk size
+SOURCE = '''/** A class,
+ * with a doc comment. */
+class LongName_123 {
+    // a line comment "with quotes"
+    function void f() {
+\tdo Output.printString("a /* b */ c // d");
+        let x = 32767 + y; /* not closed
+'''
+
+
+def scan(text, streaming=False):
+    """The tokens of a text, in the order advance() gives them."""
+    tokenizer = JackTokenizer(io.StringIO(text), streaming)
+    return scan_tokenizer(tokenizer)
+
+
+def scan_tokenizer(tokenizer):
+    found = []
+    while tokenizer.has_more_tokens():
+        found.append(tokenizer.current_token)
+        tokenizer.advance()
+    return found
+
+
+def test_tokens_are_split_on_symbols():
+    assert scan("let a[i]=Math.abs(-x);") == [
+        "let", "a", "[", "i", "]", "=", "Math", ".", "abs", "(", "-", "x",
+        ")", ";"]
+
+
+def test_comments_are_skipped():
+    text = "/** doc\n * over lines */ class // a comment\n\tA /* x */ { }"
+    assert scan(text) == ["class", "A", "{", "}"]
+
+
+def test_tabs_do_not_stick_to_tokens():
+    assert scan("\t\tlet\tx = 1;\n") == ["let", "x", "=", "1", ";"]
+
+
+def test_string_constants_are_one_token():
+    assert scan('do f("a // b /* c", 12);') == [
+        "do", "f", "(", '"a // b /* c"', ",", "12", ")", ";"]
+
+
+def test_string_val_drops_the_quotes():
+    tokenizer = JackTokenizer(io.StringIO('"a < b" 12'))
+    assert tokenizer.current_token == '"a < b"'
+    assert tokenizer.string_val() == "a < b"
+    tokenizer.advance()
+    assert tokenizer.string_val() is None
+
+
+def test_unclosed_block_comment_runs_to_the_end():
+    assert scan("class A { } /* never closed\nclass B") == [
+        "class", "A", "{", "}"]
+
+
+def test_token_types():
+    tokenizer = JackTokenizer(io.StringIO('class A ^ 12 "s" #'))
+    found = []
+    while tokenizer.has_more_tokens():
+        found.append(tokenizer.token_type())
+        tokenizer.advance()
+    assert found == ["keyword", "identifier", "symbol", "integerConstant",
+                     "stringConstant", "symbol"]
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 9))
+def test_chunks_give_the_same_tokens(chunk_size):
+    assert list(stream_tokens(io.StringIO(SOURCE), chunk_size)) == \
+        scan(SOURCE)
+
+
+def test_streaming_tokenizer_gives_the_same_tokens():
+    for text in (SOURCE, "", "   ", "class"):
+        assert scan(text, streaming=True) == scan(text)
+
+
+def types(text, streaming=False):
+    """The type of every token of a text."""
+    tokenizer = JackTokenizer(io.StringIO(text), streaming)
+    found = []
+    while tokenizer.has_more_tokens():
+        found.append(tokenizer.token_type())
+        tokenizer.advance()
+    return found
+
+
+def test_types_are_kept_next_to_the_tokens():
+    tokenizer = JackTokenizer(io.StringIO(SOURCE))
+    assert tokenizer.token_types == [
+        tokenizer.classify(token) for token in tokenizer.tokens]
+    assert types(SOURCE, streaming=True) == types(SOURCE)
+    # the accessor of the type gives the token, the others give None
+    tokenizer = JackTokenizer(io.StringIO("while"))
+    assert tokenizer.keyword() == "while"
+    assert tokenizer.symbol() is None
+    assert tokenizer.identifier() is None
+
+
+def test_mapped_tokenizer_gives_the_same_tokens():
+    for text in (SOURCE, "", "class", 'let s = "x";'):
+        tokenizer = MappedJackTokenizer(text.encode())
+        types = tokenizer.token_types
+        assert scan_tokenizer(tokenizer) == scan(text)
+        assert types == JackTokenizer(io.StringIO(text)).token_types
+    tokenizer = MappedJackTokenizer(b"class Main {")
+    assert bytes(tokenizer.token_view(1)) == b"Main"
+
+
+def test_mapped_tokenizer_keeps_characters_whole():
+    text = 'let s = "héllo 日本"; € // ç\n/* ü */ ö'
+    assert scan_tokenizer(MappedJackTokenizer(text.encode())) == scan(text)
+    # a byte that is not utf-8 is a syntax error, not a crash
+    with pytest.raises(JackSyntaxError):
+        scan_tokenizer(MappedJackTokenizer(b"class Bad { \xff }"))
+
+
+def test_mapped_tokenizer_reads_unicode_like_text():
+    # a no-break space separates tokens and "é" continues a name, as in
+    # TOKEN_REGEX, although neither is so in a bytes pattern
+    text = "class\u00a0A {\u00a0field int x;\u2003static int classé, é2; }"
+    tokenizer = MappedJackTokenizer(text.encode())
+    expected = JackTokenizer(io.StringIO(text))
+    assert tokenizer.tokens == expected.tokens
+    assert tokenizer.token_types == expected.token_types
+    assert tokenizer.tokens[:2] == ["class", "A"]
+    assert "classé" in tokenizer.tokens
+    assert [bytes(tokenizer.token_view(index))
+            for index in range(len(tokenizer.tokens))] == \
+        [token.encode() for token in tokenizer.tokens]
+
+
+# the eager, the streaming and the mapped tokenizer of a text
+TOKENIZERS = {
+    "eager": lambda text: JackTokenizer(io.StringIO(text)),
+    "streaming": lambda text: JackTokenizer(io.StringIO(text), True),
+    "mapped": lambda text: MappedJackTokenizer(text.encode()),
+}
+
+
+@pytest.mark.parametrize("kind", sorted(TOKENIZERS))
+def test_peek_does_not_advance(kind):
+    words = scan(SOURCE)
+    tokenizer = TOKENIZERS[kind](SOURCE)
+    for index, word in enumerate(words):
+        assert tokenizer.current_token == word
+        for k in range(1, MAX_LOOKAHEAD + 1):
+            expected = words[index + k] if index + k < len(words) else ''
+            # peeking twice, and out of order, gives the same tokens
+            assert tokenizer.peek(k) == expected
+            assert tokenizer.peek(MAX_LOOKAHEAD + 1 - k) == (
+                words[index + MAX_LOOKAHEAD + 1 - k]
+                if index + MAX_LOOKAHEAD + 1 - k < len(words) else '')
+            assert tokenizer.peek_type(k) == (
+                JackTokenizer(io.StringIO(expected)).classify(expected))
+        tokenizer.advance()
+    assert not tokenizer.has_more_tokens()
+
+
+def test_peek_is_bounded():
+    for new_tokenizer in TOKENIZERS.values():
+        tokenizer = new_tokenizer("class A { }")
+        with pytest.raises(ValueError):
+            tokenizer.peek(MAX_LOOKAHEAD + 1)
+        with pytest.raises(ValueError):
+            tokenizer.peek(0)
+
+
+def test_main_prints_the_tokens_like_the_course(tmp_path, capsys,
+                                                 monkeypatch):
+    path = tmp_path / "A.jack"
+    path.write_text('class A { let x = 007 < "a & b"; }')
+    assert tokenizer_module.main([str(path)]) == 0
+    assert capsys.readouterr().out == (
+        "<tokens>\n"
+        "<keyword> class </keyword>\n"
+        "<identifier> A </identifier>\n"
+        "<symbol> { </symbol>\n"
+        "<keyword> let </keyword>\n"
+        "<identifier> x </identifier>\n"
+        "<symbol> = </symbol>\n"
+        "<integerConstant> 7 </integerConstant>\n"
+        "<symbol> &lt; </symbol>\n"
+        "<stringConstant> a &amp; b </stringConstant>\n"
+        "<symbol> ; </symbol>\n"
+        "<symbol> } </symbol>\n"
+        "</tokens>\n")
+    # a bad token is reported, and nothing of that file is written
+    monkeypatch.setattr(sys, "stdin", io.StringIO("let x = $;"))
+    assert tokenizer_module.main(["-", str(tmp_path / "none.jack")]) == 1
+    output = capsys.readouterr()
+    assert output.out == ""
+    assert output.err.splitlines() == [
+        "-: invalid token '$'",
+        "{}: [Errno 2] No such file or directory: '{}'".format(
+            tmp_path / "none.jack", tmp_path / "none.jack")]
+
+
+def test_the_tokenizer_runs_as_a_script():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "JackTokenizer.py")],
+        input="class A { }", stdout=subprocess.PIPE,
+        universal_newlines=True)
+    assert result.returncode == 0
+    lines = result.stdout.splitlines()
+    assert (lines[0], len(lines), lines[-1]) == ("<tokens>", 6, "</tokens>")
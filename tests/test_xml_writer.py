@@ -0,0 +1,93 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+
+Tests of the buffered XmlWriter. Run with python -m pytest.
+"""
+import io
+
+from JackTokenizer import JackTokenizer
+from XmlWriter import NullWriter, SkipWriter, XmlWriter
+
+
+def write(writer):
+    writer.open_tag("class", 0)
+    writer.terminal("keyword", "class", 1)
+    writer.open_tag("classVarDec", 1)
+    writer.terminal("integerConstant", 12, 2)
+    writer.close_tag("classVarDec", 1)
+    writer.close_tag("class", 0)
+
+
+def test_tags_are_indented_by_depth():
+    output = io.StringIO()
+    write(XmlWriter(output))
+    assert output.getvalue() == (
+        "<class>\n"
+        "  <keyword> class </keyword>\n"
+        "  <classVarDec>\n"
+        "    <integerConstant> 12 </integerConstant>\n"
+        "  </classVarDec>\n"
+        "</class>\n")
+
+
+def test_compact_drops_the_indentation():
+    output = io.StringIO()
+    write(XmlWriter(output, compact=True))
+    indented = io.StringIO()
+    write(XmlWriter(indented))
+    assert output.getvalue() == "".join(
+        line.lstrip() for line in indented.getvalue().splitlines(True))
+
+
+def test_output_is_written_in_blocks():
+    output = io.StringIO()
+    writer = XmlWriter(output, buffer_size=40)
+    writer.open_tag("class", 0)
+    assert output.getvalue() == ""
+    writer.terminal("keyword", "class", 1)
+    writer.terminal("identifier", "Main", 1)
+    # the buffer went over 40 characters and was written out
+    assert output.getvalue().startswith("<class>\n")
+    writer.close_tag("class", 0)
+    unbuffered = io.StringIO()
+    write_all = XmlWriter(unbuffered)
+    write_all.open_tag("class", 0)
+    write_all.terminal("keyword", "class", 1)
+    write_all.terminal("identifier", "Main", 1)
+    write_all.close_tag("class", 0)
+    assert output.getvalue() == unbuffered.getvalue()
+
+
+def test_symbols_and_strings_are_escaped():
+    output = io.StringIO()
+    writer = XmlWriter(output)
+    for symbol in ("<", ">", "&", "="):
+        writer.terminal("symbol", symbol, 0)
+    writer.terminal("stringConstant", '"a < b & c > d"', 0)
+    writer.flush()
+    assert output.getvalue() == (
+        "<symbol> &lt; </symbol>\n"
+        "<symbol> &gt; </symbol>\n"
+        "<symbol> &amp; </symbol>\n"
+        "<symbol> = </symbol>\n"
+        "<stringConstant> a &lt; b &amp; c &gt; d </stringConstant>\n")
+
+
+def test_null_writer_checks_the_tokens_at_once():
+    writer = NullWriter()
+    assert writer.valid_tokens(JackTokenizer(io.StringIO("let x = 12;")))
+    # out of range, checked before anything is parsed
+    assert not writer.valid_tokens(JackTokenizer(io.StringIO("let x = 99999;")))
+    # a streaming tokenizer has no token table, its tokens are checked as
+    # they are parsed
+    assert not writer.valid_tokens(
+        JackTokenizer(io.StringIO("let x = 12;"), streaming=True))
+
+
+def test_skip_writer_writes_nothing():
+    writer = SkipWriter()
+    write(writer)
+    writer.flush()